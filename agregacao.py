@@ -0,0 +1,294 @@
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from armazenamento import (
+    DIRETORIO_DADOS, SUBDIRETORIO_AGREGADOS, COLUNA_DATA_HORA, COLUNA_ESTACAO,
+    COLUNA_ANO, abrir_dataset, filtro_particoes
+)
+
+# Agregações sobre o armazenamento particionado: os agregados diário, mensal
+# e anual são calculados na ingestão, partição a partição, e as estatísticas
+# em streaming leem uma partição (estação/ano) de cada vez, mantendo em
+# memória só acumuladores pequenos e combináveis.
+
+VALOR_AUSENTE = -9999.0
+
+# Agregados pré-calculados na ingestão (ver calcular_agregados)
+COLUNA_DATA = 'DATA'
+UNIDADES_GRAO = {'diario': 'datetime64[D]', 'mensal': 'datetime64[M]', 'anual': 'datetime64[Y]'}
+SUFIXOS_AGREGADOS = {'min': 'MIN', 'max': 'MAX', 'mean': 'MEDIA', 'count': 'HORAS'}
+
+def calcular_agregados(df: pd.DataFrame, grao: str) -> pd.DataFrame:
+    """Agrega os dados horários no grão pedido ('diario', 'mensal' ou 'anual').
+
+    Para cada medida M gera M_MIN, M_MAX, M_MEDIA e M_HORAS (horas com valor
+    válido; o sentinela -9999 conta como ausente), além de
+    PRECIPITACAO_TOTAL_SOMA. No grão diário, MEDIA_DIARIA é a média entre a
+    máxima e a mínima do dia. A coluna DATA marca o início do período e,
+    se houver coluna ESTACAO, o agrupamento é feito por estação.
+    """
+    chaves = [COLUNA_DATA_HORA, COLUNA_ESTACAO, COLUNA_ANO]
+    medidas = [col for col in df.columns if col not in chaves]
+    valores = df[medidas].replace(VALOR_AUSENTE, np.nan)
+
+    # Truncamento vetorizado do timestamp para o início do período
+    periodo = df[COLUNA_DATA_HORA].to_numpy().astype(UNIDADES_GRAO[grao]).astype('datetime64[s]')
+    grupos = [pd.Series(periodo, index=df.index, name=COLUNA_DATA)]
+    if COLUNA_ESTACAO in df.columns:
+        grupos.insert(0, df[COLUNA_ESTACAO])
+
+    agrupado = valores.groupby(grupos, observed=True, sort=True)
+    agregados = agrupado.agg(list(SUFIXOS_AGREGADOS))
+    agregados.columns = [f"{col}_{SUFIXOS_AGREGADOS[func]}" for col, func in agregados.columns]
+    for col in medidas:
+        agregados[f"{col}_HORAS"] = agregados[f"{col}_HORAS"].astype('int16')
+    if 'PRECIPITACAO_TOTAL' in medidas:
+        agregados['PRECIPITACAO_TOTAL_SOMA'] = agrupado['PRECIPITACAO_TOTAL'].sum(min_count=1)
+    if grao == 'diario' and {'TEMPERATURA_MAX', 'TEMPERATURA_MIN'} <= set(medidas):
+        agregados['MEDIA_DIARIA'] = (agregados['TEMPERATURA_MAX_MAX'] + agregados['TEMPERATURA_MIN_MIN']) / 2
+
+    return agregados.reset_index()
+
+class EsbocoQuantil:
+    """Histograma de resolução fixa usado como esboço de quantis.
+
+    Os valores são arredondados para múltiplos de `resolucao` e contados em
+    um vetor de tamanho fixo entre `minimo` e `maximo` (valores fora do
+    intervalo caem nas pontas). Como as medidas do INMET têm uma casa
+    decimal, com resolução 0.01 os quantis saem iguais aos do pandas.
+    Dois esboços com os mesmos parâmetros podem ser combinados com `+=`.
+    """
+
+    def __init__(self, minimo=-100.0, maximo=100.0, resolucao=0.01):
+        self.minimo = minimo
+        self.resolucao = resolucao
+        self.contagens = np.zeros(int(round((maximo - minimo) / resolucao)) + 1, dtype=np.int64)
+
+    def adicionar(self, valores) -> None:
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        indices = np.rint((valores - self.minimo) / self.resolucao).astype(np.int64)
+        np.clip(indices, 0, len(self.contagens) - 1, out=indices)
+        self.contagens += np.bincount(indices, minlength=len(self.contagens))
+
+    def __iadd__(self, outro):
+        self.contagens += outro.contagens
+        return self
+
+    @property
+    def total(self) -> int:
+        return int(self.contagens.sum())
+
+    def _valor_na_ordem(self, ordem, acumulado):
+        indice = int(np.searchsorted(acumulado, ordem, side='right'))
+        return self.minimo + indice * self.resolucao
+
+    def quantil(self, q: float) -> float:
+        """Quantil com interpolação linear, como em pandas.Series.quantile"""
+        n = self.total
+        if n == 0:
+            return np.nan
+        acumulado = np.cumsum(self.contagens)
+        posicao = q * (n - 1)
+        baixo, alto = int(np.floor(posicao)), int(np.ceil(posicao))
+        valor_baixo = self._valor_na_ordem(baixo, acumulado)
+        valor_alto = self._valor_na_ordem(alto, acumulado)
+        return valor_baixo + (posicao - baixo) * (valor_alto - valor_baixo)
+
+    def mediana(self) -> float:
+        return self.quantil(0.5)
+
+class AcumuladorSerie:
+    """Máximo, mínimo, contagem, soma e esboço de quantis de uma série"""
+
+    def __init__(self, **parametros_esboco):
+        self.maximo = -np.inf
+        self.minimo = np.inf
+        self.contagem = 0
+        self.soma = 0.0
+        self.esboco = EsbocoQuantil(**parametros_esboco)
+
+    def adicionar(self, valores) -> None:
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        if len(valores) == 0:
+            return
+        self.maximo = max(self.maximo, float(valores.max()))
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.contagem += len(valores)
+        self.soma += float(valores.sum())
+        self.esboco.adicionar(valores)
+
+    def __iadd__(self, outro):
+        self.maximo = max(self.maximo, outro.maximo)
+        self.minimo = min(self.minimo, outro.minimo)
+        self.contagem += outro.contagem
+        self.soma += outro.soma
+        self.esboco += outro.esboco
+        return self
+
+    @property
+    def media(self) -> float:
+        return self.soma / self.contagem if self.contagem else np.nan
+
+# Grades finas dos histogramas pré-calculados: (início, fim, largura da
+# faixa), na resolução em que o INMET registra cada medida. Valores fora da
+# grade são contados na primeira ou na última faixa.
+GRADES_HISTOGRAMA = {
+    'PRECIPITACAO_TOTAL': (0.0, 150.0, 0.2),
+    'PRESSAO_ESTACAO': (850.0, 1100.0, 0.1),
+    'VENTO_VELOCIDADE': (0.0, 50.0, 0.1),
+    'RADIACAO_GLOBAL': (0.0, 6000.0, 1.0),
+}
+
+class Histograma:
+    """Contagens de uma medida na grade fina de GRADES_HISTOGRAMA.
+
+    Histogramas da mesma medida (por exemplo, de partições diferentes) são
+    combinados com `+=`; `reagrupar` gera as faixas largas exibidas nos
+    gráficos e `densidade_kde` uma KDE gaussiana calculada sobre as faixas.
+    """
+
+    def __init__(self, medida: str, contagens=None):
+        inicio, fim, largura = GRADES_HISTOGRAMA[medida]
+        self.medida = medida
+        self.bordas = inicio + largura * np.arange(int(round((fim - inicio) / largura)) + 1)
+        self.contagens = np.zeros(len(self.bordas) - 1, dtype=np.int64)
+        if contagens is not None:
+            self.contagens += contagens
+
+    def indices(self, valores) -> np.ndarray:
+        """Faixa da grade de cada valor (sem NaN)"""
+        inicio, _, largura = GRADES_HISTOGRAMA[self.medida]
+        indices = np.floor((np.asarray(valores, dtype=np.float64) - inicio) / largura + 1e-6).astype(np.int64)
+        return np.clip(indices, 0, len(self.contagens) - 1)
+
+    def adicionar(self, valores) -> None:
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores) & (valores != VALOR_AUSENTE)]
+        self.contagens += np.bincount(self.indices(valores), minlength=len(self.contagens))
+
+    def __iadd__(self, outro):
+        self.contagens += outro.contagens
+        return self
+
+    @classmethod
+    def de_agregado(cls, agregado: pd.DataFrame, medida: str):
+        """Soma as contagens de uma medida em um agregado 'histograma' (várias partições)"""
+        linhas = agregado[agregado['MEDIDA'] == medida]
+        histograma = cls(medida)
+        np.add.at(histograma.contagens, linhas['FAIXA'].to_numpy(), linhas['CONTAGEM'].to_numpy())
+        return histograma
+
+    @property
+    def total(self) -> int:
+        return int(self.contagens.sum())
+
+    def reagrupar(self, faixas: int = 30):
+        """Agrupa as faixas finas ocupadas em até `faixas` faixas largas.
+
+        Retorna (contagens, bordas). As faixas largas são formadas por faixas
+        finas inteiras, cobrindo do menor ao maior valor observado.
+        """
+        ocupadas = np.flatnonzero(self.contagens)
+        if len(ocupadas) == 0:
+            return np.zeros(0, dtype=np.int64), self.bordas[:1]
+        primeira, ultima = ocupadas[0], ocupadas[-1] + 1
+        passo = max(1, int(np.ceil((ultima - primeira) / faixas)))
+        inicios = np.arange(primeira, ultima, passo)
+        contagens = np.add.reduceat(self.contagens[primeira:ultima], inicios - primeira)
+        bordas = self.bordas[np.append(inicios, min(inicios[-1] + passo, len(self.bordas) - 1))]
+        return contagens, bordas
+
+    def densidade_kde(self, largura_banda: float = None):
+        """KDE gaussiana calculada por convolução (FFT) sobre a grade fina.
+
+        O custo depende só do tamanho da grade, não do número de horas. Sem
+        `largura_banda`, usa a regra de Scott com o desvio padrão das
+        faixas. Retorna (centros das faixas, densidade).
+        """
+        centros = (self.bordas[:-1] + self.bordas[1:]) / 2
+        n = self.total
+        if n == 0:
+            return centros, np.zeros_like(centros)
+        largura = self.bordas[1] - self.bordas[0]
+        if largura_banda is None:
+            media = np.dot(self.contagens, centros) / n
+            desvio = np.sqrt(np.dot(self.contagens, (centros - media) ** 2) / n)
+            largura_banda = max(desvio * n ** (-1 / 5), largura)
+
+        # Núcleo amostrado na grade, até 4 desvios para cada lado
+        meio = int(np.ceil(4 * largura_banda / largura))
+        deslocamentos = np.arange(-meio, meio + 1) * largura
+        nucleo = np.exp(-0.5 * (deslocamentos / largura_banda) ** 2)
+        nucleo /= nucleo.sum()
+
+        tamanho = len(self.contagens) + len(nucleo) - 1
+        tamanho_fft = 1 << int(np.ceil(np.log2(tamanho)))
+        convolucao = np.fft.irfft(np.fft.rfft(self.contagens, tamanho_fft) * np.fft.rfft(nucleo, tamanho_fft), tamanho_fft)
+        suavizado = np.clip(convolucao[meio:meio + len(self.contagens)], 0, None)
+        return centros, suavizado / (n * largura)
+
+def calcular_histogramas(df: pd.DataFrame) -> pd.DataFrame:
+    """Histogramas das medidas de GRADES_HISTOGRAMA presentes em `df`.
+
+    Retorna, no formato longo, só as faixas com contagem: MEDIDA, FAIXA
+    (índice na grade fina) e CONTAGEM. O sentinela -9999 é ignorado.
+    """
+    partes = []
+    for medida in GRADES_HISTOGRAMA:
+        if medida not in df.columns:
+            continue
+        histograma = Histograma(medida)
+        histograma.adicionar(df[medida].to_numpy())
+        faixas = np.flatnonzero(histograma.contagens)
+        partes.append(pd.DataFrame({
+            'MEDIDA': medida,
+            'FAIXA': faixas.astype(np.int32),
+            'CONTAGEM': histograma.contagens[faixas],
+        }))
+    if not partes:
+        return pd.DataFrame({'MEDIDA': pd.Series(dtype=str),
+                             'FAIXA': pd.Series(dtype=np.int32),
+                             'CONTAGEM': pd.Series(dtype=np.int64)})
+    return pd.concat(partes, ignore_index=True)
+
+def iterar_particoes(diretorio=DIRETORIO_DADOS, colunas=None, estacoes=None, anos=None, grao=None):
+    """Gera (chaves da partição, DataFrame) lendo um arquivo por vez.
+
+    Sem `grao`, percorre as partições horárias; com `grao`, os agregados.
+    """
+    if grao is None:
+        dataset = abrir_dataset(diretorio)
+    else:
+        dataset = abrir_dataset(diretorio, f"{SUBDIRETORIO_AGREGADOS}/{grao}")
+    for fragmento in dataset.get_fragments(filter=filtro_particoes(estacoes, anos)):
+        chaves = ds.get_partition_keys(fragmento.partition_expression)
+        tabela = fragmento.to_table(columns=colunas, schema=dataset.schema)
+        yield chaves, tabela.to_pandas()
+
+def calcular_estatisticas_anuais_streaming(diretorio=DIRETORIO_DADOS, estacoes=None, anos=None) -> pd.DataFrame:
+    """Versão em streaming de calculate_annual_stats (gerar_imagens.py).
+
+    Percorre as partições do agregado diário uma a uma e acumula por ano a
+    mediana da média diária (via esboço), a máxima e a mínima. Retorna a
+    mesma tabela Ano / Mediana / Máxima / Mínima do caminho em memória.
+    """
+    colunas = ['MEDIA_DIARIA', 'TEMPERATURA_MAX_MAX', 'TEMPERATURA_MIN_MIN']
+
+    acumuladores = {}
+    for chaves, df in iterar_particoes(diretorio, colunas, estacoes, anos, grao='diario'):
+        ano = chaves[COLUNA_ANO]
+        if ano not in acumuladores:
+            acumuladores[ano] = {col: AcumuladorSerie() for col in colunas}
+        for col in colunas:
+            acumuladores[ano][col].adicionar(df[col].to_numpy())
+
+    linhas = [
+        [ano,
+         acc['MEDIA_DIARIA'].esboco.mediana(),
+         acc['TEMPERATURA_MAX_MAX'].maximo,
+         acc['TEMPERATURA_MIN_MIN'].minimo]
+        for ano, acc in sorted(acumuladores.items())
+    ]
+    return pd.DataFrame(linhas, columns=['Ano', 'Mediana Temperatura (°C)', 'Temperatura Máxima (°C)', 'Temperatura Mínima (°C)'])
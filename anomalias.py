@@ -0,0 +1,316 @@
+import os
+import glob
+import hashlib
+import argparse
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from armazenamento import (
+    DIRETORIO_DADOS, SUBDIRETORIO_PARTICOES, COLUNA_DATA_HORA, COLUNA_ESTACAO, COLUNA_ANO,
+    carregar_dados, carregar_manifesto, salvar_dados
+)
+from qualidade import aplicar_qc, medidas_com_limites, mascara_preenchidos
+import instrumentacao
+
+# Anomalias em relação a uma climatologia de referência (período base) e
+# episódios extremos em janelas móveis sobre a série horária.
+#
+# A base de cada estação é a média de cada medida por hora do ano (dia do
+# ano x hora do dia), suavizada ao longo do ano por uma média móvel circular,
+# calculada com as leituras aprovadas na validação do QC. Ela fica em cache
+# no armazenamento (climatologias/ESTACAO=<código>/) com o nome derivado do
+# hash dos arquivos de origem do período base, e é reaproveitada entre
+# execuções até que algum desses arquivos mude.
+
+PERIODO_BASE = (2010, 2020)
+# Meia-janela (dias) da média móvel circular que suaviza o ciclo anual
+DIAS_SUAVIZACAO = 15
+# Posições de hora do ano: 366 dias (29/02 sempre na mesma posição) x 24 horas
+DIAS_ANO = 366
+HORAS_ANO = DIAS_ANO * 24
+POSICAO_29_FEVEREIRO = 59
+SUBDIRETORIO_CLIMATOLOGIAS = 'climatologias'
+# Incrementar quando o cálculo da base mudar, invalidando o cache
+VERSAO_BASE = 1
+
+COLUNA_POSICAO = 'POSICAO'
+# Direção do vento é circular: média e diferença simples não fazem sentido
+MEDIDAS_SEM_BASE = ('VENTO_DIRECAO',)
+PREFIXO_ANOMALIA = 'ANOMALIA_'
+
+# Episódio: trecho em que a agregação móvel de `coluna` em `janela_horas`
+# horas fica acima (ou abaixo, com acima=False) de `limiar`
+Criterio = namedtuple('Criterio', ['coluna', 'janela_horas', 'agregacao', 'limiar', 'acima'])
+
+CRITERIOS_EPISODIOS = {
+    # Temperatura média de 3 dias pelo menos 3 °C acima/abaixo da base
+    'ONDA_DE_CALOR': Criterio('ANOMALIA_TEMPERATURA_AR', 72, 'mean', 3.0, True),
+    'ONDA_DE_FRIO': Criterio('ANOMALIA_TEMPERATURA_AR', 72, 'mean', -3.0, False),
+    # Chuva acumulada em 24 horas de pelo menos 50 mm
+    'CHUVA_FORTE': Criterio('PRECIPITACAO_TOTAL', 24, 'sum', 50.0, True),
+}
+COLUNAS_EPISODIOS = [COLUNA_ESTACAO, 'TIPO', 'INICIO', 'FIM', 'HORAS', 'PICO']
+# Fração mínima de horas com valor na janela para a agregação móvel valer
+FRACAO_MINIMA_JANELA = 0.8
+
+def posicao_no_ano(data_hora: pd.Series) -> np.ndarray:
+    """Posição (0 a 8783) de cada timestamp no ano.
+
+    Fora dos anos bissextos os dias a partir de 1º de março avançam uma
+    posição, de modo que a mesma data do calendário cai sempre na mesma
+    posição e 29/02 tem a sua.
+    """
+    dia = data_hora.dt.dayofyear.to_numpy() - 1
+    pula = ~data_hora.dt.is_leap_year.to_numpy() & (dia >= POSICAO_29_FEVEREIRO)
+    return (dia + pula) * 24 + data_hora.dt.hour.to_numpy()
+
+def media_movel_circular(valores: np.ndarray, meia_janela: int) -> np.ndarray:
+    """Soma móvel ao longo do primeiro eixo, dando a volta no fim do ano"""
+    if meia_janela <= 0:
+        return valores
+    estendido = np.concatenate([valores[-meia_janela:], valores, valores[:meia_janela]])
+    acumulado = np.concatenate([np.zeros((1, *valores.shape[1:])), np.cumsum(estendido, axis=0)])
+    return acumulado[2 * meia_janela + 1:] - acumulado[:-2 * meia_janela - 1]
+
+def calcular_base(df: pd.DataFrame, medidas=None, dias_suavizacao: int = DIAS_SUAVIZACAO) -> pd.DataFrame:
+    """Climatologia hora do ano de uma estação a partir de dados horários
+    validados (leituras reprovadas como NaN).
+
+    Somas e contagens por posição são obtidas com bincount e suavizadas
+    pela mesma janela de dias, hora a hora; a média é a razão entre elas.
+    Retorna um DataFrame com HORAS_ANO linhas (POSICAO) e uma coluna por
+    medida, NaN onde não houve nenhuma leitura na janela.
+    """
+    medidas = medidas or [col for col in medidas_com_limites(df) if col not in MEDIDAS_SEM_BASE]
+    posicao = posicao_no_ano(df[COLUNA_DATA_HORA])
+    valores = df[medidas].to_numpy(dtype=np.float64)
+    validos = ~np.isnan(valores)
+
+    somas = np.empty((HORAS_ANO, len(medidas)))
+    contagens = np.empty((HORAS_ANO, len(medidas)))
+    for i in range(len(medidas)):
+        somas[:, i] = np.bincount(posicao[validos[:, i]], weights=valores[validos[:, i], i], minlength=HORAS_ANO)
+        contagens[:, i] = np.bincount(posicao[validos[:, i]], minlength=HORAS_ANO)
+
+    # (dia, hora, medida): a suavização percorre os dias, separadamente para cada hora
+    formato = (DIAS_ANO, 24, len(medidas))
+    somas = media_movel_circular(somas.reshape(formato), dias_suavizacao).reshape(HORAS_ANO, -1)
+    contagens = media_movel_circular(contagens.reshape(formato), dias_suavizacao).reshape(HORAS_ANO, -1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        medias = np.where(contagens > 0, somas / contagens, np.nan)
+
+    base = pd.DataFrame(medias.astype(np.float32), columns=medidas)
+    base.insert(0, COLUNA_POSICAO, np.arange(HORAS_ANO, dtype=np.int16))
+    return base
+
+def carregar_horario(diretorio: str = DIRETORIO_DADOS, estacoes=None, anos=None, medidas=None) -> pd.DataFrame:
+    """Dados horários validados pelo QC, sem preenchimento de lacunas"""
+    colunas = None if medidas is None else [COLUNA_DATA_HORA, COLUNA_ESTACAO, *medidas]
+    df = carregar_dados(diretorio, colunas, estacoes, anos).drop(columns=[COLUNA_ANO], errors='ignore')
+    return aplicar_qc(df, preencher=False)
+
+def chave_base(diretorio: str, estacao: str, periodo: tuple) -> str:
+    """Hash dos arquivos de origem da estação no período base (pelo manifesto)"""
+    anos = range(periodo[0], periodo[1] + 1)
+    prefixos = tuple(f"{SUBDIRETORIO_PARTICOES}/{COLUNA_ESTACAO}={estacao}/{COLUNA_ANO}={ano}/" for ano in anos)
+    h = hashlib.sha256(f"{VERSAO_BASE}:{DIAS_SUAVIZACAO}:{periodo}".encode())
+    for chave, registro in sorted(carregar_manifesto(diretorio).items()):
+        if any(particao.startswith(prefixos) for particao in registro.get('particoes', [])):
+            h.update(f"{chave}:{registro['sha256']}".encode())
+    return h.hexdigest()
+
+def caminho_base(diretorio: str, estacao: str, periodo: tuple, chave: str) -> str:
+    return os.path.join(diretorio, SUBDIRETORIO_CLIMATOLOGIAS, f"{COLUNA_ESTACAO}={estacao}",
+                        f"base_{periodo[0]}-{periodo[1]}_{chave[:16]}.parquet")
+
+def carregar_base(diretorio: str = DIRETORIO_DADOS, estacao: str = None, periodo: tuple = PERIODO_BASE,
+                  usar_cache: bool = True) -> pd.DataFrame:
+    """Climatologia hora do ano de uma estação, do cache ou recalculada.
+
+    Uma base recalculada é gravada no cache e substitui as versões
+    anteriores da mesma estação e período.
+    """
+    chave = chave_base(diretorio, estacao, periodo)
+    caminho = caminho_base(diretorio, estacao, periodo, chave)
+    if usar_cache and os.path.exists(caminho):
+        instrumentacao.registrar('base_em_cache', estacao=estacao, periodo=list(periodo))
+        return pd.read_parquet(caminho)
+
+    with instrumentacao.medir('calcular_base', estacao=estacao, periodo=list(periodo)) as medida:
+        df = carregar_horario(diretorio, [estacao], range(periodo[0], periodo[1] + 1))
+        if df.empty:
+            raise ValueError(f"Erro: Estação {estacao} sem dados no período base {periodo[0]}-{periodo[1]}.")
+        base = calcular_base(df)
+        medida['registros'] = len(df)
+
+    for antigo in glob.glob(caminho_base(diretorio, estacao, periodo, '*')):
+        os.remove(antigo)
+    salvar_dados(base, caminho)
+    return base
+
+def carregar_bases(diretorio: str = DIRETORIO_DADOS, estacoes=None, periodo: tuple = PERIODO_BASE,
+                   usar_cache: bool = True) -> pd.DataFrame:
+    """Bases de várias estações, indexadas por (ESTACAO, POSICAO)"""
+    bases = {estacao: carregar_base(diretorio, estacao, periodo, usar_cache).set_index(COLUNA_POSICAO)
+             for estacao in estacoes}
+    return pd.concat(bases, names=[COLUNA_ESTACAO, COLUNA_POSICAO])
+
+def valores_base(df: pd.DataFrame, bases: pd.DataFrame, medidas) -> pd.DataFrame:
+    """Valor da base de cada linha de `df` (busca vetorizada por estação e posição)"""
+    indice = pd.MultiIndex.from_arrays([df[COLUNA_ESTACAO].astype(str), posicao_no_ano(df[COLUNA_DATA_HORA])],
+                                       names=[COLUNA_ESTACAO, COLUNA_POSICAO])
+    resultado = bases.reindex(columns=list(medidas)).reindex(indice)
+    resultado.index = df.index
+    return resultado
+
+def anomalias_horarias(df: pd.DataFrame, bases: pd.DataFrame, medidas=None) -> pd.DataFrame:
+    """Diferença de cada leitura horária para a base da sua estação e hora do ano.
+
+    `df` deve ter DATA_HORA, ESTACAO e as medidas; valores preenchidos pelo
+    QC (colunas QC_<medida>, se houver) não geram anomalia. Retorna
+    DATA_HORA, ESTACAO e ANOMALIA_<medida>, mais as colunas de `df` pedidas
+    em `medidas`.
+    """
+    medidas = medidas or [col for col in bases.columns if col in df.columns]
+    valores = df[medidas].astype(np.float32)
+    for medida in medidas:
+        if f"QC_{medida}" in df.columns:
+            valores[medida] = valores[medida].mask(mascara_preenchidos(df, medida))
+    anomalias = (valores - valores_base(df, bases, medidas)).add_prefix(PREFIXO_ANOMALIA)
+    return pd.concat([df[[COLUNA_DATA_HORA, COLUNA_ESTACAO]], valores, anomalias], axis=1)
+
+def anomalias_diarias(horarias: pd.DataFrame) -> pd.DataFrame:
+    """Anomalias diárias: média das anomalias horárias do dia (soma, para a chuva)"""
+    colunas = [col for col in horarias.columns if col.startswith(PREFIXO_ANOMALIA)]
+    chaves = [horarias[COLUNA_ESTACAO], horarias[COLUNA_DATA_HORA].dt.normalize().rename('DATA')]
+    agrupado = horarias[colunas].groupby(chaves, observed=True, sort=True)
+    diarias = agrupado.mean()
+    chuva = f"{PREFIXO_ANOMALIA}PRECIPITACAO_TOTAL"
+    if chuva in colunas:
+        diarias[chuva] = agrupado[chuva].sum(min_count=1)
+    return diarias.reset_index()
+
+def agregacao_movel(df: pd.DataFrame, criterio: Criterio) -> np.ndarray:
+    """Agregação em janela móvel de tempo (inclui horas ausentes no cálculo
+    da janela), por estação, alinhada às linhas de `df`"""
+    minimo = max(1, int(criterio.janela_horas * FRACAO_MINIMA_JANELA))
+    movel = (df.set_index(COLUNA_DATA_HORA)
+               .groupby(COLUNA_ESTACAO, observed=True, sort=True)[criterio.coluna]
+               .rolling(f"{criterio.janela_horas}h", min_periods=minimo)
+               .agg(criterio.agregacao))
+    return movel.to_numpy()
+
+def sem_episodios(tipo_data='datetime64[ns]') -> pd.DataFrame:
+    """Tabela de episódios vazia, com as colunas e tipos de detectar_episodios"""
+    return pd.DataFrame({
+        COLUNA_ESTACAO: pd.Series(dtype=object),
+        'TIPO': pd.Series(dtype=object),
+        'INICIO': pd.Series(dtype=tipo_data),
+        'FIM': pd.Series(dtype=tipo_data),
+        'HORAS': pd.Series(dtype=int),
+        'PICO': pd.Series(dtype=float),
+    })
+
+def detectar_episodios(df: pd.DataFrame, tipo: str, criterio: Criterio) -> pd.DataFrame:
+    """Episódios de um critério: trechos contínuos em que a agregação móvel
+    passa do limiar.
+
+    O início de cada episódio é o começo da primeira janela que passou do
+    limiar. Retorna ESTACAO, TIPO, INICIO, FIM, HORAS e PICO (valor mais
+    extremo da agregação móvel no episódio).
+    """
+    df = df.sort_values([COLUNA_ESTACAO, COLUNA_DATA_HORA], kind='stable').reset_index(drop=True)
+    movel = agregacao_movel(df, criterio)
+    with np.errstate(invalid='ignore'):
+        acima = movel >= criterio.limiar if criterio.acima else movel <= criterio.limiar
+    if not acima.any():
+        return sem_episodios(df[COLUNA_DATA_HORA].dtype)
+
+    # Um episódio começa quando a hora anterior não estava acima do limiar
+    # (ou era de outra estação)
+    estacao = df[COLUNA_ESTACAO].astype(str).to_numpy()
+    anterior = np.concatenate([[False], acima[:-1] & (estacao[1:] == estacao[:-1])])
+    inicio = acima & ~anterior
+    episodio = np.cumsum(inicio)[acima]
+
+    selecionados = pd.DataFrame({
+        COLUNA_ESTACAO: estacao[acima],
+        'INICIO': df[COLUNA_DATA_HORA].to_numpy()[acima] - np.timedelta64(criterio.janela_horas - 1, 'h'),
+        'FIM': df[COLUNA_DATA_HORA].to_numpy()[acima],
+        'PICO': movel[acima],
+    })
+    extremo = 'max' if criterio.acima else 'min'
+    agregacoes = {COLUNA_ESTACAO: 'first', 'INICIO': 'min', 'FIM': 'max', 'PICO': extremo}
+    episodios = selecionados.groupby(episodio, sort=True).agg(agregacoes).reset_index(drop=True)
+
+    # Trechos separados por uma queda breve cujas janelas se sobrepõem
+    # formam um único episódio
+    fim_anterior = episodios.groupby(COLUNA_ESTACAO, sort=False)['FIM'].transform(lambda fim: fim.cummax().shift())
+    novo = ~(episodios['INICIO'] <= fim_anterior)
+    episodios = episodios.groupby(novo.cumsum().to_numpy(), sort=True).agg(agregacoes).reset_index(drop=True)
+
+    episodios['HORAS'] = ((episodios['FIM'] - episodios['INICIO']) / pd.Timedelta(hours=1)).astype(int) + 1
+    episodios['PICO'] = episodios['PICO'].astype(float).round(2)
+    episodios.insert(1, 'TIPO', tipo)
+    return episodios[COLUNAS_EPISODIOS]
+
+def detectar_todos_episodios(horarias: pd.DataFrame, criterios: dict = None) -> pd.DataFrame:
+    """Episódios de todos os critérios cujas colunas existem em `horarias`"""
+    criterios = criterios or CRITERIOS_EPISODIOS
+    episodios = [detectar_episodios(horarias, tipo, criterio) for tipo, criterio in criterios.items()
+                 if criterio.coluna in horarias.columns]
+    if not episodios:
+        return sem_episodios()
+    return pd.concat(episodios, ignore_index=True).sort_values(['INICIO', COLUNA_ESTACAO], ignore_index=True)
+
+def calcular_anomalias(diretorio: str = DIRETORIO_DADOS, estacoes=None, anos=None, periodo: tuple = PERIODO_BASE,
+                       usar_cache: bool = True) -> dict:
+    """Anomalias horárias e diárias e episódios das estações e anos pedidos.
+
+    Retorna {'horarias', 'diarias', 'episodios'}.
+    """
+    horario = carregar_horario(diretorio, estacoes, anos)
+    codigos = sorted(horario[COLUNA_ESTACAO].astype(str).unique())
+    bases = carregar_bases(diretorio, codigos, periodo, usar_cache)
+    horarias = anomalias_horarias(horario, bases)
+    return {
+        'horarias': horarias,
+        'diarias': anomalias_diarias(horarias),
+        'episodios': detectar_todos_episodios(horarias),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcula anomalias em relação ao período base e episódios extremos")
+    parser.add_argument('--dados', default=DIRETORIO_DADOS, help="Diretório do armazenamento")
+    parser.add_argument('--estacao', nargs='+', help="Código(s) WMO das estações (padrão: todas)")
+    parser.add_argument('--anos', type=int, nargs='+', help="Anos analisados (padrão: todos)")
+    parser.add_argument('--base', default=f"{PERIODO_BASE[0]}-{PERIODO_BASE[1]}",
+                        help="Período base da climatologia, ex.: 2010-2020")
+    parser.add_argument('--sem-cache', action='store_true', help="Recalcula as bases, ignorando o cache")
+    parser.add_argument('--diarias', help="Grava as anomalias diárias neste arquivo CSV")
+    parser.add_argument('--episodios', help="Grava os episódios neste arquivo CSV")
+    instrumentacao.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    instrumentacao.configurar_argumentos(args)
+
+    inicio, _, fim = args.base.partition('-')
+    try:
+        with instrumentacao.medir('calcular_anomalias', estacoes=args.estacao, anos=args.anos) as medida:
+            resultado = calcular_anomalias(args.dados, args.estacao, args.anos, (int(inicio), int(fim or inicio)),
+                                           not args.sem_cache)
+            medida.update(registros=len(resultado['horarias']), episodios=len(resultado['episodios']))
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ Erro no cálculo das anomalias: {str(e)}")
+        raise SystemExit(1)
+
+    if args.diarias:
+        resultado['diarias'].to_csv(args.diarias, sep=';', index=False)
+        print(f"Anomalias diárias salvas em '{args.diarias}'")
+    if args.episodios:
+        resultado['episodios'].to_csv(args.episodios, sep=';', index=False)
+        print(f"Episódios salvos em '{args.episodios}'")
+
+    episodios = resultado['episodios']
+    print(f"\nEpisódios em relação à base {args.base}:")
+    print(episodios.groupby([COLUNA_ESTACAO, 'TIPO']).size().to_string() if not episodios.empty else "  nenhum")
+    print(f"\n{len(resultado['horarias'])} registros horários analisados em {medida['segundos']:.2f}s")
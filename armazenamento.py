@@ -0,0 +1,255 @@
+import os
+import json
+import hashlib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+# Armazenamento colunar entre a ingestão (index.py) e a geração de gráficos.
+# Os dados ficam particionados por estação e ano no estilo hive
+# (particoes/ESTACAO=A806/ANO=2010/<arquivo>.parquet), o manifesto registra
+# de qual arquivo de origem (tamanho, mtime e hash) cada partição veio e
+# estacoes.parquet guarda os metadados das estações. Cada partição horária
+# tem os agregados diário, mensal e anual, os histogramas e as somas
+# mês x hora correspondentes em agregados/<tipo>/, com o mesmo particionamento.
+DIRETORIO_DADOS = 'dados_meteorologicos'
+SUBDIRETORIO_PARTICOES = 'particoes'
+SUBDIRETORIO_AGREGADOS = 'agregados'
+GRAOS = ('diario', 'mensal', 'anual')
+# Agregados gravados para cada partição: os grãos temporais, os
+# histogramas (contagens por faixa de valor) das medidas e as somas por
+# mês x hora do dia que formam a climatologia usada no controle de qualidade
+AGREGADOS = GRAOS + ('histograma', 'hora_mes')
+ARQUIVO_MANIFESTO = 'manifesto.json'
+ARQUIVO_ESTACOES = 'estacoes.parquet'
+COLUNA_DATA_HORA = 'DATA_HORA'
+COLUNA_ESTACAO = 'ESTACAO'
+COLUNA_ANO = 'ANO'
+# 20ª coluna, sempre vazia, do CSV unificado das versões antigas do index.py
+COLUNA_EXTRA = 'COLUNA_EXTRA'
+# As partições horárias são gravadas ordenadas por DATA_HORA em grupos de
+# linhas de uma semana: as estatísticas min/max de cada grupo permitem que
+# consultas por intervalo de datas leiam só os grupos necessários
+LINHAS_POR_GRUPO = 24 * 7
+
+PARTICIONAMENTO = ds.partitioning(
+    pa.schema([(COLUNA_ESTACAO, pa.string()), (COLUNA_ANO, pa.int16())]),
+    flavor='hive'
+)
+
+def criar_data_hora(data: pd.Series, hora: pd.Series) -> pd.Series:
+    """Combina DATA e HORA em um único timestamp (UTC, sem fuso).
+
+    Aceita os dois formatos usados pelo INMET: '2010-01-01' / '00:00'
+    (até 2018) e '2019/01/01' / '0000 UTC' (a partir de 2019).
+    """
+    data = data.str.replace('/', '-', regex=False)
+    hora = hora.str.replace(':', '', regex=False).str[:4]
+    return pd.to_datetime(data + ' ' + hora, format='%Y-%m-%d %H%M', errors='coerce')
+
+def tipar_medidas(df: pd.DataFrame, colunas) -> pd.DataFrame:
+    """Converte as colunas de medidas para float32"""
+    return df.astype({col: 'float32' for col in colunas if col in df.columns})
+
+def assinatura_arquivo(caminho: str) -> dict:
+    """Tamanho e mtime de um arquivo, usados como verificação rápida"""
+    info = os.stat(caminho)
+    return {'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+def hash_arquivo(caminho: str, tamanho_bloco: int = 1 << 20) -> str:
+    """SHA-256 do conteúdo do arquivo, lido em blocos"""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def carregar_manifesto(diretorio: str = DIRETORIO_DADOS) -> dict:
+    """Lê o manifesto do armazenamento (vazio se ainda não existir)"""
+    caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+def salvar_manifesto(manifesto: dict, diretorio: str = DIRETORIO_DADOS) -> None:
+    """Grava o manifesto de forma atômica (arquivo temporário + rename)"""
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(temporario, caminho)
+
+def caminho_particao(estacao: str, ano: int, nome_arquivo: str) -> str:
+    """Caminho relativo (dentro do armazenamento) da partição estação/ano
+    gerada a partir de um arquivo de origem"""
+    nome = os.path.splitext(os.path.basename(nome_arquivo))[0]
+    return f"{SUBDIRETORIO_PARTICOES}/{COLUNA_ESTACAO}={estacao}/{COLUNA_ANO}={ano}/{nome}.parquet"
+
+def caminho_agregado(particao: str, grao: str) -> str:
+    """Caminho do agregado de um grão correspondente a uma partição horária"""
+    relativo = particao.split('/', 1)[1]
+    return f"{SUBDIRETORIO_AGREGADOS}/{grao}/{relativo}"
+
+def arquivos_da_particao(particao: str) -> list:
+    """Partição horária e todos os seus agregados"""
+    return [particao] + [caminho_agregado(particao, grao) for grao in AGREGADOS]
+
+def salvar_dados(df: pd.DataFrame, caminho: str, linhas_por_grupo: int = None) -> None:
+    """Grava o DataFrame tipado em Parquet (substituindo o arquivo se existir)"""
+    diretorio, nome = os.path.split(caminho)
+    os.makedirs(diretorio or '.', exist_ok=True)
+    # O prefixo '.' faz o pyarrow ignorar um temporário que tenha sobrado
+    temporario = os.path.join(diretorio, f".{nome}.tmp")
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(tabela, temporario, row_group_size=linhas_por_grupo)
+    os.replace(temporario, caminho)
+
+def remover_particao(particao: str, diretorio: str = DIRETORIO_DADOS) -> None:
+    """Remove a partição, seus agregados e os diretórios que ficarem vazios"""
+    raiz = os.path.abspath(diretorio)
+    for relativo in arquivos_da_particao(particao):
+        caminho = os.path.join(diretorio, relativo)
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        while pasta.startswith(raiz + os.sep) and os.path.isdir(pasta) and not os.listdir(pasta):
+            os.rmdir(pasta)
+            pasta = os.path.dirname(pasta)
+
+def salvar_estacoes(estacoes: pd.DataFrame, diretorio: str = DIRETORIO_DADOS) -> None:
+    """Grava a tabela de estações extraída dos cabeçalhos"""
+    salvar_dados(estacoes, os.path.join(diretorio, ARQUIVO_ESTACOES))
+
+def carregar_estacoes(diretorio: str = DIRETORIO_DADOS) -> pd.DataFrame:
+    """Lê a tabela de estações (código WMO, nome, UF, coordenadas...)"""
+    caminho = os.path.join(diretorio, ARQUIVO_ESTACOES)
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"Erro: Tabela de estações '{caminho}' não encontrada.")
+    return pq.read_table(caminho).to_pandas()
+
+def abrir_dataset(diretorio: str = DIRETORIO_DADOS, subdiretorio: str = SUBDIRETORIO_PARTICOES) -> ds.Dataset:
+    """Abre as partições (horárias, por padrão) como um dataset, sem ler os dados"""
+    caminho = os.path.join(diretorio, subdiretorio)
+    if not os.path.isdir(caminho) or not os.listdir(caminho):
+        raise FileNotFoundError(f"Erro: Armazenamento '{diretorio}' não encontrado ou vazio.")
+    return ds.dataset(caminho, format='parquet', partitioning=PARTICIONAMENTO,
+                      filesystem=fs.LocalFileSystem(use_mmap=True))
+
+def filtro_particoes(estacoes=None, anos=None):
+    """Expressão de filtro sobre as chaves de partição (ESTACAO, ANO)"""
+    filtro = None
+    if estacoes is not None:
+        filtro = ds.field(COLUNA_ESTACAO).isin([str(e) for e in estacoes])
+    if anos is not None:
+        condicao = ds.field(COLUNA_ANO).isin([int(a) for a in anos])
+        filtro = condicao if filtro is None else filtro & condicao
+    return filtro
+
+def ler_dataset(dataset: ds.Dataset, colunas=None, estacoes=None, anos=None) -> pd.DataFrame:
+    """Materializa um dataset filtrado por partição, com ESTACAO categórica"""
+    df = dataset.to_table(columns=colunas, filter=filtro_particoes(estacoes, anos)).to_pandas()
+    if COLUNA_ESTACAO in df.columns:
+        df[COLUNA_ESTACAO] = df[COLUNA_ESTACAO].astype('category')
+    return df
+
+def carregar_dados(diretorio: str = DIRETORIO_DADOS, colunas=None, estacoes=None, anos=None) -> pd.DataFrame:
+    """Lê as partições via memory-map, só com as colunas pedidas.
+
+    Os filtros `estacoes` e `anos` são aplicados às chaves de partição, de
+    modo que só os arquivos das estações/anos pedidos chegam a ser abertos.
+    """
+    return ler_dataset(abrir_dataset(diretorio), colunas, estacoes, anos)
+
+def uso_memoria(df: pd.DataFrame) -> int:
+    """Memória ocupada pelo DataFrame, incluindo strings e índice (bytes)"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+# Linhas convertidas para o formato legado ao estimar a memória dele
+LINHAS_AMOSTRA_LEGADO = 1000
+
+def memoria_legado(df: pd.DataFrame) -> int:
+    """Estimativa da memória dos mesmos dados no formato do CSV unificado
+    legado (DATA e HORA como texto, medidas float64 e COLUNA_EXTRA vazia),
+    em bytes: uma amostra é convertida e medida e o resultado, escalado.
+    Os textos têm tamanho fixo, então o custo por linha é o mesmo."""
+    if df.empty:
+        return 0
+    amostra = df.head(LINHAS_AMOSTRA_LEGADO)
+    data_hora = amostra[COLUNA_DATA_HORA]
+    medidas = [col for col in amostra.select_dtypes('number').columns if col != COLUNA_ANO]
+    legado = pd.concat([
+        pd.DataFrame({'DATA': data_hora.dt.strftime('%Y-%m-%d'), 'HORA': data_hora.dt.strftime('%H:%M')}),
+        amostra[medidas].astype('float64'),
+    ], axis=1).assign(**{COLUNA_EXTRA: float('nan')}).reset_index(drop=True)
+    return int(uso_memoria(legado) / len(legado) * len(df))
+
+def descrever_memoria(df: pd.DataFrame) -> str:
+    """Resumo 'antes -> depois' da compactação registrada em df.attrs
+    (antes = formato legado, ver compactar_dados)"""
+    memoria = df.attrs.get('memoria', {'antes': uso_memoria(df), 'depois': uso_memoria(df)})
+    antes, depois = memoria['antes'] / 2**20, memoria['depois'] / 2**20
+    reducao = 100 * (1 - depois / antes) if antes else 0.0
+    return f"{antes:.1f} MB -> {depois:.1f} MB ({reducao:.0f}% menor)"
+
+def eh_coluna_sobra(coluna: str) -> bool:
+    """Coluna vazia gerada pelo ';' final das linhas do INMET (COLUNA_EXTRA
+    no CSV unificado legado, 'Unnamed: N' quando lida sem nomes)"""
+    return coluna == COLUNA_EXTRA or str(coluna).startswith('Unnamed:')
+
+def compactar_dados(df: pd.DataFrame, estacao: str = None) -> pd.DataFrame:
+    """Converte dados horários para a representação compacta canônica.
+
+    O resultado tem um único DatetimeIndex DATA_HORA em UTC (ordenado),
+    medidas em float32 e ESTACAO categórica. As medidas são mantidas mesmo
+    sem nenhum valor (estação ou período sem o sensor); só colunas fora do
+    esquema (COLUNA_EXTRA, sobras do ';' final) são descartadas. Aceita
+    tanto os dados do armazenamento quanto o formato legado do CSV
+    unificado (DATA e HORA como texto, medidas float64 e a COLUNA_EXTRA
+    vazia). A memória antes e depois fica em df.attrs['memoria'] (ver
+    descrever_memoria); "antes" é sempre a do formato legado, medida
+    quando é ele que chega e estimada por memoria_legado quando os dados
+    vêm do armazenamento (já compactos).
+    """
+    antes = uso_memoria(df) if COLUNA_DATA_HORA not in df.columns else memoria_legado(df)
+    if COLUNA_DATA_HORA not in df.columns:
+        df = df.assign(**{COLUNA_DATA_HORA: criar_data_hora(df['DATA'].astype(str), df['HORA'].astype(str))})
+        df = df.drop(columns=['DATA', 'HORA'])
+    df = df.dropna(subset=[COLUNA_DATA_HORA])
+
+    # ANO é redundante com o índice
+    descartadas = [col for col in df.columns if col == COLUNA_ANO or eh_coluna_sobra(col)]
+    df = df.drop(columns=descartadas)
+    medidas = [col for col in df.select_dtypes('number').columns]
+    df = tipar_medidas(df, medidas)
+
+    if COLUNA_ESTACAO in df.columns:
+        df[COLUNA_ESTACAO] = df[COLUNA_ESTACAO].astype(str).astype('category')
+    elif estacao is not None:
+        df.insert(0, COLUNA_ESTACAO, pd.Categorical([str(estacao)] * len(df)))
+
+    indice = pd.DatetimeIndex(df.pop(COLUNA_DATA_HORA), name=COLUNA_DATA_HORA).tz_localize('UTC')
+    df = df.set_axis(indice).sort_index(kind='stable')
+    df.attrs['memoria'] = {'antes': antes, 'depois': uso_memoria(df)}
+    return df
+
+def ler_csv_legado(caminho: str, estacao: str = None) -> pd.DataFrame:
+    """Lê o CSV unificado das versões antigas do index.py
+    (dados_meteorologicos_completos.csv) já na representação compacta"""
+    return compactar_dados(pd.read_csv(caminho, sep=';', dtype={'DATA': str, 'HORA': str}), estacao)
+
+def carregar_dados_compactos(diretorio: str = DIRETORIO_DADOS, colunas=None, estacoes=None, anos=None) -> pd.DataFrame:
+    """Como carregar_dados, mas na representação compacta de compactar_dados"""
+    if colunas is not None and COLUNA_DATA_HORA not in colunas:
+        colunas = [COLUNA_DATA_HORA] + list(colunas)
+    return compactar_dados(carregar_dados(diretorio, colunas, estacoes, anos))
+
+def carregar_agregado(grao: str, diretorio: str = DIRETORIO_DADOS, colunas=None, estacoes=None, anos=None) -> pd.DataFrame:
+    """Lê um agregado pré-calculado ('diario', 'mensal', 'anual', 'histograma' ou 'hora_mes')"""
+    if grao not in AGREGADOS:
+        raise ValueError(f"Erro: Agregado desconhecido '{grao}'. Use um de {AGREGADOS}.")
+    return ler_dataset(abrir_dataset(diretorio, f"{SUBDIRETORIO_AGREGADOS}/{grao}"), colunas, estacoes, anos)
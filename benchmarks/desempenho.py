@@ -0,0 +1,243 @@
+"""Mede tempo de parede e pico de memória (RSS) das etapas do projeto:
+unificar_todos_dados, ingestão, load_and_process_data, calculate_annual_stats,
+cada função plot_* (e a tabela) e generate_report.
+
+Roda sobre os CSVs do INMET que acompanham o projeto e sobre cópias
+sintéticas deles, como se fossem outras estações (escala 10 = 10x as
+estações-ano). Cada etapa executa em um processo novo, para que o pico de
+RSS seja só dela. O resultado é salvo em JSON para comparar commits.
+
+Uso: python benchmarks/desempenho.py [--escalas 1 10 100] [--repeticoes N]
+                                     [--saida arquivo.json] [--comparar anterior.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+try:
+    import resource  # só POSIX
+except ImportError:
+    resource = None
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import index  # noqa: E402
+from instrumentacao import memoria_pico_mb  # noqa: E402
+
+DIRETORIO_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+# Linha do cabeçalho do INMET com o código WMO da estação (0-based)
+LINHA_CODIGO_WMO = index.campos_estacao.index('CODIGO_WMO')
+
+def gerar_sinteticos(escala: int, destino: str) -> list:
+    """Cria `escala` cópias dos CSVs do projeto, cada uma como uma estação.
+
+    A cópia 0 mantém o código original; as demais recebem S001, S002...
+    no cabeçalho. Os valores são os mesmos, o que basta para medir tempo e
+    memória das etapas.
+    """
+    originais = index.descobrir_arquivos(RAIZ)
+    arquivos = []
+    for copia in range(escala):
+        pasta = os.path.join(destino, f"estacao_{copia:03d}")
+        os.makedirs(pasta, exist_ok=True)
+        for original in originais:
+            caminho = os.path.join(pasta, os.path.basename(original))
+            if copia == 0:
+                shutil.copyfile(original, caminho)
+            else:
+                with open(original, 'rb') as f:
+                    linhas = f.readlines()
+                rotulo, codigo = linhas[LINHA_CODIGO_WMO].split(b';', 1)
+                linhas[LINHA_CODIGO_WMO] = rotulo + b';' + codigo.replace(codigo.strip().rstrip(b';'), f"S{copia:03d}".encode())
+                with open(caminho, 'wb') as f:
+                    f.writelines(linhas)
+            arquivos.append(caminho)
+    return arquivos
+
+def rss_pico_mb() -> dict:
+    """Pico de RSS do processo e dos filhos já encerrados (MB); None onde a
+    plataforma não informa (filhos só com resource, isto é, fora do Windows)"""
+    filhos = None
+    if resource is not None:
+        divisor = 2**20 if sys.platform == 'darwin' else 2**10  # bytes no macOS, KB no Linux
+        filhos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor
+    return {'rss_pico_mb': memoria_pico_mb(), 'rss_pico_filhos_mb': filhos}
+
+def maximo(valores):
+    """Maior valor ignorando None (None se nenhum foi medido)"""
+    valores = [valor for valor in valores if valor is not None]
+    return max(valores) if valores else None
+
+def formatar_mb(valor) -> str:
+    return f"{valor:8.1f} MB" if valor is not None else "       - MB"
+
+# Etapas: cada função roda em um processo novo, prepara o que precisa e
+# devolve o tempo só da chamada medida
+
+def etapa_unificar(arquivos, dados, imagens, workers):
+    inicio = time.perf_counter()
+    index.unificar_todos_dados(arquivos, workers)
+    return time.perf_counter() - inicio
+
+def etapa_ingestao(arquivos, dados, imagens, workers):
+    # reprocessar=True para que as repetições não encontrem o manifesto em dia
+    inicio = time.perf_counter()
+    index.atualizar_armazenamento(arquivos, dados, workers, reprocessar=True)
+    return time.perf_counter() - inicio
+
+def etapa_carregar(arquivos, dados, imagens, workers):
+    from gerar_imagens import load_and_process_data
+    inicio = time.perf_counter()
+    load_and_process_data(dados)
+    return time.perf_counter() - inicio
+
+def etapa_estatisticas(arquivos, dados, imagens, workers):
+    from gerar_imagens import load_daily_data, calculate_annual_stats
+    diario = load_daily_data(dados)
+    inicio = time.perf_counter()
+    calculate_annual_stats(diario)
+    return time.perf_counter() - inicio
+
+def etapa_grafico(nome, arquivos, dados, imagens, workers):
+    import gerar_imagens
+    gerar_imagens.init_render_worker()
+    job = next(job for job in gerar_imagens.CHART_JOBS if job.chart.__name__ == nome)
+    frames = gerar_imagens.prepare_frames(dados)
+    gerar_imagens.create_output_dir(imagens)
+    inicio = time.perf_counter()
+    job.chart(frames[job.data_key], imagens, **job.params)
+    return time.perf_counter() - inicio
+
+def etapa_relatorio(arquivos, dados, imagens, workers):
+    from gerar_relatorio import generate_report
+    from modelo_relatorio import montar_modelo
+    from armazenamento import carregar_estacoes
+    modelo = montar_modelo(dados, carregar_estacoes(dados)['CODIGO_WMO'].iloc[0])
+    inicio = time.perf_counter()
+    if generate_report(imagens, os.path.join(imagens, 'relatorio.pdf'), model=modelo) is None:
+        raise RuntimeError("generate_report falhou")
+    return time.perf_counter() - inicio
+
+def executar_etapa(funcao, argumentos) -> dict:
+    """Roda a etapa no processo atual (filho) e devolve tempo e memória"""
+    with open(os.devnull, 'w') as nulo:
+        saida, sys.stdout = sys.stdout, nulo
+        try:
+            segundos = funcao(*argumentos)
+        finally:
+            sys.stdout = saida
+    return {'segundos': segundos, **rss_pico_mb()}
+
+def medir(funcao, argumentos, repeticoes: int) -> dict:
+    """Melhor tempo e maior pico de RSS entre as repetições, cada uma em um processo novo"""
+    resultados = []
+    contexto = multiprocessing.get_context('spawn')
+    for _ in range(repeticoes):
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+            resultados.append(executor.submit(executar_etapa, funcao, argumentos).result())
+    return {
+        'segundos': min(r['segundos'] for r in resultados),
+        'rss_pico_mb': maximo(r['rss_pico_mb'] for r in resultados),
+        'rss_pico_filhos_mb': maximo(r['rss_pico_filhos_mb'] for r in resultados),
+    }
+
+def etapas():
+    """(nome, função, argumentos extras) na ordem em que devem rodar"""
+    import gerar_imagens
+    lista = [
+        ('unificar_todos_dados', etapa_unificar, ()),
+        ('atualizar_armazenamento', etapa_ingestao, ()),
+        ('load_and_process_data', etapa_carregar, ()),
+        ('calculate_annual_stats', etapa_estatisticas, ()),
+    ]
+    lista += [(job.chart.__name__, etapa_grafico, (job.chart.__name__,)) for job in gerar_imagens.CHART_JOBS]
+    lista.append(('generate_report', etapa_relatorio, ()))
+    return lista
+
+def medir_escala(escala: int, repeticoes: int, workers) -> dict:
+    with tempfile.TemporaryDirectory(prefix=f'benchmark_{escala}x_') as temporario:
+        arquivos = gerar_sinteticos(escala, os.path.join(temporario, 'csv'))
+        dados = os.path.join(temporario, 'dados')
+        imagens = os.path.join(temporario, 'imagens')
+        resultado = {'arquivos': len(arquivos), 'etapas': {}}
+        for nome, funcao, extras in etapas():
+            resultado['etapas'][nome] = medir(funcao, (*extras, arquivos, dados, imagens, workers), repeticoes)
+            medida = resultado['etapas'][nome]
+            print(f"  {nome:32s} {medida['segundos']:8.3f}s  RSS {formatar_mb(medida['rss_pico_mb'])}")
+        resultado['registros'] = sum(r['registros'] for r in index.carregar_manifesto(dados).values())
+    return resultado
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparar(anterior: dict, atual: dict) -> None:
+    """Imprime a razão atual/anterior de tempo e memória de cada etapa"""
+    print(f"\nComparação com {anterior.get('commit')} ({anterior.get('data')}):")
+    comuns = [escala for escala in atual['escalas'] if escala in anterior.get('escalas', {})]
+    if not comuns:
+        print("  Nenhuma escala em comum com a execução anterior.")
+    for escala in comuns:
+        medidas, antes = atual['escalas'][escala], anterior['escalas'][escala]
+        print(f"Escala {escala}x:")
+        for nome, medida in medidas['etapas'].items():
+            referencia = antes['etapas'].get(nome)
+            if not referencia:
+                continue
+            tempo = medida['segundos'] / referencia['segundos'] if referencia['segundos'] else float('nan')
+            memoria = (medida['rss_pico_mb'] / referencia['rss_pico_mb']
+                       if medida['rss_pico_mb'] and referencia['rss_pico_mb'] else float('nan'))
+            print(f"  {nome:32s} tempo {tempo:5.2f}x  RSS {memoria:5.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10],
+                        help="Fatores de escala em estações-ano (100 precisa de alguns GB de RAM)")
+    parser.add_argument('--repeticoes', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None, help="Processos de leitura na ingestão")
+    parser.add_argument('--saida', help="Arquivo JSON de resultado (padrão: benchmarks/resultados/<data>_<commit>.json)")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    if not index.descobrir_arquivos(RAIZ):
+        print("❌ Nenhum arquivo INMET encontrado.")
+        return
+
+    resultado = {
+        'commit': commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeticoes': args.repeticoes,
+        'escalas': {},
+    }
+    for escala in args.escalas:
+        print(f"Escala {escala}x:")
+        resultado['escalas'][str(escala)] = medir_escala(escala, args.repeticoes, args.workers)
+
+    saida = args.saida or os.path.join(
+        DIRETORIO_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}_{resultado['commit'] or 'sem-commit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2)
+    print(f"\nResultados salvos em '{saida}'")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            comparar(json.load(f), resultado)
+
+if __name__ == "__main__":
+    main()
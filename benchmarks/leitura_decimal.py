@@ -0,0 +1,82 @@
+"""Compara a leitura antiga (astype(str) + str.replace + to_numeric) com a
+leitura nativa com decimal=',' nos arquivos do INMET que acompanham o projeto.
+
+Uso: python benchmarks/leitura_decimal.py [--repeticoes N]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import index  # noqa: E402
+
+def ler_csv(caminho_completo, **opcoes):
+    """read_csv com as opções comuns aos dois caminhos (as de index.ler_arquivo)"""
+    return pd.read_csv(caminho_completo,
+                       delimiter=';',
+                       encoding='ISO-8859-1',
+                       skiprows=index.LINHAS_METADADOS + 1,
+                       header=None,
+                       names=index.nomes_colunas,
+                       usecols=range(len(index.nomes_colunas)),
+                       **opcoes)
+
+# Os dois caminhos cobrem só a leitura e a conversão dos números. O restante
+# de index.ler_arquivo (DATA_HORA, float32, cabeçalho da estação) é igual
+# para ambos e fica fora da medição.
+
+def ler_arquivo_antigo(caminho_completo):
+    """Caminho antigo: lê as medidas como texto e converte coluna a coluna"""
+    df = ler_csv(caminho_completo)
+    for col in index.colunas_numericas:
+        df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '.'), errors='coerce')
+    return df
+
+def ler_arquivo_nativo(caminho_completo):
+    """Caminho novo: o parser converte a vírgula decimal durante a leitura"""
+    return ler_csv(caminho_completo, decimal=',', dtype=index.tipos_colunas)
+
+def cronometrar(funcao, caminhos, repeticoes):
+    """Retorna o melhor tempo (s) de leitura de todos os arquivos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for caminho in caminhos:
+            funcao(caminho)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    caminhos = sorted(glob.glob(os.path.join(RAIZ, 'INMET_*.CSV')))
+    if not caminhos:
+        print("❌ Nenhum arquivo INMET encontrado.")
+        return
+
+    # Os dois caminhos precisam produzir os mesmos valores (no antigo, colunas
+    # sem vírgula, como a umidade, saem como inteiros)
+    medidas = index.colunas_numericas
+    for caminho in caminhos:
+        pd.testing.assert_frame_equal(ler_arquivo_antigo(caminho)[medidas],
+                                      ler_arquivo_nativo(caminho)[medidas],
+                                      check_dtype=False)
+
+    antigo = cronometrar(ler_arquivo_antigo, caminhos, args.repeticoes)
+    nativo = cronometrar(ler_arquivo_nativo, caminhos, args.repeticoes)
+
+    print(f"Arquivos: {len(caminhos)} (melhor de {args.repeticoes} repetições)")
+    print(f"- astype(str) + str.replace: {antigo:.3f}s")
+    print(f"- decimal=',' nativo:        {nativo:.3f}s")
+    print(f"- Ganho: {antigo / nativo:.1f}x")
+
+if __name__ == "__main__":
+    main()
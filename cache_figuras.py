@@ -0,0 +1,105 @@
+import os
+import json
+import hashlib
+import struct
+import inspect
+import pandas as pd
+
+# Cache de figuras endereçado por conteúdo: cada imagem é registrada com a
+# chave (hash) dos dados que a geraram, dos parâmetros e do código da função
+# de plotagem. Se a chave não mudou e o arquivo existe, a renderização é pulada.
+ARQUIVO_INDICE = '.cache_figuras.json'
+
+# Incrementar quando algo que afeta todas as figuras mudar fora das funções
+# de plotagem (estilo do seaborn, rcParams, dpi...)
+VERSAO_CACHE = 1
+
+def versao_codigo(*funcoes) -> str:
+    """Hash do código-fonte das funções envolvidas na renderização"""
+    h = hashlib.sha256(str(VERSAO_CACHE).encode())
+    for funcao in funcoes:
+        h.update(inspect.getsource(funcao).encode())
+    return h.hexdigest()
+
+def hash_dados(dados: pd.DataFrame, colunas=None) -> str:
+    """Hash do conteúdo do recorte de dados usado por uma figura"""
+    if colunas is not None:
+        dados = dados[list(colunas)]
+    h = hashlib.sha256(','.join(map(str, dados.columns)).encode())
+    h.update(pd.util.hash_pandas_object(dados, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def chave_figura(hash_entrada: str, parametros: dict, codigo: str) -> str:
+    """Chave final da figura: dados + parâmetros + versão do código"""
+    h = hashlib.sha256()
+    h.update(hash_entrada.encode())
+    h.update(json.dumps(parametros, sort_keys=True, default=str).encode())
+    h.update(codigo.encode())
+    return h.hexdigest()
+
+def carregar_indice(diretorio: str) -> dict:
+    """Lê o índice {arquivo: chave} do diretório de imagens"""
+    caminho = os.path.join(diretorio, ARQUIVO_INDICE)
+    if not os.path.exists(caminho):
+        return {}
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Índice corrompido: trata como cache vazio
+        return {}
+
+def salvar_indice(indice: dict, diretorio: str) -> None:
+    """Grava o índice de forma atômica"""
+    caminho = os.path.join(diretorio, ARQUIVO_INDICE)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(indice, f, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
+
+def figura_valida(indice: dict, diretorio: str, arquivo: str, chave: str) -> bool:
+    """True se a figura já existe e foi gerada com a mesma chave"""
+    return indice.get(arquivo) == chave and os.path.exists(os.path.join(diretorio, arquivo))
+
+def caminho_metadados(caminho_imagem: str) -> str:
+    """Arquivo oculto ao lado da imagem com o tamanho registrado na renderização"""
+    diretorio, nome = os.path.split(caminho_imagem)
+    return os.path.join(diretorio, f".{nome}.json")
+
+def tamanho_png(caminho_imagem: str) -> tuple:
+    """Largura e altura (px) lidas do cabeçalho IHDR, sem decodificar a imagem"""
+    with open(caminho_imagem, 'rb') as f:
+        cabecalho = f.read(24)
+    if cabecalho[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ValueError(f"Erro: '{caminho_imagem}' não é um PNG.")
+    return struct.unpack('>II', cabecalho[16:24])
+
+def salvar_metadados(caminho_imagem: str, dpi: int) -> dict:
+    """Registra largura, altura e dpi de uma figura recém-salva"""
+    largura, altura = tamanho_png(caminho_imagem)
+    metadados = {'largura_px': largura, 'altura_px': altura, 'dpi': dpi}
+    with open(caminho_metadados(caminho_imagem), 'w', encoding='utf-8') as f:
+        json.dump(metadados, f)
+    return metadados
+
+def carregar_metadados(caminho_imagem: str) -> dict:
+    """Metadados gravados por salvar_metadados (None se ausentes ou desatualizados)"""
+    caminho = caminho_metadados(caminho_imagem)
+    if not os.path.exists(caminho) or os.path.getmtime(caminho) < os.path.getmtime(caminho_imagem):
+        return None
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def remover_obsoletas(indice: dict, diretorio: str, arquivos_atuais) -> list:
+    """Remove do índice e do disco figuras cujas entradas deixaram de existir"""
+    removidas = sorted(set(indice) - set(arquivos_atuais))
+    for arquivo in removidas:
+        del indice[arquivo]
+        caminho = os.path.join(diretorio, arquivo)
+        for caminho_removido in (caminho, caminho_metadados(caminho)):
+            if os.path.exists(caminho_removido):
+                os.remove(caminho_removido)
+    return removidas
@@ -0,0 +1,127 @@
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from armazenamento import (
+    DIRETORIO_DADOS, COLUNA_DATA_HORA, COLUNA_ESTACAO, COLUNA_ANO, abrir_dataset, filtro_particoes
+)
+from qualidade import VALOR_AUSENTE
+import instrumentacao
+
+# Consultas pontuais sobre o armazenamento particionado, sem reprocessar os
+# CSVs nem carregar tudo: o filtro de estação e de anos elimina partições
+# inteiras (pelos diretórios ESTACAO=/ANO=) e, dentro de cada arquivo, as
+# estatísticas min/max de DATA_HORA de cada grupo de linhas (uma semana,
+# gravado em ordem cronológica) descartam os grupos fora do intervalo.
+
+AGREGACOES = ('min', 'max', 'mean', 'median', 'sum', 'count')
+
+def limite_inicial(inicio) -> pd.Timestamp:
+    return None if inicio is None else pd.Timestamp(inicio)
+
+def limite_final(fim) -> pd.Timestamp:
+    """Fim exclusivo do intervalo: uma data sem hora inclui o dia inteiro"""
+    if fim is None:
+        return None
+    limite = pd.Timestamp(fim)
+    if isinstance(fim, str) and len(fim) <= 10:
+        limite += pd.Timedelta(days=1)
+    return limite
+
+def filtro_intervalo(inicio=None, fim=None):
+    """Filtro sobre DATA_HORA: `inicio` inclusivo e `fim` exclusivo
+    (já convertidos por limite_inicial/limite_final)"""
+    filtro = None
+    if inicio is not None:
+        filtro = ds.field(COLUNA_DATA_HORA) >= inicio.to_datetime64()
+    if fim is not None:
+        condicao = ds.field(COLUNA_DATA_HORA) < fim.to_datetime64()
+        filtro = condicao if filtro is None else filtro & condicao
+    return filtro
+
+def filtro_anos(inicio=None, fim=None):
+    """Anos (chave de partição) que o intervalo pode alcançar"""
+    if inicio is None or fim is None:
+        return None
+    return range(inicio.year, (fim - pd.Timedelta(microseconds=1)).year + 1)
+
+def grupos_de_linhas(dataset: ds.Dataset, filtro_particao, filtro_linhas) -> list:
+    """Grupos de linhas que podem conter linhas do intervalo.
+
+    get_fragments poda as partições pelas chaves ESTACAO/ANO e
+    split_by_row_group usa as estatísticas min/max de DATA_HORA de cada
+    grupo para descartar os que ficam fora do intervalo.
+    """
+    grupos = []
+    for fragmento in dataset.get_fragments(filter=filtro_particao):
+        if filtro_linhas is None:
+            grupos.append(fragmento)
+        else:
+            grupos.extend(fragmento.split_by_row_group(filter=filtro_linhas))
+    return grupos
+
+def consultar(diretorio: str = DIRETORIO_DADOS, colunas=None, estacoes=None, inicio=None, fim=None) -> pd.DataFrame:
+    """Lê só as linhas das estações, do intervalo e das colunas pedidos.
+
+    `inicio` e `fim` aceitam datas ('2024-01-01') ou timestamps; uma data
+    final sem hora inclui o dia todo. O resultado vem indexado por
+    DATA_HORA (ordenado) com a coluna ESTACAO, e df.attrs['grupos_lidos']
+    registra quantos grupos de linhas foram de fato lidos. O sentinela
+    -9999 do INMET vira NaN.
+    """
+    dataset = abrir_dataset(diretorio)
+    inicio, fim = limite_inicial(inicio), limite_final(fim)
+    filtro_linhas = filtro_intervalo(inicio, fim)
+    grupos = grupos_de_linhas(dataset, filtro_particoes(estacoes, filtro_anos(inicio, fim)), filtro_linhas)
+
+    lidas = None if colunas is None else list(dict.fromkeys([COLUNA_DATA_HORA, COLUNA_ESTACAO, *colunas]))
+    selecao = ds.FileSystemDataset(grupos, dataset.schema, dataset.format, dataset.filesystem)
+    df = selecao.to_table(columns=lidas, filter=filtro_linhas).to_pandas()
+    df[COLUNA_ESTACAO] = df[COLUNA_ESTACAO].astype('category')
+    medidas = df.select_dtypes('number').columns.drop(COLUNA_ANO, errors='ignore')
+    df[medidas] = df[medidas].replace(VALOR_AUSENTE, np.nan)
+    df = df.set_index(COLUNA_DATA_HORA).sort_index(kind='stable')
+    df.attrs['grupos_lidos'] = len(grupos)
+    return df
+
+def resumir(df: pd.DataFrame, agregacao: str) -> pd.DataFrame:
+    """Aplica uma agregação às colunas numéricas, por estação"""
+    if agregacao not in AGREGACOES:
+        raise ValueError(f"Erro: Agregação desconhecida '{agregacao}'. Use uma de {AGREGACOES}.")
+    return df.groupby(COLUNA_ESTACAO, observed=True).agg(agregacao, numeric_only=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Consulta o armazenamento Parquet por estação, período e colunas",
+        epilog="Ex.: python consulta.py --estacao A806 --inicio 2024-01-01 --fim 2024-01-31 "
+               "--colunas TEMPERATURA_MAX --agregacao max")
+    parser.add_argument('--dados', default=DIRETORIO_DADOS, help="Diretório do armazenamento")
+    parser.add_argument('--estacao', nargs='+', help="Código(s) WMO das estações (padrão: todas)")
+    parser.add_argument('--inicio', help="Data/hora inicial (inclusiva), ex.: 2024-01-01")
+    parser.add_argument('--fim', help="Data/hora final (uma data sem hora inclui o dia todo)")
+    parser.add_argument('--colunas', nargs='+', help="Medidas a ler (padrão: todas)")
+    parser.add_argument('--agregacao', choices=AGREGACOES, help="Resume o resultado por estação")
+    parser.add_argument('--csv', help="Grava o resultado neste arquivo CSV em vez de imprimir")
+    instrumentacao.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    instrumentacao.configurar_argumentos(args)
+
+    try:
+        with instrumentacao.medir('consultar', estacoes=args.estacao, inicio=args.inicio, fim=args.fim) as medida:
+            df = consultar(args.dados, args.colunas, args.estacao, args.inicio, args.fim)
+            medida.update(registros=len(df), grupos_lidos=df.attrs['grupos_lidos'])
+        segundos = medida['segundos']
+        resultado = resumir(df, args.agregacao) if args.agregacao else df
+
+        if args.csv:
+            resultado.to_csv(args.csv, sep=';')
+            print(f"Resultado salvo em '{args.csv}'")
+        else:
+            print(resultado.to_string(max_rows=40))
+        print(f"\n{len(df)} registros de {df.attrs['grupos_lidos']} grupo(s) de linhas em {segundos:.3f}s")
+    # Armazenamento ausente, data inválida ou coluna inexistente (erros do
+    # Arrow de esquema/valor são subclasses de ValueError)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ Erro na consulta: {str(e)}")
+        sys.exit(1)
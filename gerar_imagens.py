@@ -1,63 +1,108 @@
 import os
+import sys
+import inspect
+import argparse
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
 import seaborn as sns
 from datetime import datetime
+from armazenamento import (
+    DIRETORIO_DADOS, COLUNA_DATA_HORA, COLUNA_ESTACAO, carregar_dados_compactos, carregar_agregado, carregar_estacoes,
+    descrever_memoria, uso_memoria
+)
+from agregacao import Histograma, calcular_estatisticas_anuais_streaming
+from qualidade import aplicar_qc, carregar_climatologia
+import cache_figuras
+import instrumentacao
 
 # Configurações iniciais
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 8)
 plt.rcParams['font.size'] = 14
+FIGURE_DPI = 300
 
 def create_output_dir(directory: str) -> None:
     """Cria o diretório de saída se não existir"""
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-def load_and_process_data(file_path: str) -> pd.DataFrame:
-    """Carrega e processa os dados do arquivo Excel"""
-    try:
-        df = pd.read_excel(file_path, engine='openpyxl')
-    except FileNotFoundError as e:
-        raise FileNotFoundError(f"Erro: Arquivo '{file_path}' não encontrado.") from e
-    
+# Colunas horárias usadas pelos gráficos (as demais nem são lidas)
+HOURLY_CHART_COLUMNS = ['TEMPERATURA_AR', 'UMIDADE_RELATIVA']
+
+def load_and_process_data(data_dir: str = DIRETORIO_DADOS, stations=None, years=None) -> pd.DataFrame:
+    """Carrega e processa os dados do armazenamento Parquet gerado pelo index.py
+    (opcionalmente só das estações e anos pedidos)"""
     # Verificar colunas necessárias
     required_columns = [
-        'TEMPERATURA_MAX', 'TEMPERATURA_MIN', 'DATA',
+        'TEMPERATURA_MAX', 'TEMPERATURA_MIN', COLUNA_DATA_HORA,
         'PRECIPITACAO_TOTAL', 'PRESSAO_ESTACAO', 'RADIACAO_GLOBAL',
         'TEMPERATURA_AR', 'UMIDADE_RELATIVA', 'VENTO_VELOCIDADE'
     ]
+    # Representação compacta (float32, ESTACAO categórica)
+    df = carregar_dados_compactos(data_dir, estacoes=stations, anos=years)
+
+    # O QC e os agregados trabalham com DATA_HORA como coluna, sem fuso
+    df = df.reset_index()
+    df[COLUNA_DATA_HORA] = df[COLUNA_DATA_HORA].dt.tz_localize(None)
     missing_cols = [col for col in required_columns if col not in df.columns]
     if missing_cols:
         raise ValueError(f"Erro: Colunas necessárias não encontradas: {missing_cols}")
 
     # Processamento de dados
-    df['DATA'] = pd.to_datetime(df['DATA'], errors='coerce')
-    df = df.dropna(subset=['DATA'])
-    df['ANO'] = df['DATA'].dt.year
-
-    # Converter e tratar colunas numéricas
-    numeric_cols = [
-        'TEMPERATURA_MAX', 'TEMPERATURA_MIN', 'PRECIPITACAO_TOTAL',
-        'PRESSAO_ESTACAO', 'RADIACAO_GLOBAL', 'TEMPERATURA_AR',
-        'UMIDADE_RELATIVA', 'VENTO_VELOCIDADE'
-    ]
-    
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            df[col] = df[col].replace(-9999.0, np.nan).fillna(df[col].median())
+    # Controle de qualidade: leituras fora da faixa ou com saltos são
+    # descartadas, lacunas curtas interpoladas e as longas preenchidas pela
+    # climatologia mês x hora da estação; as colunas QC_<medida> marcam o
+    # que foi preenchido
+    df = aplicar_qc(df, carregar_climatologia(data_dir, estacoes=stations))
+    df['DATA'] = df[COLUNA_DATA_HORA].dt.normalize()
+    df['ANO'] = df[COLUNA_DATA_HORA].dt.year
 
     return df
 
-def calculate_daily_average(df: pd.DataFrame) -> pd.DataFrame:
-    """Calcula a média diária entre TEMPERATURA_MAX e TEMPERATURA_MIN"""
-    df['MEDIA_DIARIA'] = df[['TEMPERATURA_MAX', 'TEMPERATURA_MIN']].mean(axis=1)
+def load_hourly_chart_data(data_dir: str = DIRETORIO_DADOS, stations=None, years=None) -> pd.DataFrame:
+    """Colunas horárias dos gráficos (HOURLY_CHART_COLUMNS) validadas pelo QC.
+
+    Os gráficos mostram só horas medidas, então as leituras reprovadas
+    ficam NaN e nenhuma lacuna é preenchida (sem a interpolação e a
+    climatologia de load_and_process_data).
+    """
+    df = carregar_dados_compactos(data_dir, [COLUNA_ESTACAO, *HOURLY_CHART_COLUMNS], stations, years)
+    attrs = df.attrs
+    df = df.reset_index()
+    df[COLUNA_DATA_HORA] = df[COLUNA_DATA_HORA].dt.tz_localize(None)
+    df = aplicar_qc(df, preencher=False)
+    df.attrs = attrs
     return df
 
+# Colunas do agregado diário usadas nos gráficos de temperatura
+DAILY_COLUMNS = {
+    'DATA': 'DATA',
+    'ANO': 'ANO',
+    'MEDIA_DIARIA': 'MEDIA_DIARIA',
+    'TEMPERATURA_MAX_MAX': 'TEMPERATURA_MAX',
+    'TEMPERATURA_MIN_MIN': 'TEMPERATURA_MIN'
+}
+
+def daily_temperatures(daily: pd.DataFrame) -> pd.DataFrame:
+    """Seleciona as temperaturas de um agregado diário (máxima, mínima e média do dia)"""
+    daily = daily[[col for col in DAILY_COLUMNS if col in daily.columns]].rename(columns=DAILY_COLUMNS)
+    if 'ANO' not in daily.columns:
+        daily['ANO'] = daily['DATA'].dt.year
+    return daily.dropna(subset=['MEDIA_DIARIA']).reset_index(drop=True)
+
+def load_daily_data(data_dir: str = DIRETORIO_DADOS, stations=None, years=None) -> pd.DataFrame:
+    """Carrega as temperaturas diárias do agregado pré-calculado na ingestão"""
+    return daily_temperatures(carregar_agregado('diario', data_dir, colunas=list(DAILY_COLUMNS),
+                                                estacoes=stations, anos=years))
+
 def calculate_annual_stats(df: pd.DataFrame) -> pd.DataFrame:
-    """Calcula estatísticas anuais"""
+    """Calcula estatísticas anuais a partir das temperaturas diárias"""
     stats = df.groupby('ANO').agg({
         'MEDIA_DIARIA': 'median',
         'TEMPERATURA_MAX': 'max',
@@ -68,24 +113,23 @@ def calculate_annual_stats(df: pd.DataFrame) -> pd.DataFrame:
     return stats
 
 def save_plot(fig, output_dir: str, filename: str) -> None:
-    """Salva uma figura no diretório de saída"""
+    """Salva uma figura no diretório de saída, registrando seu tamanho para o relatório"""
     filepath = os.path.join(output_dir, filename)
-    fig.savefig(filepath, bbox_inches='tight', dpi=300)
+    fig.savefig(filepath, bbox_inches='tight', dpi=FIGURE_DPI)
     plt.close(fig)
+    cache_figuras.salvar_metadados(filepath, FIGURE_DPI)
 
 def create_temperature_table(stats: pd.DataFrame, output_dir: str) -> None:
     """Cria e salva uma tabela com as estatísticas de temperatura"""
     fig, ax = plt.subplots(figsize=(12, 8))
     ax.axis('off')
     
-    cell_text = []
-    for _, row in stats.iterrows():
-        cell_text.append([
-            row['Ano'],
-            f"{row['Mediana Temperatura (°C)']:.1f}",
-            f"{row['Temperatura Máxima (°C)']:.1f}",
-            f"{row['Temperatura Mínima (°C)']:.1f}"
-        ])
+    # Formatação por coluna, sem percorrer as linhas
+    cell_text = np.column_stack([
+        stats['Ano'].astype(int).astype(str),
+        *(stats[col].map('{:.1f}'.format)
+          for col in ['Mediana Temperatura (°C)', 'Temperatura Máxima (°C)', 'Temperatura Mínima (°C)'])
+    ]).tolist()
     
     table = ax.table(
         cellText=cell_text,
@@ -119,18 +163,17 @@ def plot_temperature_trend(stats: pd.DataFrame, output_dir: str) -> None:
     
     # Adicionar valores aos pontos
     for col in ['Mediana Temperatura (°C)', 'Temperatura Máxima (°C)', 'Temperatura Mínima (°C)']:
-        for _, row in stats.iterrows():
-            ax.text(row['Ano'], row[col], f"{row[col]:.1f}",
-                   ha='center', va='bottom', fontsize=10)
+        for year, value in zip(stats['Ano'].to_numpy(), stats[col].to_numpy()):
+            ax.text(year, value, f"{value:.1f}", ha='center', va='bottom', fontsize=10)
     
     save_plot(fig, output_dir, 'tendencia_temperatura.png')
 
-def plot_temperature_distribution(df: pd.DataFrame, output_dir: str) -> None:
-    """Cria e salva um boxplot da distribuição de temperatura"""
+def plot_temperature_distribution(daily: pd.DataFrame, output_dir: str) -> None:
+    """Cria e salva um boxplot da distribuição da temperatura média diária"""
     fig, ax = plt.subplots(figsize=(14, 8))
     
     sns.boxplot(
-        data=df,
+        data=daily,
         x='ANO',
         y='MEDIA_DIARIA',
         hue='ANO',
@@ -146,73 +189,311 @@ def plot_temperature_distribution(df: pd.DataFrame, output_dir: str) -> None:
     
     save_plot(fig, output_dir, 'distribuicao_temperatura.png')
 
-def plot_precipitation_distribution(df: pd.DataFrame, output_dir: str) -> None:
-    """Gráfico de distribuição de precipitação total"""
+def load_histograms(data_dir: str = DIRETORIO_DADOS, stations=None, years=None) -> pd.DataFrame:
+    """Carrega os histogramas pré-calculados na ingestão, somados entre as partições"""
+    histograms = carregar_agregado('histograma', data_dir, colunas=['MEDIDA', 'FAIXA', 'CONTAGEM'],
+                                   estacoes=stations, anos=years)
+    return histograms.groupby(['MEDIDA', 'FAIXA'], as_index=False, observed=True)['CONTAGEM'].sum()
+
+def plot_histogram(histograms: pd.DataFrame, column: str, color: str, title: str, xlabel: str,
+                   output_dir: str, filename: str, bins: int = 30) -> None:
+    """Desenha o histograma (com KDE) de uma medida a partir das contagens pré-agregadas.
+
+    As 30 faixas e a KDE saem da grade fina do histograma, então o custo do
+    gráfico não depende de quantos anos ou estações foram carregados.
+    """
+    histogram = Histograma.de_agregado(histograms, column)
+    counts, edges = histogram.reagrupar(bins)
+    centers, density = histogram.densidade_kde()
+    # A densidade vira contagem esperada por faixa larga, como no histplot
+    kde = density * histogram.total * (edges[1] - edges[0]) if len(counts) else density
+    visible = (centers >= edges[0]) & (centers <= edges[-1])
+
     fig, ax = plt.subplots(figsize=(14, 8))
-    sns.histplot(df['PRECIPITACAO_TOTAL'], kde=True, color='blue', bins=30, ax=ax)
-    ax.set_title('Distribuição da Precipitação Total', fontsize=16)
-    ax.set_xlabel('Precipitação Total (mm)', fontsize=14)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+           color=color, alpha=0.5, edgecolor='white')
+    ax.plot(centers[visible], kde[visible], color=color, linewidth=2)
+    ax.set_title(title, fontsize=16)
+    ax.set_xlabel(xlabel, fontsize=14)
     ax.set_ylabel('Frequência', fontsize=14)
-    save_plot(fig, output_dir, 'distribuicao_precipitacao.png')
+    save_plot(fig, output_dir, filename)
 
-def plot_temp_vs_humidity(df: pd.DataFrame, output_dir: str) -> None:
-    """Gráfico de temperatura vs umidade relativa"""
+def plot_precipitation_distribution(histograms: pd.DataFrame, output_dir: str) -> None:
+    """Gráfico de distribuição de precipitação total"""
+    plot_histogram(histograms, 'PRECIPITACAO_TOTAL', 'blue', 'Distribuição da Precipitação Total',
+                   'Precipitação Total (mm)', output_dir, 'distribuicao_precipitacao.png')
+
+def bin_temp_vs_humidity(df: pd.DataFrame, temp_step: float = 0.5, humidity_step: float = 1.0):
+    """Histograma 2D (vetorizado) de temperatura do ar x umidade relativa.
+
+    Retorna (contagens, bordas de temperatura, bordas de umidade). As bordas
+    de umidade ficam entre valores inteiros, já que o INMET registra a
+    umidade em % inteiro. Sem nenhum par válido (estação sem um dos
+    sensores), contagens e bordas vêm vazias.
+    """
+    temp = df['TEMPERATURA_AR'].to_numpy(dtype=np.float64)
+    humidity = df['UMIDADE_RELATIVA'].to_numpy(dtype=np.float64)
+    valid = ~(np.isnan(temp) | np.isnan(humidity))
+    temp, humidity = temp[valid], humidity[valid]
+    if not len(temp):
+        return np.zeros((0, 0)), np.array([]), np.array([])
+
+    temp_edges = np.arange(np.floor(temp.min()), np.ceil(temp.max()) + temp_step, temp_step)
+    humidity_edges = np.arange(np.floor(humidity.min()) - humidity_step / 2,
+                               np.ceil(humidity.max()) + humidity_step, humidity_step)
+    counts, temp_edges, humidity_edges = np.histogram2d(temp, humidity, bins=[temp_edges, humidity_edges])
+    return counts, temp_edges, humidity_edges
+
+def plot_temp_vs_humidity(df: pd.DataFrame, output_dir: str, mode: str = 'density', sample_points: int = 0) -> None:
+    """Gráfico de temperatura vs umidade relativa.
+
+    No modo 'density' os pontos horários são agregados em um histograma 2D
+    e o custo de renderização não depende do número de horas; com
+    `sample_points` > 0, uma amostra fixa de até esse número de pontos é
+    sobreposta. O modo 'points' desenha todos os pontos (dispersão simples).
+    """
     fig, ax = plt.subplots(figsize=(14, 8))
-    sns.scatterplot(x=df['TEMPERATURA_AR'], y=df['UMIDADE_RELATIVA'], 
-                   color='green', alpha=0.6, ax=ax)
+    if mode == 'points':
+        sns.scatterplot(x=df['TEMPERATURA_AR'], y=df['UMIDADE_RELATIVA'], 
+                       color='green', alpha=0.6, ax=ax)
+    elif mode == 'density':
+        counts, temp_edges, humidity_edges = bin_temp_vs_humidity(df)
+        if counts.any():
+            mesh = ax.pcolormesh(temp_edges, humidity_edges, np.ma.masked_equal(counts, 0).T,
+                                 cmap='Greens', norm=LogNorm(), shading='flat')
+            fig.colorbar(mesh, ax=ax, label='Horas')
+        else:
+            # Nenhum par válido: eixos vazios com um aviso, sem o mapa de cores
+            ax.text(0.5, 0.5, 'Sem pares válidos de temperatura e umidade no período',
+                    ha='center', va='center', transform=ax.transAxes, fontsize=14, color='gray')
+        if sample_points > 0:
+            points = df[['TEMPERATURA_AR', 'UMIDADE_RELATIVA']].dropna()
+            if len(points) > sample_points:
+                points = points.sample(n=sample_points, random_state=0)
+            ax.scatter(points['TEMPERATURA_AR'], points['UMIDADE_RELATIVA'],
+                       s=4, color='darkgreen', alpha=0.3, linewidths=0)
+    else:
+        raise ValueError(f"Erro: Modo de dispersão desconhecido '{mode}'. Use 'density' ou 'points'.")
     ax.set_title('Temperatura vs Umidade Relativa', fontsize=16)
     ax.set_xlabel('Temperatura (°C)', fontsize=14)
     ax.set_ylabel('Umidade Relativa (%)', fontsize=14)
     save_plot(fig, output_dir, 'temp_vs_umidade.png')
 
-def plot_pressure_distribution(df: pd.DataFrame, output_dir: str) -> None:
+def plot_pressure_distribution(histograms: pd.DataFrame, output_dir: str) -> None:
     """Gráfico de distribuição de pressão atmosférica"""
-    fig, ax = plt.subplots(figsize=(14, 8))
-    sns.histplot(df['PRESSAO_ESTACAO'], kde=True, color='orange', bins=30, ax=ax)
-    ax.set_title('Distribuição da Pressão Atmosférica', fontsize=16)
-    ax.set_xlabel('Pressão Atmosférica (hPa)', fontsize=14)
-    ax.set_ylabel('Frequência', fontsize=14)
-    save_plot(fig, output_dir, 'distribuicao_pressao.png')
+    plot_histogram(histograms, 'PRESSAO_ESTACAO', 'orange', 'Distribuição da Pressão Atmosférica',
+                   'Pressão Atmosférica (hPa)', output_dir, 'distribuicao_pressao.png')
 
-def plot_wind_speed_distribution(df: pd.DataFrame, output_dir: str) -> None:
+def plot_wind_speed_distribution(histograms: pd.DataFrame, output_dir: str) -> None:
     """Gráfico de distribuição da velocidade do vento"""
-    fig, ax = plt.subplots(figsize=(14, 8))
-    sns.histplot(df['VENTO_VELOCIDADE'], kde=True, color='purple', bins=30, ax=ax)
-    ax.set_title('Distribuição da Velocidade do Vento', fontsize=16)
-    ax.set_xlabel('Velocidade do Vento (m/s)', fontsize=14)
-    ax.set_ylabel('Frequência', fontsize=14)
-    save_plot(fig, output_dir, 'distribuicao_vento.png')
+    plot_histogram(histograms, 'VENTO_VELOCIDADE', 'purple', 'Distribuição da Velocidade do Vento',
+                   'Velocidade do Vento (m/s)', output_dir, 'distribuicao_vento.png')
 
-def plot_radiation_distribution(df: pd.DataFrame, output_dir: str) -> None:
+def plot_radiation_distribution(histograms: pd.DataFrame, output_dir: str) -> None:
     """Gráfico de distribuição de radiação global"""
-    fig, ax = plt.subplots(figsize=(14, 8))
-    sns.histplot(df['RADIACAO_GLOBAL'], kde=True, color='red', bins=30, ax=ax)
-    ax.set_title('Distribuição da Radiação Global', fontsize=16)
-    ax.set_xlabel('Radiação Global (W/m²)', fontsize=14)
-    ax.set_ylabel('Frequência', fontsize=14)
-    save_plot(fig, output_dir, 'distribuicao_radiacao.png')
+    plot_histogram(histograms, 'RADIACAO_GLOBAL', 'red', 'Distribuição da Radiação Global',
+                   'Radiação Global (W/m²)', output_dir, 'distribuicao_radiacao.png')
 
-def main():
-    output_dir = "imagens_resultados"
+# Gráficos gerados pelo main(): função, conjunto de dados usado, colunas
+# desse conjunto que entram no gráfico (None = todas), arquivo gerado e
+# parâmetros extras da função
+ChartJob = namedtuple('ChartJob', ['chart', 'data_key', 'columns', 'filename', 'params'], defaults=[{}])
+
+CHART_JOBS = [
+    ChartJob(create_temperature_table, 'stats', None, 'tabela_temperaturas.png'),
+    ChartJob(plot_temperature_trend, 'stats', None, 'tendencia_temperatura.png'),
+    ChartJob(plot_temperature_distribution, 'daily', ['ANO', 'MEDIA_DIARIA'], 'distribuicao_temperatura.png'),
+    ChartJob(plot_precipitation_distribution, 'histograms', None, 'distribuicao_precipitacao.png'),
+    ChartJob(plot_temp_vs_humidity, 'hourly', ['TEMPERATURA_AR', 'UMIDADE_RELATIVA'], 'temp_vs_umidade.png'),
+    ChartJob(plot_pressure_distribution, 'histograms', None, 'distribuicao_pressao.png'),
+    ChartJob(plot_wind_speed_distribution, 'histograms', None, 'distribuicao_vento.png'),
+    ChartJob(plot_radiation_distribution, 'histograms', None, 'distribuicao_radiacao.png'),
+]
+
+# Código compartilhado pelos gráficos, incluído na chave de cache
+CHART_HELPERS = (save_plot, plot_histogram, Histograma, bin_temp_vs_humidity)
+
+
+# DataFrames já abertos em cada processo do pool (por caminho)
+shared_frame_cache = {}
+
+def share_frames(frames: dict, directory: str) -> dict:
+    """Grava os DataFrames em arquivos Arrow IPC sem compressão.
+
+    Os workers abrem esses arquivos via memory-map, sem cópia, em vez de
+    receber o DataFrame serializado pelo pickle.
+    """
+    paths = {}
+    for name, frame in frames.items():
+        path = os.path.join(directory, f"{name}.arrow")
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        paths[name] = path
+    return paths
+
+def open_shared_frame(path: str) -> pd.DataFrame:
+    """Abre (uma vez por processo) um DataFrame compartilhado via memory-map"""
+    if path not in shared_frame_cache:
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        shared_frame_cache[path] = table.to_pandas(split_blocks=True)
+    return shared_frame_cache[path]
+
+def init_render_worker() -> None:
+    """Inicializa um processo de renderização com o backend Agg"""
+    plt.switch_backend('Agg')
+
+def render_chart(chart, data_key: str, shared_paths: dict, output_dir: str, params: dict) -> float:
+    """Renderiza um gráfico em um worker e retorna o tempo gasto (s)"""
+    data = open_shared_frame(shared_paths[data_key])
+    with instrumentacao.medir('grafico', grafico=chart.__name__, registros=len(data)) as medida:
+        chart(data, output_dir, **params)
+    return medida['segundos']
+
+def default_params(chart) -> dict:
+    """Parâmetros opcionais de uma função de gráfico com seus valores padrão"""
+    return {name: parameter.default for name, parameter in inspect.signature(chart).parameters.items()
+            if parameter.default is not inspect.Parameter.empty}
+
+def chart_cache_key(job: ChartJob, frames: dict) -> str:
+    """Chave de cache de um gráfico: recorte dos dados, parâmetros e código.
+
+    Os parâmetros são completados com os padrões da função, de modo que
+    omitir um parâmetro ou passá-lo com o valor padrão dá a mesma chave.
+    """
+    params = {**default_params(job.chart), **job.params}
+    return cache_figuras.chave_figura(
+        cache_figuras.hash_dados(frames[job.data_key], job.columns),
+        {'data_key': job.data_key, 'filename': job.filename, 'params': params},
+        cache_figuras.versao_codigo(job.chart, *CHART_HELPERS)
+    )
+
+def prepare_frames(data_dir: str = DIRETORIO_DADOS, stations=None, years=None, streaming: bool = False) -> dict:
+    """Carrega os recortes de dados usados pelos gráficos, por data_key de ChartJob.
+
+    Com `streaming`, a tabela anual sai de calcular_estatisticas_anuais_streaming,
+    que lê uma partição do agregado diário por vez.
+    """
+    with instrumentacao.medir('load_hourly_chart_data', estacoes=stations, anos=years) as medida:
+        df = load_hourly_chart_data(data_dir, stations, years)
+        medida.update(registros=len(df), memoria_dados_mb=round(uso_memoria(df) / 2**20, 1))
+    print(f"  Dados horários: {len(df)} registros, memória (formato legado -> compacto) {descrever_memoria(df)}")
+    with instrumentacao.medir('dados_diarios', estacoes=stations, anos=years) as medida:
+        daily = load_daily_data(data_dir, stations, years)
+        if streaming:
+            stats = calcular_estatisticas_anuais_streaming(data_dir, stations, years)
+        else:
+            stats = calculate_annual_stats(daily)
+        histograms = load_histograms(data_dir, stations, years)
+        medida.update(registros=len(daily), anos_estatisticas=len(stats), streaming=streaming)
+    return {'hourly': df[HOURLY_CHART_COLUMNS], 'daily': daily, 'stats': stats, 'histograms': histograms}
+
+def select_station(data_dir: str = DIRETORIO_DADOS, station: str = None) -> str:
+    """Código da estação pedida, validado, ou da única estação do armazenamento.
+
+    Os gráficos e as estatísticas anuais não separam estações, por isso
+    um armazenamento com várias exige que uma seja escolhida.
+    """
+    codes = list(carregar_estacoes(data_dir)['CODIGO_WMO'].astype(str))
+    if station is None:
+        if len(codes) != 1:
+            raise ValueError(f"Erro: O armazenamento tem {len(codes)} estações; informe qual usar com --estacao.")
+        return codes[0]
+    if str(station) not in codes:
+        raise ValueError(f"Erro: Estação '{station}' não encontrada no armazenamento.")
+    return str(station)
+
+def generate_charts(output_dir: str, data_dir: str = DIRETORIO_DADOS, workers: int = 1, use_cache: bool = True,
+                    chart_options: dict = None, stations=None, years=None, streaming: bool = False) -> dict:
+    """Prepara os dados e gera os gráficos de CHART_JOBS.
+
+    `stations` e `years` restringem os dados às estações/anos pedidos
+    (por padrão, todo o armazenamento). `streaming` calcula a tabela anual
+    partição a partição (ver prepare_frames).
+
+    `chart_options` sobrepõe parâmetros por função, por exemplo
+    {'plot_temp_vs_humidity': {'mode': 'points'}}.
+
+    Gráficos cuja chave de cache (dados + parâmetros + código) não mudou
+    são reaproveitados do diretório de saída. Com `workers` > 1 cada
+    gráfico restante é renderizado em um processo separado; os dados
+    preparados são compartilhados por arquivos memory-mapped.
+    Retorna o tempo de parede de cada gráfico renderizado.
+    """
     create_output_dir(output_dir)
 
+    print("Processando dados...")
+    frames = prepare_frames(data_dir, stations, years, streaming)
+
+    chart_options = chart_options or {}
+    jobs = [job._replace(params={**job.params, **chart_options.get(job.chart.__name__, {})})
+            for job in CHART_JOBS]
+
+    index = cache_figuras.carregar_indice(output_dir) if use_cache else {}
+    keys = {job.filename: chart_cache_key(job, frames) for job in jobs}
+    pending = [job for job in jobs
+               if not cache_figuras.figura_valida(index, output_dir, job.filename, keys[job.filename])]
+    for job in jobs:
+        if job not in pending:
+            print(f"  {job.chart.__name__}: em cache")
+
+    print(f"Gerando {len(pending)} de {len(jobs)} visualizações ({workers} processo(s))...")
+    timings = {}
+    if workers <= 1 or len(pending) <= 1:
+        for job in pending:
+            data = frames[job.data_key]
+            with instrumentacao.medir('grafico', grafico=job.chart.__name__, registros=len(data)) as medida:
+                job.chart(data, output_dir, **job.params)
+            timings[job.chart.__name__] = medida['segundos']
+            index[job.filename] = keys[job.filename]
+            print(f"  {job.chart.__name__}: {timings[job.chart.__name__]:.2f}s")
+    else:
+        with tempfile.TemporaryDirectory(prefix='graficos_') as shared_dir:
+            shared_paths = share_frames({key: frames[key] for key in {job.data_key for job in pending}}, shared_dir)
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker) as executor:
+                futures = [
+                    (job, executor.submit(render_chart, job.chart, job.data_key, shared_paths, output_dir, job.params))
+                    for job in pending
+                ]
+                for job, future in futures:
+                    timings[job.chart.__name__] = future.result()
+                    index[job.filename] = keys[job.filename]
+                    print(f"  {job.chart.__name__}: {timings[job.chart.__name__]:.2f}s")
+
+    for filename in cache_figuras.remover_obsoletas(index, output_dir, keys):
+        print(f"  Removida figura obsoleta: {filename}")
+    cache_figuras.salvar_indice(index, output_dir)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os gráficos a partir do armazenamento Parquet")
+    parser.add_argument('--dados', default=DIRETORIO_DADOS, help="Diretório do armazenamento")
+    parser.add_argument('--saida', default="imagens_resultados", help="Diretório das imagens")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processos de renderização (1 = sequencial, no próprio processo)")
+    parser.add_argument('--sem-cache', action='store_true', help="Renderiza todos os gráficos, ignorando o cache")
+    parser.add_argument('--dispersao', choices=['density', 'points'], default='density',
+                        help="Temperatura x umidade como histograma 2D (density) ou todos os pontos (points)")
+    parser.add_argument('--amostra', type=int, default=0,
+                        help="No modo density, sobrepõe uma amostra de até N pontos horários")
+    parser.add_argument('--estacao', help="Código WMO da estação (obrigatório se houver mais de uma)")
+    parser.add_argument('--anos', type=int, nargs='+', help="Anos incluídos nos gráficos (padrão: todos)")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Calcula a tabela anual lendo uma partição do agregado diário por vez")
+    instrumentacao.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    instrumentacao.configurar_argumentos(args)
+    output_dir = args.saida
+
     try:
-        print("Processando dados...")
-        df = load_and_process_data('dados_meteorologicos_completos.xlsx')
-        df = calculate_daily_average(df)
-        stats = calculate_annual_stats(df)
-        
-        print("Gerando visualizações de temperatura...")
-        create_temperature_table(stats, output_dir)
-        plot_temperature_trend(stats, output_dir)
-        plot_temperature_distribution(df, output_dir)
-        
-        print("Gerando visualizações meteorológicas adicionais...")
-        plot_precipitation_distribution(df, output_dir)
-        plot_temp_vs_humidity(df, output_dir)
-        plot_pressure_distribution(df, output_dir)
-        plot_wind_speed_distribution(df, output_dir)
-        plot_radiation_distribution(df, output_dir)
+        chart_options = {'plot_temp_vs_humidity': {'mode': args.dispersao, 'sample_points': args.amostra}}
+        station = select_station(args.dados, args.estacao)
+        with instrumentacao.medir('gerar_imagens', workers=args.workers, estacao=station, anos=args.anos) as medida:
+            timings = generate_charts(output_dir, args.dados, args.workers, use_cache=not args.sem_cache,
+                                      chart_options=chart_options, stations=[station], years=args.anos,
+                                      streaming=args.streaming)
+            medida['graficos_renderizados'] = len(timings)
+        print(f"Tempo total: {medida['segundos']:.2f}s")
         
         print("\n✅ Análise concluída com sucesso!")
         print(f"📁 Resultados salvos em: {os.path.abspath(output_dir)}")
@@ -226,8 +507,11 @@ def main():
         print(f"- 💨 distribuicao_vento.png (Distribuição de vento)")
         print(f"- ☀️ distribuicao_radiacao.png (Distribuição de radiação)")
         
-    except Exception as e:
+    # Armazenamento ausente ou sem as colunas esperadas: mensagem e código 1.
+    # Outros erros são falhas do código e mostram o traceback completo
+    except (FileNotFoundError, ValueError) as e:
         print(f"\n❌ Erro durante a execução: {str(e)}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,14 +1,131 @@
 import os
+import sys
+import json
+import time
+import argparse
+import hashlib
+import itertools
+import contextlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from fpdf import FPDF, XPos, YPos
 from PIL import Image
+import cache_figuras
+import instrumentacao
+from armazenamento import DIRETORIO_DADOS, carregar_estacoes
+from gerar_imagens import generate_charts, init_render_worker, select_station
+from modelo_relatorio import (
+    DIAS_ANO_COMPLETO, MEDIDAS_DESCRITAS, montar_modelo, descrever_local, descrever_periodo, formatar_numero
+)
+
+# Área útil para as figuras na página A4 (mm) e resolução de impressão. As
+# imagens de 300 dpi do gerar_imagens.py são reamostradas uma única vez para
+# o tamanho exato em que aparecem no PDF e guardadas em CACHE_DIR (dentro do
+# diretório das imagens), de modo que o fpdf só decodifica imagens pequenas.
+PAGE_WIDTH_MM = 210
+MAX_IMAGE_WIDTH_MM = 180
+MAX_IMAGE_HEIGHT_MM = 250
+REPORT_DPI = 150
+CACHE_DIR = '.cache_relatorio'
+MM_PER_INCH = 25.4
+
+# Conteúdo estático, comum a todos os relatórios (montado uma vez por processo)
+IMAGE_DESCRIPTIONS = {
+    'tabela_temperaturas.png': ('Tabela de Temperaturas por Ano', 
+                               'Estatísticas anuais de temperaturas (média, máxima e mínima) no período analisado.'),
+    'tendencia_temperatura.png': ('Tendência de Temperatura Anual', 
+                                 'Evolução das temperaturas medianas, máximas e mínimas ao longo dos anos.'),
+    'distribuicao_temperatura.png': ('Distribuição de Temperaturas por Ano', 
+                                    'Boxplot mostrando a variação das temperaturas médias em cada ano.'),
+    'distribuicao_precipitacao.png': ('Distribuição de Precipitação', 
+                                     'Histograma da precipitação total acumulada durante todo o período.'),
+    'temp_vs_umidade.png': ('Relação entre Temperatura e Umidade', 
+                           'Leituras horárias de temperatura do ar e umidade relativa, mostrando como a umidade varia com a temperatura.'),
+    'distribuicao_pressao.png': ('Distribuição de Pressão Atmosférica', 
+                                'Histograma dos valores de pressão atmosférica registrados na estação.'),
+    'distribuicao_vento.png': ('Distribuição de Velocidade do Vento', 
+                              'Histograma da velocidade do vento registrada durante o período.'),
+    'distribuicao_radiacao.png': ('Distribuição de Radiação Global', 
+                                 'Histograma dos valores de radiação solar global incidente.')
+}
+
+REFERENCES = [
+    "1. Silva, F. R., et al. Mudanças Climáticas no Brasil: Uma Análise das Tendências de Temperatura e Precipitação. Revista Brasileira de Meteorologia, 2020.",
+    "2. Medeiros, M. S., et al. Análise de Dados Climáticos e suas Implicações nas Condições Ambientais e Agrícolas. Journal of Climate, 2021.",
+    "3. Instituto Nacional de Meteorologia (INMET). Estação Meteorológica {place}. Disponível em: http://inmet.gov.br",
+    "4. Agência Nacional de Águas (ANA). Relatório de Precipitação no Brasil. 2022."
+]
+
+def image_size(image_path):
+    """Tamanho (px) da figura, registrado pelo save_plot na renderização.
+
+    Só imagens sem esses metadados (ex.: geradas por versões antigas) têm
+    o cabeçalho lido pelo PIL.
+    """
+    metadata = cache_figuras.carregar_metadados(image_path)
+    if metadata is not None:
+        return metadata['largura_px'], metadata['altura_px']
+    with Image.open(image_path) as img:
+        return img.size
+
+def printed_size(width_px, height_px):
+    """Tamanho impresso (mm): até 180 mm de largura e 250 mm de altura, mantendo a proporção"""
+    aspect = width_px / height_px
+    width = MAX_IMAGE_WIDTH_MM
+    height = width / aspect
+    if height > MAX_IMAGE_HEIGHT_MM:
+        height = MAX_IMAGE_HEIGHT_MM
+        width = height * aspect
+    return width, height
+
+def source_signature(image_path):
+    """Identifica o conteúdo da figura: chave do cache de figuras ou tamanho + mtime"""
+    directory, filename = os.path.split(image_path)
+    key = cache_figuras.carregar_indice(directory).get(filename)
+    if key is None:
+        info = os.stat(image_path)
+        key = f"{info.st_size}-{info.st_mtime_ns}"
+    return key
+
+def prepare_image(image_path, dpi=REPORT_DPI):
+    """Reamostra a figura para o tamanho impresso no dpi pedido, com cache.
+
+    Retorna (caminho da imagem reduzida, largura_mm, altura_mm). A versão
+    reduzida é reaproveitada enquanto a figura original e o dpi não mudarem.
+    """
+    width_mm, height_mm = printed_size(*image_size(image_path))
+    target = (max(1, round(width_mm / MM_PER_INCH * dpi)), max(1, round(height_mm / MM_PER_INCH * dpi)))
+
+    directory, filename = os.path.split(image_path)
+    stem = os.path.splitext(filename)[0]
+    key = hashlib.sha256(f"{source_signature(image_path)}|{dpi}|{target}".encode()).hexdigest()[:16]
+    cache_dir = os.path.join(directory, CACHE_DIR)
+    cached_path = os.path.join(cache_dir, f"{stem}-{key}.png")
+
+    if not os.path.exists(cached_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        # Versões anteriores da mesma figura deixam de ser úteis
+        for old in os.listdir(cache_dir):
+            if old.startswith(f"{stem}-"):
+                os.remove(os.path.join(cache_dir, old))
+        with Image.open(image_path) as img:
+            resized = img.resize(target, Image.LANCZOS) if img.size != target else img.copy()
+        temporary = cached_path + '.tmp'
+        resized.save(temporary, format='PNG', optimize=True)
+        os.replace(temporary, cached_path)
+    return cached_path, width_mm, height_mm
 
 class PDFReport(FPDF):
+    def __init__(self, model, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.model = model
+
     def header(self):
         self.set_font("helvetica", 'B', 16)
         self.cell(0, 10, 'Relatório Meteorológico Completo', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
         self.set_font("helvetica", '', 12)
-        self.cell(0, 10, f"Estação: Florianópolis/SC (A806) | Período: 2010-2025", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+        self.cell(0, 10, f"Estação: {descrever_local(self.model)} | Período: {descrever_periodo(self.model)}", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
         self.cell(0, 10, f"Data do relatório: {datetime.now().strftime('%d/%m/%Y %H:%M')}", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
         self.ln(10)
     
@@ -17,7 +134,7 @@ class PDFReport(FPDF):
         self.set_font("helvetica", 'I', 8)
         self.cell(0, 10, f'Página {self.page_no()}', align='C')
 
-    def add_image_with_title(self, image_path, title, description=None):
+    def add_image_with_title(self, image_path, title, description=None, dpi=REPORT_DPI):
         self.add_page()
         self.set_font("helvetica", 'B', 14)
         self.cell(0, 10, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
@@ -28,30 +145,60 @@ class PDFReport(FPDF):
             self.ln(5)
         
         try:
-            with Image.open(image_path) as img:
-                w, h = img.size
-                aspect = w / h
-                
-                max_width = 180
-                new_width = min(w, max_width)
-                new_height = new_width / aspect
-                
-                max_height = 250
-                if new_height > max_height:
-                    new_height = max_height
-                    new_width = new_height * aspect
-                
-                self.image(image_path, x=(210 - new_width)/2, y=None, w=new_width, h=new_height)
-        except Exception as e:
+            # A imagem é preparada só quando a página é montada
+            resized_path, width, height = prepare_image(image_path, dpi)
+            self.image(resized_path, x=(PAGE_WIDTH_MM - width)/2, y=None, w=width, h=height)
+        except (OSError, ValueError) as e:
+            # Imagem ilegível: o relatório sai com o aviso no lugar da figura
+            instrumentacao.registrar('erro', etapa='prepare_image', imagem=image_path, erro=f"{type(e).__name__}: {str(e)}")
             self.set_font("helvetica", 'I', 10)
             self.cell(0, 10, f"Erro ao carregar imagem: {str(e)}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         
         self.ln(10)
 
-def generate_report(output_dir="imagens_resultados", report_file="relatorio_meteorologico_completo.pdf", author_name="Eduardo Hansen"):
+    def add_annual_table(self, stats):
+        """Tabela das estatísticas anuais (calculate_annual_stats)"""
+        self.set_font("helvetica", '', 10)
+        with self.table(text_align='CENTER') as table:
+            table.row(['Ano', 'Mediana (°C)', 'Máxima (°C)', 'Mínima (°C)'])
+            for year, median, maximum, minimum in stats.itertuples(index=False):
+                table.row([str(int(year)), formatar_numero(median), formatar_numero(maximum), formatar_numero(minimum)])
+
+    def add_extremes_table(self, extremes):
+        """Tabela das contagens anuais de eventos extremos"""
+        self.set_font("helvetica", '', 10)
+        with self.table(text_align='CENTER') as table:
+            table.row(['Ano', 'Dias quentes', 'Noites frias', 'Dias de chuva forte'])
+            for year, hot, cold, rain in extremes.reset_index().itertuples(index=False):
+                table.row([str(int(year)), str(hot), str(cold), str(rain)])
+
+    def add_anomalies_table(self, anomalies):
+        """Tabela anual de episódios e anomalia média de temperatura"""
+        self.set_font("helvetica", '', 10)
+        with self.table(text_align='CENTER') as table:
+            table.row(['Ano', 'Ondas de calor', 'Ondas de frio', 'Chuva forte', 'Anomalia (°C)'])
+            for year, hot, cold, rain, anomaly in anomalies.reset_index().itertuples(index=False):
+                table.row([str(int(year)), str(hot), str(cold), str(rain), formatar_numero(anomaly, sinal=True)])
+
+def generate_report(output_dir="imagens_resultados", report_file="relatorio_meteorologico_completo.pdf", author_name="Eduardo Hansen",
+                    dpi=REPORT_DPI, data_dir=DIRETORIO_DADOS, station=None, years=None, model=None):
+    """Monta o PDF com as imagens de `output_dir` e os textos do modelo.
+
+    O período, as tabelas e os achados vêm de `model` (ou de
+    montar_modelo(data_dir, station, years) se não for informado).
+    Retorna o caminho do PDF, ou None se algo falhar.
+    """
     if not os.path.exists(output_dir):
         print(f"❌ Diretório '{output_dir}' não encontrado.")
         return
+
+    try:
+        model = model or montar_modelo(data_dir, station, years)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ Não foi possível calcular o modelo do relatório: {str(e)}")
+        return
+    place, period = descrever_local(model), descrever_periodo(model)
+    limits = model['limiares']
     
     image_files = sorted([f for f in os.listdir(output_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg'))])
     
@@ -59,26 +206,8 @@ def generate_report(output_dir="imagens_resultados", report_file="relatorio_mete
         print("❌ Nenhuma imagem encontrada para gerar o relatório.")
         return
     
-    image_descriptions = {
-        'tabela_temperaturas.png': ('Tabela de Temperaturas por Ano', 
-                                   'Estatísticas anuais de temperaturas (média, máxima e mínima) no período analisado.'),
-        'tendencia_temperatura.png': ('Tendência de Temperatura Anual', 
-                                     'Evolução das temperaturas medianas, máximas e mínimas ao longo dos anos.'),
-        'distribuicao_temperatura.png': ('Distribuição de Temperaturas por Ano', 
-                                        'Boxplot mostrando a variação das temperaturas médias em cada ano.'),
-        'distribuicao_precipitacao.png': ('Distribuição de Precipitação', 
-                                         'Histograma da precipitação total acumulada durante todo o período.'),
-        'temp_vs_umidade.png': ('Relação entre Temperatura e Umidade', 
-                               'Gráfico de dispersão mostrando a correlação entre temperatura do ar e umidade relativa.'),
-        'distribuicao_pressao.png': ('Distribuição de Pressão Atmosférica', 
-                                    'Histograma dos valores de pressão atmosférica registrados na estação.'),
-        'distribuicao_vento.png': ('Distribuição de Velocidade do Vento', 
-                                  'Histograma da velocidade do vento registrada durante o período.'),
-        'distribuicao_radiacao.png': ('Distribuição de Radiação Global', 
-                                     'Histograma dos valores de radiação solar global incidente.')
-    }
 
-    pdf = PDFReport()
+    pdf = PDFReport(model)
     pdf.set_title("Relatório Meteorológico")
     pdf.set_author(author_name)
     
@@ -89,8 +218,8 @@ def generate_report(output_dir="imagens_resultados", report_file="relatorio_mete
     pdf.ln(20)
     
     pdf.set_font("helvetica", 'B', 16)
-    pdf.cell(0, 10, 'Estação: Florianópolis/SC (A806)', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
-    pdf.cell(0, 10, 'Período: 2010-2025', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+    pdf.cell(0, 10, f'Estação: {place}', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+    pdf.cell(0, 10, f'Período: {period}', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
     pdf.ln(20)
     
     pdf.set_font("helvetica", '', 14)
@@ -108,7 +237,7 @@ def generate_report(output_dir="imagens_resultados", report_file="relatorio_mete
     pdf.cell(0, 10, 'Sumário', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
     pdf.ln(10)
     pdf.set_font("helvetica", '', 12)
-    pdf.multi_cell(190, 10, "Esta pesquisa tem a finalidade de conduzir um reconhecimento inicial das informações do tempo reunidas pela estação de Florianópolis/SC (A806) entre 2010 e 2025. Adotando métodos de ciência de dados, as características do tempo, como temperatura, chuva, pressão do ar, umidade, vento e luz do sol, foram avaliadas, visando identificar padrões, caminhos e possíveis ligações. A avaliação criou representações visuais relevantes, como gráficos de dispersão, diagramas de caixa e histogramas, oferecendo percepções importantes sobre o clima da área.")
+    pdf.multi_cell(190, 10, f"Esta pesquisa tem a finalidade de conduzir um reconhecimento inicial das informações do tempo reunidas pela estação de {place} entre {model['periodo']['inicio']:%d/%m/%Y} e {model['periodo']['fim']:%d/%m/%Y}. Adotando métodos de ciência de dados, as características do tempo, como temperatura, chuva, pressão do ar, umidade, vento e luz do sol, foram avaliadas, visando identificar padrões, caminhos e possíveis ligações. A avaliação criou representações visuais relevantes, como gráficos de dispersão, diagramas de caixa e histogramas, oferecendo percepções importantes sobre o clima da área.")
     pdf.ln(10)
     
     # Introdução
@@ -117,7 +246,7 @@ def generate_report(output_dir="imagens_resultados", report_file="relatorio_mete
     pdf.cell(0, 10, '1. Introdução', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
     pdf.ln(5)
     pdf.set_font("helvetica", '', 12)
-    pdf.multi_cell(190, 10, "A avaliação de dados do tempo é uma ferramenta essencial para entender as mudanças no clima e seu efeito em diversos setores, como saúde, agricultura e planejamento das cidades. Este estudo emprega dados do tempo da estação Florianópolis/SC (A806) obtidos de 2010 a 2025, buscando explorar as mudanças de temperatura, chuva e outras características do ar.")
+    pdf.multi_cell(190, 10, f"A avaliação de dados do tempo é uma ferramenta essencial para entender as mudanças no clima e seu efeito em diversos setores, como saúde, agricultura e planejamento das cidades. Este estudo emprega dados do tempo da estação {place} obtidos de {model['periodo']['ano_inicial']} a {model['periodo']['ano_final']}, buscando explorar as mudanças de temperatura, chuva e outras características do ar.")
     pdf.ln(10)
     
     # Metodologia
@@ -126,13 +255,16 @@ def generate_report(output_dir="imagens_resultados", report_file="relatorio_mete
     pdf.cell(0, 10, '2. Metodologia', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
     pdf.ln(5)
     pdf.set_font("helvetica", '', 12)
-    pdf.multi_cell(190, 10, "2.1 Coleta e Apresentação das Informações\n\nAs informações utilizadas neste estudo foram retiradas da estação meteorológica de Florianópolis/SC, abrangendo o período de 2010 a 2025. As características analisadas incluem:\n\n- Temperatura: Média, máxima e mínima.\n- Chuva: Total acumulado ao longo do período.\n- Pressão do Ar, Umidade, Velocidade do Vento e Luz do Sol.\n\nA coleta foi feita em formato CSV e uma limpeza das informações foi realizada, retirando valores ausentes e extremos, além de ajustar algumas características para análise.")
+    station, available = model['estacao'], model['disponibilidade']
+    measures = "\n".join(f"- {label}: {formatar_numero(100 * available[measure], 0)}% das horas com leitura válida."
+                         for measure, label in MEDIDAS_DESCRITAS.items())
+    pdf.multi_cell(190, 10, f"2.1 Coleta e Apresentação das Informações\n\nAs informações utilizadas neste estudo são as leituras horárias da estação automática do INMET {place} (latitude {formatar_numero(station['latitude'], 4)}, longitude {formatar_numero(station['longitude'], 4)}, altitude {formatar_numero(station['altitude'])} m), de {model['periodo']['inicio']:%d/%m/%Y} a {model['periodo']['fim']:%d/%m/%Y}. As características analisadas e a cobertura de cada uma no período são:\n\n{measures}\n\nA radiação global só tem leitura nas horas de sol. Os arquivos CSV do INMET foram convertidos para um armazenamento Parquet particionado por estação e ano, com agregados diários e mensais calculados na conversão.")
     pdf.ln(10)
     
-    pdf.multi_cell(190, 10, "2.2 Tratamento das Informações\n\nAs informações passaram por diversas etapas de tratamento, incluindo a retirada de valores ausentes e a inclusão de informações faltantes. Para auxiliar na análise, as características de temperatura e umidade foram ajustadas, e métodos estatísticos foram utilizados para a detecção de valores extremos.")
+    pdf.multi_cell(190, 10, "2.2 Tratamento das Informações\n\nAs leituras passaram por controle de qualidade: valores fora da faixa física ou com saltos isolados entre horas vizinhas foram descartados, lacunas de até 3 horas foram interpoladas e as mais longas preenchidas pela climatologia mês x hora da estação. As estatísticas diárias e anuais usam apenas leituras aprovadas.")
     pdf.ln(10)
     
-    pdf.multi_cell(190, 10, "2.3 Análise Preliminar\n\nForam aplicadas técnicas de estatísticas descritivas (média, mediana, desvio padrão) para compreender o comportamento das características. Além disso, gráficos como histogramas, diagramas de caixa e gráficos de dispersão foram gerados para identificar caminhos e ligações entre as características, como a relação entre temperatura e umidade.")
+    pdf.multi_cell(190, 10, f"2.3 Análise Preliminar\n\nForam aplicadas técnicas de estatísticas descritivas (média, mediana, máximos e mínimos) para compreender o comportamento das características. A relação entre temperatura e umidade é medida pela correlação de Pearson entre as leituras horárias das duas. As tendências são inclinações de mínimos quadrados sobre as médias dos anos completos ({len(model['anos_completos'])} anos com pelo menos {DIAS_ANO_COMPLETO} dias válidos). Dias quentes são aqueles com máxima acima de {formatar_numero(limits['DIAS_QUENTES'])} °C (percentil 90), noites frias as com mínima abaixo de {formatar_numero(limits['NOITES_FRIAS'])} °C (percentil 10) e dias de chuva forte os com {formatar_numero(limits['DIAS_CHUVA_FORTE'], 0)} mm ou mais.")
     pdf.ln(10)
     
     # Resultados
@@ -141,41 +273,57 @@ def generate_report(output_dir="imagens_resultados", report_file="relatorio_mete
     pdf.cell(0, 10, '3. Resultados', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
     pdf.ln(5)
     pdf.set_font("helvetica", '', 12)
-    pdf.multi_cell(190, 10, "3.1 Temperatura\n\nA análise revelou uma tendência de elevação das temperaturas máximas ao longo dos anos, principalmente nos anos recentes. A temperatura média também apresentou um pequeno aumento, refletindo a tendência global de aquecimento.")
+    findings = model['achados']
+    pdf.multi_cell(190, 10, f"3.1 Temperatura\n\n{findings['temperatura']}")
+    pdf.ln(5)
+    pdf.add_annual_table(model['estatisticas'])
     pdf.ln(10)
-    
-    pdf.multi_cell(190, 10, "3.2 Chuva\n\nA chuva apresentou variações sazonais, com picos durante o verão. A distribuição da chuva não apresentou caminhos claros, mas os eventos de chuva extrema ocorreram com maior frequência nos últimos anos.")
+
+    pdf.set_font("helvetica", '', 12)
+    pdf.multi_cell(190, 10, f"3.2 Chuva\n\n{findings['chuva']}")
     pdf.ln(10)
-    
-    pdf.multi_cell(190, 10, "3.3 Ligação entre Temperatura e Umidade\n\nVerificou-se que quando a temperatura subia, o ar ficava menos úmido, mostrando uma ligação entre esses dois fatores.")
+
+    pdf.multi_cell(190, 10, f"3.3 Ligação entre Temperatura e Umidade\n\n{findings['temperatura_umidade']}")
     pdf.ln(10)
-    
-    pdf.multi_cell(190, 10, "3.4 Luz do Sol e Correntes de Ar\n\nA quantidade de luz solar mudou de acordo com a época do ano, sendo maior nos meses de verão. A força do vento não variou muito ao longo dos anos, mantendo-se estável.")
+
+    pdf.multi_cell(190, 10, f"3.4 Luz do Sol e Correntes de Ar\n\n{findings['radiacao_vento']}")
     pdf.ln(10)
-    
+
+    pdf.multi_cell(190, 10, f"3.5 Eventos Extremos de Temperatura\n\n{findings['extremos']}")
+    pdf.ln(5)
+    pdf.add_extremes_table(model['extremos'])
+    pdf.ln(10)
+
+    pdf.set_font("helvetica", '', 12)
+    pdf.multi_cell(190, 10, f"3.6 Anomalias e Episódios\n\n{findings['anomalias']}")
+    if model['anomalias'] is not None:
+        pdf.ln(5)
+        pdf.add_anomalies_table(model['anomalias']['anual'])
+    pdf.ln(10)
+
     # Análise
     pdf.add_page()
     pdf.set_font("helvetica", 'B', 16)
     pdf.cell(0, 10, '4. Análise', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
     pdf.ln(5)
     pdf.set_font("helvetica", '', 12)
-    pdf.multi_cell(190, 10, "Os dados coletados apontam para uma influência das alterações climáticas globais em Florianópolis, com um aumento gradual das temperaturas e a ocorrência mais intensa de eventos climáticos incomuns, como chuvas torrenciais. A relação entre temperatura e umidade pode ajudar a entender como as pessoas se sentem em relação ao calor, principalmente no verão.")
+    pdf.multi_cell(190, 10, findings['analise'])
     pdf.ln(10)
-    
+
     # Considerações Finais
     pdf.add_page()
     pdf.set_font("helvetica", 'B', 16)
     pdf.cell(0, 10, '5. Considerações Finais', new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L')
     pdf.ln(5)
     pdf.set_font("helvetica", '', 12)
-    pdf.multi_cell(190, 10, "Esta pesquisa fornece um panorama completo das mudanças climáticas em Florianópolis no período de 2010 a 2025. Ao analisarmos os dados do tempo, notamos tendências importantes, como o aumento das temperaturas e a ligação entre temperatura e umidade. Em breve, outras pesquisas poderão analisar as previsões para os próximos anos, usando modelos climáticos preditivos.")
+    pdf.multi_cell(190, 10, f"Esta pesquisa fornece um panorama das condições do tempo em {model['estacao']['nome']} no período de {period}, com tendências e eventos extremos calculados diretamente dos dados. Em breve, outras pesquisas poderão analisar as previsões para os próximos anos, usando modelos climáticos preditivos.")
     pdf.ln(10)
     
     # Adicionar imagens com descrições
     for image_file in image_files:
-        title, description = image_descriptions.get(image_file, (image_file, None))
+        title, description = IMAGE_DESCRIPTIONS.get(image_file, (image_file, None))
         image_path = os.path.join(output_dir, image_file)
-        pdf.add_image_with_title(image_path, title, description)
+        pdf.add_image_with_title(image_path, title, description, dpi)
     
     # Referências
     pdf.add_page()
@@ -184,22 +332,168 @@ def generate_report(output_dir="imagens_resultados", report_file="relatorio_mete
     pdf.ln(10)
 
     pdf.set_font("helvetica", '', 12)
-    references = [
-        "1. Silva, F. R., et al. Mudanças Climáticas no Brasil: Uma Análise das Tendências de Temperatura e Precipitação. Revista Brasileira de Meteorologia, 2020.",
-        "2. Medeiros, M. S., et al. Análise de Dados Climáticos e suas Implicações nas Condições Ambientais e Agrícolas. Journal of Climate, 2021.",
-        "3. Instituto Nacional de Meteorologia (INMET). Estação Meteorológica Florianópolis/SC (A806). Disponível em: http://inmet.gov.br",
-        "4. Agência Nacional de Águas (ANA). Relatório de Precipitação no Brasil. 2022."
-    ]
-
-    for ref in references:
-        pdf.multi_cell(190, 10, ref)
+
+    for ref in REFERENCES:
+        pdf.multi_cell(190, 10, ref.format(place=place))
         pdf.ln(5)
     
     try:
         pdf.output(report_file)
         print(f"\n✅ Relatório gerado com sucesso: {report_file}")
-    except Exception as e:
+        return report_file
+    except OSError as e:
         print(f"\n❌ Erro ao salvar relatório: {str(e)}")
 
+# Modo em lote: um relatório por estação e período, cada um em um processo
+# do pool (gráficos + PDF). A falha de um relatório fica registrada no
+# manifesto do lote sem interromper os demais.
+BatchJob = namedtuple('BatchJob', ['station', 'first_year', 'last_year'])
+BATCH_DIR = 'relatorios'
+BATCH_MANIFEST = 'manifesto.json'
+
+def parse_period(text):
+    """'2010-2025', '2024' ou 'todo' -> (primeiro ano, último ano), None para o período todo"""
+    if text in (None, 'todo'):
+        return None, None
+    first, _, last = text.partition('-')
+    return int(first), int(last or first)
+
+def batch_job_name(job: BatchJob) -> str:
+    """Nome do subdiretório do relatório (ex.: A806_2010-2025, ou A806_2024 para um só ano)"""
+    if job.first_year is None:
+        return f"{job.station}_completo"
+    if job.first_year == job.last_year:
+        return f"{job.station}_{job.first_year}"
+    return f"{job.station}_{job.first_year}-{job.last_year}"
+
+def run_batch_job(job: BatchJob, base_dir: str, data_dir: str, author_name: str, dpi: int) -> dict:
+    """Gera os gráficos e o PDF de um relatório do lote (em um processo do pool).
+
+    A saída de texto vai para log.txt no diretório do relatório. Erros são
+    capturados e devolvidos na entrada do manifesto (e, com traceback, no
+    registro da instrumentação).
+    """
+    start = time.perf_counter()
+    job_dir = os.path.join(base_dir, batch_job_name(job))
+    images_dir = os.path.join(job_dir, 'imagens')
+    report_file = os.path.join(job_dir, 'relatorio.pdf')
+    years = None if job.first_year is None else list(range(job.first_year, job.last_year + 1))
+    entry = {'estacao': job.station, 'anos': [job.first_year, job.last_year], 'pdf': report_file,
+             'log': os.path.join(job_dir, 'log.txt'), 'status': 'ok', 'segundos': {}}
+
+    os.makedirs(job_dir, exist_ok=True)
+    with open(entry['log'], 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        labels = {'estacao': job.station, 'anos': entry['anos']}
+        try:
+            with instrumentacao.medir('relatorio_lote', **labels):
+                # O modelo vem primeiro: valida a estação e o período antes dos gráficos
+                with instrumentacao.medir('montar_modelo', **labels) as step:
+                    model = montar_modelo(data_dir, job.station, years)
+                entry['segundos']['modelo'] = step['segundos']
+
+                with instrumentacao.medir('generate_charts', **labels) as step:
+                    generate_charts(images_dir, data_dir, stations=[job.station], years=years)
+                entry['segundos']['graficos'] = step['segundos']
+
+                with instrumentacao.medir('generate_report', **labels) as step:
+                    if generate_report(images_dir, report_file, author_name, dpi, model=model) is None:
+                        raise RuntimeError(f"Falha ao montar o PDF (ver {entry['log']})")
+                entry['segundos']['pdf'] = step['segundos']
+        # Qualquer falha fica restrita a este relatório; os demais continuam
+        except Exception as e:
+            entry['status'] = 'erro'
+            entry['erro'] = f"{type(e).__name__}: {str(e)}"
+            print(f"❌ {entry['erro']}")
+
+    entry['segundos']['total'] = time.perf_counter() - start
+    return entry
+
+def save_batch_manifest(manifest: dict, base_dir: str) -> None:
+    """Grava o manifesto do lote de forma atômica"""
+    path = os.path.join(base_dir, BATCH_MANIFEST)
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(temporary, path)
+
+def generate_batch(jobs, base_dir=BATCH_DIR, data_dir=DIRETORIO_DADOS, workers=None, author_name="Eduardo Hansen",
+                   dpi=REPORT_DPI) -> dict:
+    """Gera um relatório por BatchJob em um pool de processos.
+
+    Cada relatório fica em base_dir/<estação>_<período>/ e o manifesto do
+    lote (saídas, status, erros e tempos) em base_dir/manifesto.json.
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    start = time.perf_counter()
+    entries = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker) as executor:
+        futures = [(job, executor.submit(run_batch_job, job, base_dir, data_dir, author_name, dpi)) for job in jobs]
+        for job, future in futures:
+            try:
+                entry = future.result()
+            except Exception as e:
+                # O processo do relatório morreu (ex.: falta de memória)
+                entry = {'estacao': job.station, 'anos': [job.first_year, job.last_year], 'status': 'erro',
+                         'erro': f"{type(e).__name__}: {str(e)}", 'segundos': {}}
+                instrumentacao.registrar('erro', etapa='relatorio_lote', estacao=job.station, erro=entry['erro'])
+            entries.append(entry)
+            marker = '✓' if entry['status'] == 'ok' else '✗'
+            detail = f"{entry['segundos'].get('total', 0):.2f}s" if entry['status'] == 'ok' else entry['erro']
+            print(f"  {marker} {batch_job_name(job)}: {detail}")
+
+    manifest = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'segundos_total': time.perf_counter() - start,
+        'relatorios': entries,
+    }
+    save_batch_manifest(manifest, base_dir)
+    return manifest
+
 if __name__ == "__main__":
-    generate_report(author_name="Eduardo Hansen")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Monta o relatório PDF a partir das imagens geradas")
+    parser.add_argument('--imagens', default="imagens_resultados", help="Diretório das imagens")
+    parser.add_argument('--saida', default="relatorio_meteorologico_completo.pdf", help="Arquivo PDF gerado")
+    parser.add_argument('--autor', default="Eduardo Hansen", help="Autor exibido na capa")
+    parser.add_argument('--dpi', type=int, default=REPORT_DPI, help="Resolução das figuras no PDF")
+    parser.add_argument('--dados', default=DIRETORIO_DADOS, help="Diretório do armazenamento")
+    parser.add_argument('--estacao', help="Código WMO da estação (obrigatório se houver mais de uma)")
+    parser.add_argument('--anos', type=int, nargs='+', help="Anos do relatório (padrão: todos)")
+    parser.add_argument('--lote', action='store_true',
+                        help="Gera gráficos e relatório para cada combinação de --estacoes e --periodos")
+    parser.add_argument('--estacoes', nargs='+', help="No modo lote, estações (padrão: todas do armazenamento)")
+    parser.add_argument('--periodos', nargs='+', default=['todo'],
+                        help="No modo lote, períodos como 2010-2025, 2024 ou todo")
+    parser.add_argument('--workers', type=int, default=None, help="No modo lote, processos do pool")
+    parser.add_argument('--saida-lote', default=BATCH_DIR, help="No modo lote, diretório dos relatórios")
+    instrumentacao.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    instrumentacao.configurar_argumentos(args)
+
+    inicio = time.perf_counter()
+    if args.lote:
+        stations = args.estacoes or list(carregar_estacoes(args.dados)['CODIGO_WMO'])
+        jobs = [BatchJob(station, *parse_period(period))
+                for station, period in itertools.product(stations, args.periodos)]
+        print(f"Gerando {len(jobs)} relatório(s) em '{args.saida_lote}'...")
+        manifest = generate_batch(jobs, args.saida_lote, args.dados, args.workers, args.autor, args.dpi)
+        failures = sum(entry['status'] != 'ok' for entry in manifest['relatorios'])
+        print(f"\n{'✅' if not failures else '❌'} {len(jobs) - failures} de {len(jobs)} relatório(s) gerados; "
+              f"manifesto em {os.path.join(args.saida_lote, BATCH_MANIFEST)}")
+        success = not failures
+    else:
+        # Os gráficos são (re)gerados para a estação e os anos do relatório;
+        # os que não mudaram saem do cache de figuras
+        try:
+            station = select_station(args.dados, args.estacao)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"❌ {str(e)}")
+            sys.exit(1)
+        with instrumentacao.medir('generate_charts', estacao=station, anos=args.anos):
+            generate_charts(args.imagens, args.dados, stations=[station], years=args.anos)
+        with instrumentacao.medir('generate_report', estacao=station, anos=args.anos) as medida:
+            success = generate_report(args.imagens, args.saida, args.autor, args.dpi, args.dados, station,
+                                      args.anos) is not None
+            medida['pdf_gerado'] = success
+    print(f"Tempo total: {time.perf_counter() - inicio:.2f}s")
+    if not success:
+        sys.exit(1)
\ No newline at end of file
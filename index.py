@@ -1,100 +1,354 @@
 import pandas as pd
 import os
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from armazenamento import (
+    DIRETORIO_DADOS, COLUNA_DATA_HORA, criar_data_hora, tipar_medidas,
+    COLUNA_ESTACAO, assinatura_arquivo, hash_arquivo,
+    carregar_manifesto, salvar_manifesto, caminho_particao, salvar_dados,
+    remover_particao, salvar_estacoes, GRAOS, caminho_agregado, arquivos_da_particao,
+    LINHAS_POR_GRUPO
+)
+from agregacao import calcular_agregados, calcular_histogramas
+from qualidade import descartar_reprovados, calcular_soma_hora_mes
+import instrumentacao
 
-# Configurações
-caminho_arquivos = 'C:/xampp/htdocs/TemperaturaGlobal/'
-arquivos_csv = [
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2010_A_31-12-2010.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2011_A_31-12-2011.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2012_A_31-12-2012.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2013_A_31-12-2013.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2014_A_31-12-2014.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2015_A_31-12-2015.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2016_A_31-12-2016.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2017_A_31-12-2017.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2018_A_31-12-2018.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2019_A_31-12-2019.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2020_A_31-12-2020.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2021_A_31-12-2021.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2022_A_31-12-2022.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2023_A_31-12-2023.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2024_A_31-12-2024.CSV",
-    "INMET_S_SC_A806_FLORIANOPOLIS_01-01-2025_A_31-05-2025.CSV"
+# Configurações: por padrão os CSVs são procurados no diretório do script
+caminho_arquivos = os.path.dirname(os.path.abspath(__file__))
+padrao_arquivos = 'INMET_*_*.CSV'
+
+# Esquema fixo dos arquivos do INMET: 8 linhas de metadados da estação,
+# uma linha de cabeçalho e 19 colunas de dados (o ';' final de cada linha
+# gera uma 20ª coluna vazia, que é descartada na leitura)
+LINHAS_METADADOS = 8
+nomes_colunas = [
+    'DATA', 'HORA', 'PRECIPITACAO_TOTAL', 'PRESSAO_ESTACAO',
+    'PRESSAO_MAX', 'PRESSAO_MIN', 'RADIACAO_GLOBAL', 'TEMPERATURA_AR',
+    'TEMPERATURA_ORVALHO', 'TEMPERATURA_MAX', 'TEMPERATURA_MIN',
+    'TEMPERATURA_ORVALHO_MAX', 'TEMPERATURA_ORVALHO_MIN',
+    'UMIDADE_MAX', 'UMIDADE_MIN', 'UMIDADE_RELATIVA',
+    'VENTO_DIRECAO', 'VENTO_RAJADA_MAX', 'VENTO_VELOCIDADE'
+]
+colunas_numericas = nomes_colunas[2:]  # Todas exceto DATA e HORA
+tipos_colunas = {'DATA': str, 'HORA': str, **{col: 'float64' for col in colunas_numericas}}
+
+# Campos das 8 linhas de metadados, na ordem em que aparecem no arquivo.
+# Os rótulos mudam entre versões (acentos, formato da data de fundação),
+# por isso a leitura é feita pela posição da linha.
+campos_estacao = [
+    'REGIAO', 'UF', 'NOME', 'CODIGO_WMO',
+    'LATITUDE', 'LONGITUDE', 'ALTITUDE', 'DATA_FUNDACAO'
 ]
 
-def unificar_todos_dados(arquivos):
-    df_unificado = pd.DataFrame()
-    
-    for arquivo in arquivos:
-        caminho_completo = os.path.join(caminho_arquivos, arquivo)
-        
+def descobrir_arquivos(diretorio=None, padrao=padrao_arquivos):
+    """Procura recursivamente os CSVs do INMET em uma árvore de diretórios"""
+    diretorio = diretorio or caminho_arquivos
+    caminhos = glob.glob(os.path.join(diretorio, '**', padrao), recursive=True)
+    return sorted(caminho for caminho in caminhos if os.path.isfile(caminho))
+
+def ler_cabecalho_estacao(caminho_completo):
+    """Lê as 8 linhas de metadados da estação no início do arquivo"""
+    with open(caminho_completo, encoding='ISO-8859-1') as f:
+        linhas = [next(f) for _ in range(LINHAS_METADADOS)]
+
+    estacao = {}
+    for campo, linha in zip(campos_estacao, linhas):
+        valor = linha.split(';', 1)[1].strip().rstrip(';') if ';' in linha else ''
+        estacao[campo] = valor
+
+    for campo in ('LATITUDE', 'LONGITUDE', 'ALTITUDE'):
+        estacao[campo] = float(estacao[campo].replace(',', '.')) if estacao[campo] else None
+
+    # Até 2018 a data vem como 2003-01-22; depois, como 22/01/03
+    for formato in ('%Y-%m-%d', '%d/%m/%y'):
+        data = pd.to_datetime(estacao['DATA_FUNDACAO'], format=formato, errors='coerce')
+        if not pd.isna(data):
+            estacao['DATA_FUNDACAO'] = data.strftime('%Y-%m-%d')
+            break
+    else:
+        estacao['DATA_FUNDACAO'] = None
+
+    if not estacao['CODIGO_WMO']:
+        raise ValueError("Código WMO da estação não encontrado no cabeçalho")
+    return estacao
+
+def ler_arquivo(caminho_completo, estacao=None):
+    """Lê e normaliza um único arquivo do INMET.
+
+    Executa dentro de um processo do pool. Os valores com vírgula decimal
+    são convertidos pelo próprio parser do pandas (decimal=','), sem passar
+    por strings intermediárias. DATA e HORA viram uma única coluna
+    DATA_HORA, as medidas são reduzidas a float32 e o código WMO da
+    estação (lido do cabeçalho se `estacao` não for informada) é
+    adicionado na coluna ESTACAO.
+    Retorna (DataFrame ou None, segundos gastos, mensagem).
+    """
+    inicio = time.perf_counter()
+
+    try:
+        with instrumentacao.medir('ler_arquivo', arquivo=os.path.basename(caminho_completo)) as medida:
+            if estacao is None:
+                estacao = ler_cabecalho_estacao(caminho_completo)
+
+            df = pd.read_csv(caminho_completo,
+                           delimiter=';',
+                           decimal=',',
+                           encoding='ISO-8859-1',
+                           skiprows=LINHAS_METADADOS + 1,
+                           header=None,
+                           names=nomes_colunas,
+                           usecols=range(len(nomes_colunas)),
+                           dtype=tipos_colunas)
+
+            df.insert(0, COLUNA_DATA_HORA, criar_data_hora(df.pop('DATA'), df.pop('HORA')))
+            df = tipar_medidas(df, colunas_numericas)
+            df.insert(0, COLUNA_ESTACAO, estacao['CODIGO_WMO'])
+            medida.update(estacao=estacao['CODIGO_WMO'], registros=len(df))
+
+        return df, time.perf_counter() - inicio, f"Colunas lidas: {len(df.columns)}"
+
+    # Arquivo ilegível ou fora do formato do INMET; outros erros são falhas
+    # do código e interrompem a execução
+    except (OSError, ValueError, StopIteration) as e:
+        return None, time.perf_counter() - inicio, f"Erro: {type(e).__name__}: {str(e)}"
+
+def imprimir_resumo(caminhos, resultados, tempo_total):
+    """Imprime o tempo de leitura de cada arquivo.
+
+    `resultados` segue o formato de ler_arquivo: (registros ou None,
+    segundos, mensagem), onde registros é o nº de linhas lidas.
+    """
+    print("\nResumo da leitura por arquivo:")
+    for caminho, (registros, segundos, mensagem) in zip(caminhos, resultados):
+        arquivo = os.path.basename(caminho)
+        if registros is None:
+            print(f"  ✗ {arquivo}: {segundos:6.2f}s - {mensagem}")
+            continue
+        print(f"  ✓ {arquivo}: {segundos:6.2f}s - {registros} registros - {mensagem}")
+
+    soma = sum(segundos for _, segundos, _ in resultados)
+    print(f"Tempo total: {tempo_total:.2f}s (soma por arquivo: {soma:.2f}s)")
+
+def verificar_arquivos(caminhos):
+    """Descarta, com aviso, caminhos que não existem"""
+    existentes = []
+    for caminho_completo in caminhos:
         if not os.path.exists(caminho_completo):
             print(f"Arquivo não encontrado: {caminho_completo}")
             continue
-            
-        try:
-            # Ler o arquivo CSV
-            df = pd.read_csv(caminho_completo, 
-                           delimiter=';', 
-                           encoding='ISO-8859-1', 
-                           skiprows=11,
-                           header=0)
-            
-            # Verificar o número de colunas
-            num_colunas = len(df.columns)
-            print(f"\nProcessando {arquivo} - Colunas encontradas: {num_colunas}")
-            
-            # Nomes padrão das colunas (ajustados para 20 colunas)
-            nomes_colunas = [
-                'DATA', 'HORA', 'PRECIPITACAO_TOTAL', 'PRESSAO_ESTACAO',
-                'PRESSAO_MAX', 'PRESSAO_MIN', 'RADIACAO_GLOBAL', 'TEMPERATURA_AR',
-                'TEMPERATURA_ORVALHO', 'TEMPERATURA_MAX', 'TEMPERATURA_MIN',
-                'TEMPERATURA_ORVALHO_MAX', 'TEMPERATURA_ORVALHO_MIN',
-                'UMIDADE_MAX', 'UMIDADE_MIN', 'UMIDADE_RELATIVA',
-                'VENTO_DIRECAO', 'VENTO_RAJADA_MAX', 'VENTO_VELOCIDADE',
-                'COLUNA_EXTRA'  # Para a 20ª coluna
-            ]
-            
-            # Ajustar nomes conforme número de colunas
-            if num_colunas == 19:
-                nomes_colunas = nomes_colunas[:19]
-            elif num_colunas == 20:
-                pass  # Usa todos os 20 nomes
-            else:
-                print(f"Número inesperado de colunas: {num_colunas}")
+        existentes.append(caminho_completo)
+    return existentes
+
+def unificar_todos_dados(arquivos, max_workers=None):
+    """Lê os arquivos em paralelo e concatena o resultado uma única vez"""
+    caminhos = verificar_arquivos(arquivos)
+    if not caminhos:
+        return pd.DataFrame()
+
+    with instrumentacao.medir('unificar_todos_dados', arquivos=len(caminhos)) as medida:
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # map preserva a ordem dos arquivos, então o resultado final
+            # continua na ordem em que os caminhos foram informados
+            resultados = list(executor.map(ler_arquivo, caminhos))
+        tempo_total = time.perf_counter() - inicio
+
+        imprimir_resumo(caminhos,
+                        [(None if df is None else len(df), s, m) for df, s, m in resultados],
+                        tempo_total)
+
+        partes = [df for df, _, _ in resultados if df is not None]
+        medida['falhas'] = len(caminhos) - len(partes)
+        if not partes:
+            return pd.DataFrame()
+        df = pd.concat(partes, ignore_index=True)
+        df[COLUNA_ESTACAO] = df[COLUNA_ESTACAO].astype('category')
+        medida['registros'] = len(df)
+    return df
+
+def ler_e_salvar_particao(caminho_completo, diretorio):
+    """Lê um arquivo e grava suas partições (estação/ano) no próprio processo do pool.
+
+    Junto com cada partição horária são gravados os agregados diário,
+    mensal e anual, os histogramas e as somas mês x hora dela, calculados
+    só com as leituras aprovadas no controle de qualidade (a partição
+    horária guarda os valores originais). Só os metadados voltam para o
+    processo principal, evitando serializar o DataFrame entre processos.
+    Retorna (registros ou None, segundos, mensagem, partições, estação).
+    """
+    try:
+        estacao = ler_cabecalho_estacao(caminho_completo)
+    except (OSError, ValueError, StopIteration) as e:
+        instrumentacao.registrar('erro', etapa='ler_cabecalho_estacao', arquivo=os.path.basename(caminho_completo),
+                                 erro=f"{type(e).__name__}: {str(e)}")
+        return None, 0.0, f"Erro no cabeçalho: {type(e).__name__}: {str(e)}", [], None
+
+    df, segundos, mensagem = ler_arquivo(caminho_completo, estacao)
+    if df is None:
+        return None, segundos, mensagem, [], estacao
+
+    df = df.dropna(subset=[COLUNA_DATA_HORA])
+    particoes = []
+    # ESTACAO e ANO ficam no caminho da partição (estilo hive), não no arquivo
+    dados = df.drop(columns=[COLUNA_ESTACAO]).sort_values(COLUNA_DATA_HORA, kind='stable')
+    for ano, grupo in dados.groupby(dados[COLUNA_DATA_HORA].dt.year, sort=True):
+        particao = caminho_particao(estacao['CODIGO_WMO'], ano, caminho_completo)
+        with instrumentacao.medir('salvar_particao', estacao=estacao['CODIGO_WMO'], ano=int(ano),
+                                  registros=len(grupo)):
+            salvar_dados(grupo, os.path.join(diretorio, particao), LINHAS_POR_GRUPO)
+            validados = descartar_reprovados(grupo)
+            for grao in GRAOS:
+                salvar_dados(calcular_agregados(validados, grao),
+                             os.path.join(diretorio, caminho_agregado(particao, grao)))
+            salvar_dados(calcular_histogramas(validados),
+                         os.path.join(diretorio, caminho_agregado(particao, 'histograma')))
+            salvar_dados(calcular_soma_hora_mes(validados),
+                         os.path.join(diretorio, caminho_agregado(particao, 'hora_mes')))
+        particoes.append(particao)
+    return len(df), segundos, mensagem, particoes, estacao
+
+def atualizar_estacoes(manifesto, diretorio=DIRETORIO_DADOS):
+    """Reconstrói a tabela de estações a partir dos cabeçalhos no manifesto.
+
+    Quando os metadados de uma estação mudam ao longo dos anos (ex.:
+    altitude), prevalece o arquivo com o período mais recente. Arquivos sem
+    nenhuma linha de dados (só o cabeçalho) não geram partição e ficam de fora.
+    """
+    registros = sorted(
+        (registro for registro in manifesto.values() if registro.get('estacao') and registro.get('particoes')),
+        key=lambda registro: max(registro['particoes'])
+    )
+    estacoes = {}
+    for registro in registros:
+        estacoes[registro['estacao']['CODIGO_WMO']] = registro['estacao']
+
+    tabela = pd.DataFrame(list(estacoes.values()), columns=campos_estacao)
+    salvar_estacoes(tabela.sort_values('CODIGO_WMO', ignore_index=True), diretorio)
+    return tabela
+
+def origem_ausente(origem: str, raiz: str) -> bool:
+    """True se o arquivo de origem fica dentro de `raiz` e não existe mais"""
+    try:
+        dentro = os.path.commonpath([origem, raiz]) == raiz
+    except ValueError:  # outra unidade, no Windows
+        return False
+    return dentro and not os.path.exists(origem)
+
+def atualizar_armazenamento(arquivos, diretorio=DIRETORIO_DADOS, max_workers=None, reprocessar=False, raiz=None):
+    """Atualiza o armazenamento lendo apenas arquivos novos ou alterados.
+
+    Um arquivo é considerado inalterado quando tamanho e mtime batem com o
+    manifesto; se só o mtime mudou, o hash do conteúdo decide. As chaves do
+    manifesto são os caminhos relativos a `raiz` (por padrão, o diretório
+    comum a todos os arquivos), e cada registro guarda também o caminho
+    absoluto de origem. Partições de arquivos que deixaram de existir são
+    removidas, mas só dos que estavam dentro de `raiz`: uma execução sobre
+    outro diretório (ou um subdiretório) não apaga as demais estações.
+    Retorna o número de arquivos (re)processados.
+    """
+    manifesto = carregar_manifesto(diretorio)
+    caminhos = verificar_arquivos(arquivos)
+    if raiz is None:
+        raiz = os.path.commonpath([os.path.dirname(c) for c in caminhos]) if caminhos else '.'
+    raiz = os.path.abspath(raiz)
+    # Um arquivo já registrado mantém sua chave mesmo com outra raiz
+    chaves_por_origem = {registro['origem']: chave for chave, registro in manifesto.items() if registro.get('origem')}
+    chaves = {}
+    for caminho in caminhos:
+        origem = os.path.abspath(caminho)
+        chave = chaves_por_origem.get(origem, os.path.relpath(origem, raiz).replace(os.sep, '/'))
+        chaves[chave] = caminho
+
+    for chave in sorted(set(manifesto) - set(chaves)):
+        origem = manifesto[chave].get('origem')
+        if not origem:
+            # Registro de versões anteriores, sem o caminho de origem: não
+            # dá para saber se o arquivo sumiu ou só está fora desta raiz
+            print(f"Mantido (registro sem caminho de origem): {chave}")
+            continue
+        if not origem_ausente(origem, raiz):
+            continue
+        print(f"Removendo partições de arquivo ausente: {chave}")
+        for particao in manifesto.pop(chave).get('particoes', []):
+            remover_particao(particao, diretorio)
+
+    pendentes = []
+    for chave, caminho in chaves.items():
+        registro = manifesto.get(chave)
+        assinatura = {**assinatura_arquivo(caminho), 'origem': os.path.abspath(caminho)}
+        # Arquivo só com cabeçalho: nenhuma partição a conferir
+        particoes_ok = registro and (registro.get('particoes') or registro.get('registros') == 0) and all(
+            os.path.exists(os.path.join(diretorio, arquivo))
+            for particao in registro.get('particoes', []) for arquivo in arquivos_da_particao(particao))
+        if not reprocessar and particoes_ok:
+            if all(registro.get(campo) == valor for campo, valor in assinatura.items()):
+                continue
+            conteudo = hash_arquivo(caminho)
+            if registro['sha256'] == conteudo:
+                registro.update(assinatura)
+                continue
+        else:
+            conteudo = hash_arquivo(caminho)
+        pendentes.append((chave, caminho, {**assinatura, 'sha256': conteudo}))
+
+    print(f"{len(chaves) - len(pendentes)} arquivo(s) inalterado(s), "
+          f"{len(pendentes)} para processar")
+
+    if pendentes:
+        with instrumentacao.medir('atualizar_armazenamento', arquivos=len(pendentes),
+                                  inalterados=len(chaves) - len(pendentes)) as medida:
+            inicio = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                resultados = list(executor.map(
+                    ler_e_salvar_particao,
+                    [caminho for _, caminho, _ in pendentes],
+                    [diretorio] * len(pendentes)
+                ))
+            imprimir_resumo([caminho for _, caminho, _ in pendentes],
+                            [resultado[:3] for resultado in resultados],
+                            time.perf_counter() - inicio)
+            medida['registros'] = sum(resultado[0] or 0 for resultado in resultados)
+            medida['falhas'] = sum(resultado[0] is None for resultado in resultados)
+
+        for (chave, _, registro), (registros, _, _, particoes, estacao) in zip(pendentes, resultados):
+            if registros is None:
                 continue
-                
-            df.columns = nomes_colunas
-            
-            # Converter valores numéricos
-            colunas_numericas = df.columns[2:]  # Todas exceto DATA e HORA
-            for col in colunas_numericas:
-                df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '.'), errors='coerce')
-            
-            # Adicionar ao DataFrame unificado
-            df_unificado = pd.concat([df_unificado, df], ignore_index=True)
-            
-            print(f"Arquivo {arquivo} processado com sucesso!")
-            
-        except Exception as e:
-            print(f"Erro ao processar {arquivo}: {str(e)}")
-            print("Colunas encontradas:", len(df.columns) if 'df' in locals() else "N/A")
-    
-    return df_unificado
-
-# Processar os arquivos
-df_final = unificar_todos_dados(arquivos_csv)
-
-# Resultados e salvamento
-if not df_final.empty:
-    print("\nDados unificados com sucesso!")
-    print(f"Total de registros: {len(df_final)}")
-    print("\nEstrutura dos dados:")
-    print(df_final.info())
-    
-    # Salvar arquivo
-    nome_arquivo_saida = 'dados_meteorologicos_completos.csv'
-    df_final.to_csv(nome_arquivo_saida, index=False, sep=';')
-    print(f"\nArquivo salvo como '{nome_arquivo_saida}'")
-else:
-    print("Nenhum dado foi processado. Verifique os erros acima.")
\ No newline at end of file
+            # Partições antigas que o arquivo não gera mais (ex.: layout anterior)
+            anterior = manifesto.get(chave, {})
+            for particao in set(anterior.get('particoes', [anterior.get('particao')])) - set(particoes) - {None}:
+                remover_particao(particao, diretorio)
+            manifesto[chave] = {**registro, 'registros': registros,
+                                'particoes': particoes, 'estacao': estacao}
+
+    salvar_manifesto(manifesto, diretorio)
+    atualizar_estacoes(manifesto, diretorio)
+    return len(pendentes)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Unifica os CSVs do INMET em um armazenamento Parquet")
+    parser.add_argument('--entrada', default=caminho_arquivos, help="Diretório varrido (recursivamente) em busca dos CSVs")
+    parser.add_argument('--padrao', default=padrao_arquivos, help="Padrão glob dos arquivos do INMET")
+    parser.add_argument('--saida', default=DIRETORIO_DADOS, help="Diretório do armazenamento")
+    parser.add_argument('--workers', type=int, default=None, help="Número de processos de leitura")
+    parser.add_argument('--reprocessar', action='store_true', help="Ignora o manifesto e relê todos os arquivos")
+    instrumentacao.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    instrumentacao.configurar_argumentos(args)
+
+    arquivos = descobrir_arquivos(args.entrada, args.padrao)
+    print(f"{len(arquivos)} arquivo(s) encontrado(s) em '{args.entrada}'")
+
+    # Processar apenas os arquivos novos ou alterados
+    atualizar_armazenamento(arquivos, args.saida, args.workers, args.reprocessar, raiz=args.entrada)
+
+    manifesto = carregar_manifesto(args.saida)
+    if manifesto:
+        total = sum(registro['registros'] for registro in manifesto.values())
+        estacoes = {registro['estacao']['CODIGO_WMO'] for registro in manifesto.values()}
+        print(f"\nArmazenamento '{args.saida}' atualizado: {len(estacoes)} estação(ões), "
+              f"{len(manifesto)} arquivo(s), {total} registros")
+    else:
+        print("Nenhum dado foi processado. Verifique os erros acima.")
+        raise SystemExit(1)
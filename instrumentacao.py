@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import traceback
+import contextlib
+from datetime import datetime, timezone
+try:
+    import resource  # só POSIX
+except ImportError:
+    resource = None
+
+# Instrumentação das etapas: tempo, contadores (registros, arquivos...),
+# pico de memória do processo, erros com traceback e, opcionalmente, um
+# perfil (cProfile ou pyinstrument) de cada etapa externa. Cada medição vira
+# uma linha JSON no registro da execução, para comparar estações lentas e
+# regressões entre execuções. Sem registro configurado, nada é gravado.
+#
+# A configuração fica em variáveis de ambiente para que os processos dos
+# pools (index, gráficos, lote, pipeline) gravem no mesmo arquivo.
+
+VARIAVEL_REGISTRO = 'TEMPERATURA_REGISTRO'
+VARIAVEL_PERFIL = 'TEMPERATURA_PERFIL'
+VARIAVEL_DIRETORIO_PERFIS = 'TEMPERATURA_PERFIS'
+PERFILADORES = ('cprofile', 'pyinstrument')
+DIRETORIO_PERFIS = 'perfis'
+
+# PID de cada etapa aberta: só a mais externa de cada processo é
+# perfilada, já que dois perfiladores não podem ficar ativos ao mesmo tempo
+# (com fork, o worker herda a lista do processo principal)
+etapas_abertas = []
+
+def configurar(registro: str = None, perfil: str = None, diretorio_perfis: str = DIRETORIO_PERFIS) -> None:
+    """Ativa o registro em JSON lines (`registro` = arquivo, ou '-' para
+    stderr) e o perfil das etapas, para este processo e os que ele criar"""
+    if perfil not in (None, *PERFILADORES):
+        raise ValueError(f"Erro: Perfilador desconhecido '{perfil}'. Use um de {PERFILADORES}.")
+    if perfil == 'pyinstrument':
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            raise ValueError("Erro: pyinstrument não está instalado (pip install pyinstrument).") from None
+    for variavel in (VARIAVEL_REGISTRO, VARIAVEL_PERFIL, VARIAVEL_DIRETORIO_PERFIS):
+        os.environ.pop(variavel, None)
+    if registro:
+        os.environ[VARIAVEL_REGISTRO] = registro if registro == '-' else os.path.abspath(registro)
+    if perfil:
+        os.environ[VARIAVEL_PERFIL] = perfil
+        os.environ[VARIAVEL_DIRETORIO_PERFIS] = os.path.abspath(diretorio_perfis)
+
+def adicionar_argumentos(parser) -> None:
+    """Opções --registro, --perfil e --perfis, comuns aos scripts"""
+    parser.add_argument('--registro', help="Grava tempos, contagens, memória e erros de cada etapa em JSON lines "
+                                           "neste arquivo ('-' para stderr)")
+    parser.add_argument('--perfil', choices=PERFILADORES, help="Perfila cada etapa externa com cProfile ou pyinstrument")
+    parser.add_argument('--perfis', default=DIRETORIO_PERFIS, help="Diretório dos arquivos de perfil")
+
+def configurar_argumentos(args) -> None:
+    configurar(args.registro, args.perfil, args.perfis)
+
+def memoria_pico_mb():
+    """Maior RSS atingido por este processo até agora (MB).
+
+    Usa resource no Linux/macOS e, no Windows, o pico do working set
+    informado pelo psutil, se estiver instalado; sem nenhum dos dois, None.
+    """
+    if resource is not None:
+        divisor = 2**20 if sys.platform == 'darwin' else 2**10  # bytes no macOS, KB no Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+    try:
+        import psutil
+    except ImportError:
+        return None
+    pico = getattr(psutil.Process().memory_info(), 'peak_wset', None)
+    return pico / 2**20 if pico is not None else None
+
+def registrar(evento: str, **campos) -> None:
+    """Acrescenta um evento ao registro da execução (se configurado)"""
+    destino = os.environ.get(VARIAVEL_REGISTRO)
+    if not destino:
+        return
+    linha = json.dumps({'instante': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+                        'evento': evento, 'pid': os.getpid(), **campos},
+                       ensure_ascii=False, default=str) + '\n'
+    if destino == '-':
+        sys.stderr.write(linha)
+        sys.stderr.flush()
+        return
+    # Uma única escrita em modo append por linha: processos do pool podem
+    # gravar no mesmo arquivo sem misturar linhas
+    with open(destino, 'a', encoding='utf-8') as f:
+        f.write(linha)
+
+def iniciar_perfil():
+    perfilador = os.environ.get(VARIAVEL_PERFIL)
+    if perfilador == 'cprofile':
+        perfil = cProfile.Profile()
+        perfil.enable()
+        return perfil
+    if perfilador == 'pyinstrument':
+        from pyinstrument import Profiler
+        perfil = Profiler()
+        perfil.start()
+        return perfil
+    return None
+
+def salvar_perfil(perfil, nome: str) -> str:
+    """Grava o perfil (.prof para cProfile, .html para pyinstrument) e retorna o caminho"""
+    diretorio = os.environ.get(VARIAVEL_DIRETORIO_PERFIS, DIRETORIO_PERFIS)
+    os.makedirs(diretorio, exist_ok=True)
+    base = os.path.join(diretorio, f"{nome}_{datetime.now():%Y%m%d-%H%M%S-%f}_{os.getpid()}")
+    if isinstance(perfil, cProfile.Profile):
+        perfil.disable()
+        perfil.dump_stats(base + '.prof')
+        return base + '.prof'
+    perfil.stop()
+    with open(base + '.html', 'w', encoding='utf-8') as f:
+        f.write(perfil.output_html())
+    return base + '.html'
+
+@contextlib.contextmanager
+def medir(nome: str, **campos):
+    """Mede uma etapa e registra um evento 'etapa' ao final.
+
+    Devolve um dicionário de contadores que a etapa preenche (ex.:
+    medida['registros'] = len(df)); ao sair ele também recebe 'segundos'.
+    `campos` identificam a etapa no registro (arquivo, estação...). Uma
+    exceção é registrada com traceback e propagada normalmente.
+    """
+    medida = {}
+    perfil = iniciar_perfil() if os.getpid() not in etapas_abertas else None
+    etapas_abertas.append(os.getpid())
+    memoria_inicial = memoria_pico_mb()
+    inicio = time.perf_counter()
+    resultado = {'status': 'ok'}
+    try:
+        yield medida
+    except BaseException as e:
+        resultado = {'status': 'erro', 'erro': f"{type(e).__name__}: {str(e)}", 'traceback': traceback.format_exc()}
+        raise
+    finally:
+        segundos = time.perf_counter() - inicio
+        etapas_abertas.pop()
+        if perfil is not None:
+            resultado['perfil'] = salvar_perfil(perfil, nome)
+        memoria = memoria_pico_mb()
+        acrescimo = None if memoria is None else round(memoria - memoria_inicial, 1)
+        registrar('etapa', **{'etapa': nome, **campos, **medida, 'segundos': round(segundos, 6),
+                              'memoria_pico_mb': None if memoria is None else round(memoria, 1),
+                              'memoria_acrescimo_mb': acrescimo, **resultado})
+        medida['segundos'] = segundos
@@ -0,0 +1,410 @@
+import numpy as np
+import pandas as pd
+from armazenamento import DIRETORIO_DADOS, COLUNA_DATA_HORA, carregar_agregado, carregar_estacoes
+from gerar_imagens import load_daily_data, load_hourly_chart_data, calculate_annual_stats
+from anomalias import (
+    PERIODO_BASE, PREFIXO_ANOMALIA, CRITERIOS_EPISODIOS, carregar_horario, carregar_bases, anomalias_horarias, detectar_todos_episodios
+)
+
+# Modelo de dados do relatório: período, estatísticas anuais, tendências e
+# contagens de eventos extremos calculados a partir dos agregados diários,
+# junto com os textos de achados gerados a partir desses números. O
+# gerar_relatorio.py só formata o que está aqui, sem texto fixo por estação.
+
+# Anos com menos dias válidos que isso ficam fora das tendências e das
+# comparações (ex.: o ano corrente, ainda incompleto)
+DIAS_ANO_COMPLETO = 330
+# Eventos extremos: dias acima do percentil 90 das máximas, noites abaixo do
+# percentil 10 das mínimas (percentis do período todo) e dias de chuva forte
+PERCENTIL_DIAS_QUENTES = 0.9
+PERCENTIL_NOITES_FRIAS = 0.1
+LIMIAR_CHUVA_FORTE = 50.0
+# Tendências menores que isso (°C por década) são descritas como estabilidade
+LIMIAR_TENDENCIA = 0.1
+# Variação relativa mínima entre as duas metades do período para descrever
+# a frequência de eventos como maior ou menor
+LIMIAR_FREQUENCIA = 0.15
+# Tendências do vento menores que isso (m/s por década) são descritas como estabilidade
+LIMIAR_TENDENCIA_VENTO = 0.1
+# Correlações com |r| abaixo do primeiro valor são fracas; abaixo do segundo, moderadas
+LIMIARES_CORRELACAO = (0.3, 0.6)
+
+# Medidas descritas na seção de coleta, com a fração de horas com leitura válida
+MEDIDAS_DESCRITAS = {
+    'TEMPERATURA_AR': 'Temperatura do ar',
+    'PRECIPITACAO_TOTAL': 'Chuva',
+    'PRESSAO_ESTACAO': 'Pressão atmosférica',
+    'UMIDADE_RELATIVA': 'Umidade relativa',
+    'VENTO_VELOCIDADE': 'Velocidade do vento',
+    'RADIACAO_GLOBAL': 'Radiação global',
+}
+# Meses do calendário com menos horas válidas que essa fração das do mês mais
+# bem coberto ficam fora das médias por mês (ex.: um único dia de março)
+FRACAO_MES_MINIMA = 0.5
+NOMES_MESES = ['janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho', 'julho', 'agosto',
+               'setembro', 'outubro', 'novembro', 'dezembro']
+
+def formatar_numero(valor: float, casas: int = 1, sinal: bool = False) -> str:
+    """Número com vírgula decimal (ex.: +0,3)"""
+    formato = f"{{:{'+' if sinal else ''}.{casas}f}}"
+    return formato.format(valor).replace('.', ',')
+
+def descrever_estacao(diretorio: str = DIRETORIO_DADOS, estacao: str = None) -> dict:
+    """Metadados da estação pedida (ou da única estação do armazenamento)"""
+    estacoes = carregar_estacoes(diretorio)
+    if estacao is None:
+        if len(estacoes) != 1:
+            raise ValueError(f"Erro: O armazenamento tem {len(estacoes)} estações; informe qual usar.")
+        linha = estacoes.iloc[0]
+    else:
+        selecionadas = estacoes[estacoes['CODIGO_WMO'] == str(estacao)]
+        if selecionadas.empty:
+            raise ValueError(f"Erro: Estação '{estacao}' não encontrada no armazenamento.")
+        linha = selecionadas.iloc[0]
+    return {
+        'codigo': linha['CODIGO_WMO'],
+        'nome': str(linha['NOME']).title(),
+        'uf': linha['UF'],
+        'latitude': linha['LATITUDE'],
+        'longitude': linha['LONGITUDE'],
+        'altitude': linha['ALTITUDE'],
+    }
+
+def carregar_diario(diretorio: str, estacao: str, anos=None) -> pd.DataFrame:
+    """Temperaturas diárias (como em gerar_imagens) com a chuva total do dia"""
+    diario = load_daily_data(diretorio, [estacao], anos)
+    chuva = carregar_agregado('diario', diretorio, colunas=['DATA', 'PRECIPITACAO_TOTAL_SOMA'],
+                              estacoes=[estacao], anos=anos)
+    chuva = chuva.rename(columns={'PRECIPITACAO_TOTAL_SOMA': 'PRECIPITACAO'})
+    return diario.merge(chuva, on='DATA', how='left')
+
+def carregar_mensal(diretorio: str, estacao: str, anos=None) -> pd.DataFrame:
+    """Média e horas válidas de cada medida de MEDIDAS_DESCRITAS, por mês"""
+    colunas = ['DATA', 'ANO'] + [f"{medida}_{sufixo}" for medida in MEDIDAS_DESCRITAS for sufixo in ('MEDIA', 'HORAS')]
+    return carregar_agregado('mensal', diretorio, colunas=colunas, estacoes=[estacao], anos=anos)
+
+def disponibilidade(mensal: pd.DataFrame, inicio: pd.Timestamp, fim: pd.Timestamp) -> dict:
+    """Fração das horas do período com leitura válida, por medida"""
+    horas = ((fim - inicio).days + 1) * 24
+    return {medida: float(mensal[f"{medida}_HORAS"].sum()) / horas for medida in MEDIDAS_DESCRITAS}
+
+def media_por_mes(mensal: pd.DataFrame, medida: str) -> pd.Series:
+    """Média de cada mês do calendário (1-12), ponderada pelas horas válidas.
+    Meses pouco cobertos (ver FRACAO_MES_MINIMA) ficam de fora."""
+    horas = mensal[f"{medida}_HORAS"].astype(float)
+    mes = mensal['DATA'].dt.month.rename('MES')
+    soma = (mensal[f"{medida}_MEDIA"] * horas).groupby(mes).sum(min_count=1)
+    horas_mes = horas.groupby(mes).sum()
+    horas_mes = horas_mes.where(horas_mes >= FRACAO_MES_MINIMA * horas_mes.max())
+    return (soma / horas_mes.replace(0, np.nan)).dropna()
+
+def media_anual(mensal: pd.DataFrame, medida: str, anos: list) -> pd.Series:
+    """Média de cada ano da lista, ponderada pelas horas válidas"""
+    horas = mensal[f"{medida}_HORAS"].astype(float)
+    ano = mensal['ANO'].astype(int)
+    soma = (mensal[f"{medida}_MEDIA"] * horas).groupby(ano).sum(min_count=1)
+    return (soma / horas.groupby(ano).sum().replace(0, np.nan)).reindex(anos)
+
+def correlacionar_temperatura_umidade(diretorio: str, estacao: str, anos=None) -> dict:
+    """Correlação de Pearson entre temperatura e umidade relativa horárias
+    (os mesmos pares do gráfico temp_vs_umidade) e a inclinação da reta de
+    mínimos quadrados, em % de umidade por °C. None com menos de 3 pares."""
+    horario = load_hourly_chart_data(diretorio, [estacao], anos)
+    pares = horario[['TEMPERATURA_AR', 'UMIDADE_RELATIVA']].dropna().to_numpy(dtype=np.float64)
+    if len(pares) < 3 or np.ptp(pares[:, 0]) == 0 or np.ptp(pares[:, 1]) == 0:
+        return None
+    temperatura, umidade = pares[:, 0], pares[:, 1]
+    return {
+        'r': float(np.corrcoef(temperatura, umidade)[0, 1]),
+        'inclinacao': float(np.polyfit(temperatura, umidade, 1)[0]),
+        'pares': len(pares),
+    }
+
+def anos_completos(diario: pd.DataFrame) -> list:
+    """Anos com pelo menos DIAS_ANO_COMPLETO dias válidos"""
+    dias = diario.groupby('ANO').size()
+    return sorted(dias.index[dias >= DIAS_ANO_COMPLETO].astype(int))
+
+def tendencia_por_decada(anos, valores) -> float:
+    """Inclinação da reta de mínimos quadrados, em unidades por década"""
+    anos, valores = np.asarray(anos, dtype=float), np.asarray(valores, dtype=float)
+    validos = ~np.isnan(valores)
+    if validos.sum() < 3:
+        return np.nan
+    return float(np.polyfit(anos[validos], valores[validos], 1)[0] * 10)
+
+def contar_extremos(diario: pd.DataFrame) -> tuple:
+    """Contagem anual de dias quentes, noites frias e dias de chuva forte.
+
+    Retorna (DataFrame por ano, limiares usados).
+    """
+    limiares = {
+        'DIAS_QUENTES': float(diario['TEMPERATURA_MAX'].quantile(PERCENTIL_DIAS_QUENTES)),
+        'NOITES_FRIAS': float(diario['TEMPERATURA_MIN'].quantile(PERCENTIL_NOITES_FRIAS)),
+        'DIAS_CHUVA_FORTE': LIMIAR_CHUVA_FORTE,
+    }
+    eventos = pd.DataFrame({
+        'ANO': diario['ANO'],
+        'DIAS_QUENTES': diario['TEMPERATURA_MAX'] > limiares['DIAS_QUENTES'],
+        'NOITES_FRIAS': diario['TEMPERATURA_MIN'] < limiares['NOITES_FRIAS'],
+        'DIAS_CHUVA_FORTE': diario['PRECIPITACAO'] >= limiares['DIAS_CHUVA_FORTE'],
+    })
+    return eventos.groupby('ANO').sum().astype(int), limiares
+
+def comparar_metades(contagens: pd.Series, anos: list) -> dict:
+    """Média anual de eventos na primeira e na segunda metade dos anos completos"""
+    metade = len(anos) // 2
+    primeira, segunda = anos[:metade], anos[len(anos) - metade:]
+    return {
+        'primeira': (primeira[0], primeira[-1], float(contagens.reindex(primeira).mean())),
+        'segunda': (segunda[0], segunda[-1], float(contagens.reindex(segunda).mean())),
+    }
+
+def resumir_anomalias(diretorio: str, estacao: str, anos=None, periodo: tuple = PERIODO_BASE) -> dict:
+    """Anomalia anual média da temperatura em relação ao período base e
+    contagem anual de episódios (ondas de calor/frio e chuva forte).
+
+    Retorna None se a estação não tiver dados no período base.
+    """
+    # Só as medidas usadas nos critérios de episódio
+    medidas = {criterio.coluna[len(PREFIXO_ANOMALIA):] if criterio.coluna.startswith(PREFIXO_ANOMALIA)
+               else criterio.coluna for criterio in CRITERIOS_EPISODIOS.values()}
+    horario = carregar_horario(diretorio, [estacao], anos, medidas=sorted(medidas))
+    try:
+        bases = carregar_bases(diretorio, [estacao], periodo)
+    except ValueError:
+        return None
+    horarias = anomalias_horarias(horario, bases)
+    episodios = detectar_todos_episodios(horarias)
+
+    ano = horarias[COLUNA_DATA_HORA].dt.year.rename('ANO')
+    contagens = (episodios.groupby([episodios['INICIO'].dt.year.rename('ANO'), 'TIPO']).size()
+                 .unstack('TIPO').reindex(index=sorted(ano.unique()), columns=list(CRITERIOS_EPISODIOS))
+                 .fillna(0).astype(int))
+    contagens['ANOMALIA_TEMPERATURA'] = horarias['ANOMALIA_TEMPERATURA_AR'].groupby(ano).mean()
+    return {'periodo_base': periodo, 'anual': contagens, 'episodios': episodios}
+
+def descrever_tendencia(valor: float) -> str:
+    if np.isnan(valor):
+        return "sem dados suficientes para estimar tendência"
+    if abs(valor) < LIMIAR_TENDENCIA:
+        return f"estabilidade ({formatar_numero(valor, 2, sinal=True)} °C por década)"
+    direcao = "elevação" if valor > 0 else "queda"
+    return f"tendência de {direcao} de {formatar_numero(valor, 2, sinal=True)} °C por década"
+
+def descrever_frequencia(nome: str, comparacao: dict) -> str:
+    (a0, a1, antes), (b0, b1, depois) = comparacao['primeira'], comparacao['segunda']
+    if antes == 0 and depois == 0:
+        return f"Não houve {nome} nos anos completos do período."
+    variacao = (depois - antes) / antes if antes else np.inf
+    recente = f"{b0}-{b1} ({formatar_numero(depois)} por ano)"
+    anterior = f"{a0}-{a1} ({formatar_numero(antes)} por ano)"
+    if abs(variacao) < LIMIAR_FREQUENCIA:
+        return f"A frequência de {nome} ficou semelhante entre {anterior} e {recente}."
+    relacao = "maior" if variacao > 0 else "menor"
+    return f"A frequência de {nome} foi {relacao} em {recente} do que em {anterior}."
+
+def gerar_achados(modelo: dict) -> dict:
+    """Textos dos resultados, montados a partir dos números do modelo"""
+    tendencias, extremos, limiares = modelo['tendencias'], modelo['extremos'], modelo['limiares']
+    anos = modelo['anos_completos']
+    intervalo = f"{anos[0]}-{anos[-1]}" if anos else "o período"
+    stats = modelo['estatisticas'].set_index('Ano').reindex(anos)
+    mediana = stats['Mediana Temperatura (°C)'].dropna()
+
+    temperatura = (f"Nos anos completos ({intervalo}), as temperaturas máximas diárias apresentaram "
+                   f"{descrever_tendencia(tendencias['TEMPERATURA_MAX'])}, as mínimas "
+                   f"{descrever_tendencia(tendencias['TEMPERATURA_MIN'])} e a média diária "
+                   f"{descrever_tendencia(tendencias['MEDIA_DIARIA'])}.")
+    if not mediana.empty:
+        temperatura += (f" O ano com maior mediana foi {mediana.idxmax()} ({formatar_numero(mediana.max())} °C) "
+                        f"e o de menor, {mediana.idxmin()} ({formatar_numero(mediana.min())} °C).")
+
+    chuva_forte = int(extremos['DIAS_CHUVA_FORTE'].sum())
+    chuva = (f"Foram registrados {chuva_forte} dia(s) com chuva igual ou superior a "
+             f"{formatar_numero(limiares['DIAS_CHUVA_FORTE'], 0)} mm no período. ")
+    if len(anos) >= 2:
+        chuva += descrever_frequencia("dias de chuva forte", comparar_metades(extremos['DIAS_CHUVA_FORTE'], anos))
+        chuva += (f" A chuva anual variou {formatar_numero(tendencias['PRECIPITACAO'], 0, sinal=True)} mm "
+                  f"por década." if not np.isnan(tendencias['PRECIPITACAO']) else "")
+
+    extremos_temperatura = (
+        f"Dias quentes (máxima acima de {formatar_numero(limiares['DIAS_QUENTES'])} °C, percentil 90) somaram "
+        f"{int(extremos['DIAS_QUENTES'].sum())} e noites frias (mínima abaixo de "
+        f"{formatar_numero(limiares['NOITES_FRIAS'])} °C, percentil 10), {int(extremos['NOITES_FRIAS'].sum())}.")
+    if len(anos) >= 2:
+        extremos_temperatura += " " + descrever_frequencia("dias quentes", comparar_metades(extremos['DIAS_QUENTES'], anos))
+        extremos_temperatura += " " + descrever_frequencia("noites frias", comparar_metades(extremos['NOITES_FRIAS'], anos))
+
+    return {'temperatura': temperatura, 'chuva': chuva.strip(), 'extremos': extremos_temperatura,
+            'temperatura_umidade': descrever_temperatura_umidade(modelo['temperatura_umidade']),
+            'radiacao_vento': descrever_radiacao_vento(modelo['radiacao'], modelo['vento'], anos),
+            'anomalias': descrever_anomalias(modelo['anomalias'], anos),
+            'analise': descrever_analise(modelo)}
+
+def descrever_temperatura_umidade(correlacao: dict) -> str:
+    """Texto da relação entre temperatura e umidade relativa horárias"""
+    if correlacao is None:
+        return "Não há pares suficientes de temperatura e umidade medidas na mesma hora para estimar a relação."
+    r = correlacao['r']
+    forca = ("fraca" if abs(r) < LIMIARES_CORRELACAO[0]
+             else "moderada" if abs(r) < LIMIARES_CORRELACAO[1] else "forte")
+    texto = (f"Nas {correlacao['pares']} horas com as duas medidas, a correlação entre temperatura do ar e "
+             f"umidade relativa foi {forca} (r = {formatar_numero(r, 2, sinal=True)}).")
+    if abs(r) >= LIMIARES_CORRELACAO[0]:
+        sentido = "cai" if r < 0 else "sobe"
+        texto += (f" Em média, a umidade relativa {sentido} {formatar_numero(abs(correlacao['inclinacao']))} "
+                  f"ponto(s) percentual(is) a cada 1 °C a mais de temperatura.")
+    return texto
+
+def descrever_radiacao_vento(radiacao: pd.Series, vento: dict, anos: list) -> str:
+    """Texto da sazonalidade da radiação solar e do comportamento do vento"""
+    partes = []
+    if len(radiacao) >= 2:
+        partes.append(
+            f"A radiação global média nas horas com sol foi maior em {NOMES_MESES[radiacao.idxmax() - 1]} "
+            f"({formatar_numero(radiacao.max(), 0)} kJ/m²) e menor em {NOMES_MESES[radiacao.idxmin() - 1]} "
+            f"({formatar_numero(radiacao.min(), 0)} kJ/m²), {formatar_numero(radiacao.max() / radiacao.min())} "
+            f"vezes maior no mês de pico.")
+    else:
+        partes.append("Não há meses suficientes com radiação global medida para descrever a sazonalidade.")
+
+    mensal, tendencia = vento['mensal'], vento['tendencia']
+    if len(mensal) >= 2:
+        partes.append(
+            f"A velocidade média do vento variou de {formatar_numero(mensal.min())} m/s "
+            f"({NOMES_MESES[mensal.idxmin() - 1]}) a {formatar_numero(mensal.max())} m/s "
+            f"({NOMES_MESES[mensal.idxmax() - 1]}) ao longo do ano.")
+    if np.isnan(tendencia):
+        partes.append("Não há anos completos suficientes para estimar a tendência do vento.")
+    elif abs(tendencia) < LIMIAR_TENDENCIA_VENTO:
+        partes.append(f"Entre os anos completos ({anos[0]}-{anos[-1]}), a velocidade média anual ficou estável "
+                      f"({formatar_numero(tendencia, 2, sinal=True)} m/s por década).")
+    else:
+        direcao = "aumento" if tendencia > 0 else "redução"
+        partes.append(f"Entre os anos completos ({anos[0]}-{anos[-1]}), a velocidade média anual teve "
+                      f"{direcao} de {formatar_numero(tendencia, 2, sinal=True)} m/s por década.")
+    return " ".join(partes)
+
+def descrever_analise(modelo: dict) -> str:
+    """Síntese dos resultados: aquecimento, extremos e relação temperatura x umidade"""
+    tendencia = modelo['tendencias']['MEDIA_DIARIA']
+    anos = modelo['anos_completos']
+    nome = modelo['estacao']['nome']
+    if np.isnan(tendencia):
+        texto = (f"O período disponível para {nome} não tem anos completos suficientes para separar "
+                 f"tendências de longo prazo da variação entre anos.")
+    elif abs(tendencia) < LIMIAR_TENDENCIA:
+        texto = (f"Os anos completos de {nome} não mostram mudança relevante da temperatura média "
+                 f"({descrever_tendencia(tendencia)}).")
+    else:
+        sentido = "aquecimento" if tendencia > 0 else "resfriamento"
+        texto = f"Os anos completos de {nome} indicam {sentido} gradual: {descrever_tendencia(tendencia)} na média diária."
+
+    if len(anos) >= 2:
+        mudancas = []
+        for coluna, nome_evento in (('DIAS_QUENTES', 'dias quentes'), ('DIAS_CHUVA_FORTE', 'dias de chuva forte')):
+            comparacao = comparar_metades(modelo['extremos'][coluna], anos)
+            antes, depois = comparacao['primeira'][2], comparacao['segunda'][2]
+            if antes and abs(depois - antes) / antes >= LIMIAR_FREQUENCIA:
+                mudancas.append(f"{nome_evento} ficaram {'mais' if depois > antes else 'menos'} frequentes")
+            elif not antes and depois:
+                mudancas.append(f"{nome_evento} passaram a ocorrer")
+        if mudancas:
+            texto += " Na segunda metade do período, " + " e ".join(mudancas) + "."
+        else:
+            texto += " A frequência de dias quentes e de chuva forte não mudou de forma relevante entre as metades do período."
+
+    correlacao = modelo['temperatura_umidade']
+    if correlacao is not None and correlacao['r'] <= -LIMIARES_CORRELACAO[0]:
+        texto += (" Como a umidade relativa cai nas horas mais quentes, a combinação das duas medidas ajuda a "
+                  "entender a sensação térmica, principalmente no verão.")
+    return texto
+
+def descrever_anomalias(anomalias: dict, anos: list) -> str:
+    """Texto das anomalias anuais e dos episódios em relação ao período base"""
+    if anomalias is None:
+        return "Não há dados no período base da climatologia para calcular anomalias nesta estação."
+    inicio, fim = anomalias['periodo_base']
+    anual = anomalias['anual']
+    criterios = CRITERIOS_EPISODIOS
+    texto = (f"As anomalias são calculadas em relação à média de {inicio}-{fim} para cada hora do ano. "
+             f"Ondas de calor (frio) são períodos em que a temperatura média de "
+             f"{criterios['ONDA_DE_CALOR'].janela_horas // 24} dias ficou ao menos "
+             f"{formatar_numero(criterios['ONDA_DE_CALOR'].limiar)} °C acima (abaixo) dessa média; "
+             f"episódios de chuva forte são os com {formatar_numero(criterios['CHUVA_FORTE'].limiar, 0)} mm ou "
+             f"mais em {criterios['CHUVA_FORTE'].janela_horas} horas. Foram identificadas "
+             f"{int(anual['ONDA_DE_CALOR'].sum())} onda(s) de calor, {int(anual['ONDA_DE_FRIO'].sum())} de frio e "
+             f"{int(anual['CHUVA_FORTE'].sum())} episódio(s) de chuva forte.")
+    completos = anual['ANOMALIA_TEMPERATURA'].reindex(anos).dropna()
+    if not completos.empty:
+        texto += (f" Entre os anos completos, o mais quente em relação à base foi {completos.idxmax()} "
+                  f"({formatar_numero(completos.max(), sinal=True)} °C) e o mais frio, {completos.idxmin()} "
+                  f"({formatar_numero(completos.min(), sinal=True)} °C).")
+    if len(anos) >= 2:
+        texto += " " + descrever_frequencia("ondas de calor", comparar_metades(anual['ONDA_DE_CALOR'], anos))
+    return texto
+
+def montar_modelo(diretorio: str = DIRETORIO_DADOS, estacao: str = None, anos=None) -> dict:
+    """Calcula tudo o que o relatório de uma estação apresenta.
+
+    Retorna um dicionário com a estação, o período coberto, a tabela de
+    estatísticas anuais (calculate_annual_stats), as tendências por década
+    (anos completos), as contagens anuais de eventos extremos, os limiares
+    usados, a fração de horas válidas por medida, a correlação entre
+    temperatura e umidade, as médias por mês da radiação e do vento, as
+    anomalias e episódios em relação ao período base (resumir_anomalias) e
+    os textos de achados.
+    """
+    info = descrever_estacao(diretorio, estacao)
+    diario = carregar_diario(diretorio, info['codigo'], anos)
+    if diario.empty:
+        raise ValueError(f"Erro: Sem dados diários para a estação {info['codigo']} no período pedido.")
+
+    completos = anos_completos(diario)
+    anual = diario[diario['ANO'].isin(completos)].groupby('ANO').agg(
+        TEMPERATURA_MAX=('TEMPERATURA_MAX', 'mean'),
+        TEMPERATURA_MIN=('TEMPERATURA_MIN', 'mean'),
+        MEDIA_DIARIA=('MEDIA_DIARIA', 'mean'),
+        PRECIPITACAO=('PRECIPITACAO', 'sum'),
+    )
+    extremos, limiares = contar_extremos(diario)
+    mensal = carregar_mensal(diretorio, info['codigo'], anos)
+    inicio, fim = diario['DATA'].min(), diario['DATA'].max()
+
+    modelo = {
+        'estacao': info,
+        'periodo': {
+            'inicio': inicio,
+            'fim': fim,
+            'ano_inicial': int(diario['ANO'].min()),
+            'ano_final': int(diario['ANO'].max()),
+        },
+        'anos_completos': completos,
+        'estatisticas': calculate_annual_stats(diario),
+        'tendencias': {col: tendencia_por_decada(anual.index, anual[col]) for col in anual.columns},
+        'extremos': extremos,
+        'limiares': limiares,
+        'disponibilidade': disponibilidade(mensal, inicio, fim),
+        'temperatura_umidade': correlacionar_temperatura_umidade(diretorio, info['codigo'], anos),
+        'radiacao': media_por_mes(mensal, 'RADIACAO_GLOBAL'),
+        'vento': {
+            'mensal': media_por_mes(mensal, 'VENTO_VELOCIDADE'),
+            'tendencia': tendencia_por_decada(completos, media_anual(mensal, 'VENTO_VELOCIDADE', completos)),
+        },
+        'anomalias': resumir_anomalias(diretorio, info['codigo'], anos),
+    }
+    modelo['achados'] = gerar_achados(modelo)
+    return modelo
+
+def descrever_periodo(modelo: dict) -> str:
+    """Período no formato usado nos títulos (ex.: 2010-2025)"""
+    periodo = modelo['periodo']
+    if periodo['ano_inicial'] == periodo['ano_final']:
+        return str(periodo['ano_inicial'])
+    return f"{periodo['ano_inicial']}-{periodo['ano_final']}"
+
+def descrever_local(modelo: dict) -> str:
+    """Nome da estação no formato usado nos títulos (ex.: Florianopolis/SC (A806))"""
+    estacao = modelo['estacao']
+    return f"{estacao['nome']}/{estacao['uf']} ({estacao['codigo']})"
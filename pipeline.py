@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import time
+import pickle
+import hashlib
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from armazenamento import DIRETORIO_DADOS, ARQUIVO_MANIFESTO, ARQUIVO_ESTACOES, assinatura_arquivo, hash_arquivo
+import index
+import instrumentacao
+from gerar_relatorio import REPORT_DPI
+
+# Orquestrador do fluxo completo como um grafo de etapas:
+#
+#   ingestao (CSVs -> partições + QC + agregados)
+#       ├── estatisticas (modelo do relatório: tabelas, tendências, extremos)
+#       └── graficos (imagens)
+#                 └── relatorio (PDF, depende das duas anteriores)
+#
+# Cada etapa declara suas entradas e saídas; a impressão digital (hash) de
+# ambas fica em <dados>/pipeline.json após cada execução bem-sucedida. Uma
+# etapa só roda se as entradas mudaram ou se as saídas sumiram/foram
+# alteradas, e etapas independentes (estatisticas e graficos) rodam em
+# paralelo no pool de processos.
+
+ARQUIVO_ESTADO = 'pipeline.json'
+ARQUIVO_MODELO = 'modelo_relatorio.pkl'
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# `entradas` e `saidas` recebem a configuração e devolvem caminhos; com
+# `por_conteudo=False` as entradas são comparadas só por tamanho e mtime
+# (usado para os CSVs, que a própria ingestão confere por hash se preciso)
+Etapa = namedtuple('Etapa', ['nome', 'dependencias', 'entradas', 'saidas', 'executar', 'por_conteudo'])
+
+def codigo(*modulos):
+    """Arquivos-fonte do projeto dos quais uma etapa depende"""
+    return [os.path.join(RAIZ, f"{modulo}.py") for modulo in modulos]
+
+def arquivos_em(diretorio: str, extensao: str) -> list:
+    if not os.path.isdir(diretorio):
+        return []
+    return sorted(os.path.join(diretorio, nome) for nome in os.listdir(diretorio) if nome.endswith(extensao))
+
+def conteudo_manifesto(caminho: str) -> str:
+    """Hash do que o manifesto diz sobre os dados: hash e partições de cada
+    arquivo de origem. Tamanho e mtime ficam de fora, para que um `touch`
+    em um CSV sem mudança de conteúdo não invalide as etapas seguintes."""
+    with open(caminho, encoding='utf-8') as f:
+        manifesto = json.load(f)
+    resumo = {chave: {'sha256': registro.get('sha256'), 'particoes': sorted(registro.get('particoes', []))}
+              for chave, registro in manifesto.items()}
+    return hashlib.sha256(json.dumps(resumo, sort_keys=True).encode()).hexdigest()
+
+def impressao_digital(caminhos, por_conteudo: bool = True) -> str:
+    """Hash da lista de arquivos: conteúdo (ou tamanho + mtime) de cada um.
+
+    Arquivos ausentes entram como ausentes, de modo que sumir com uma
+    saída também torna a etapa desatualizada. O manifesto do armazenamento
+    entra pelo conteúdo que descreve (ver conteudo_manifesto).
+    """
+    h = hashlib.sha256()
+    for caminho in caminhos:
+        h.update(os.path.relpath(caminho, RAIZ).encode())
+        if not os.path.exists(caminho):
+            h.update(b'ausente')
+        elif por_conteudo and os.path.basename(caminho) == ARQUIVO_MANIFESTO:
+            h.update(conteudo_manifesto(caminho).encode())
+        elif por_conteudo:
+            h.update(hash_arquivo(caminho).encode())
+        else:
+            h.update(json.dumps(assinatura_arquivo(caminho), sort_keys=True).encode())
+    return h.hexdigest()
+
+def carregar_estado(diretorio: str) -> dict:
+    caminho = os.path.join(diretorio, ARQUIVO_ESTADO)
+    if not os.path.exists(caminho):
+        return {}
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def salvar_estado(estado: dict, diretorio: str) -> None:
+    """Grava o estado do pipeline de forma atômica"""
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, ARQUIVO_ESTADO)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
+
+# Execução de cada etapa (funções de módulo, para rodar no pool de processos)
+
+def executar_ingestao(config: dict) -> None:
+    arquivos = index.descobrir_arquivos(config['entrada'], config['padrao'])
+    index.atualizar_armazenamento(arquivos, config['dados'], raiz=config['entrada'])
+
+def executar_estatisticas(config: dict) -> None:
+    from modelo_relatorio import montar_modelo
+    modelo = montar_modelo(config['dados'], config['estacao'])
+    caminho = os.path.join(config['dados'], ARQUIVO_MODELO)
+    with open(caminho + '.tmp', 'wb') as f:
+        pickle.dump(modelo, f)
+    os.replace(caminho + '.tmp', caminho)
+
+def executar_graficos(config: dict) -> None:
+    from gerar_imagens import init_render_worker, generate_charts, select_station
+    init_render_worker()
+    generate_charts(config['imagens'], config['dados'], stations=[select_station(config['dados'], config['estacao'])])
+
+def executar_relatorio(config: dict) -> None:
+    from gerar_relatorio import generate_report
+    with open(os.path.join(config['dados'], ARQUIVO_MODELO), 'rb') as f:
+        modelo = pickle.load(f)
+    if generate_report(config['imagens'], config['relatorio'], config['autor'], config['dpi'], model=modelo) is None:
+        raise RuntimeError("Falha ao montar o PDF (ver mensagens acima)")
+
+def executar_medida(nome: str, executar, config: dict) -> None:
+    """Executa uma etapa no pool registrando tempo, memória e erros"""
+    with instrumentacao.medir(nome):
+        executar(config)
+
+def saidas_armazenamento(config: dict) -> list:
+    return [os.path.join(config['dados'], ARQUIVO_MANIFESTO), os.path.join(config['dados'], ARQUIVO_ESTACOES)]
+
+ETAPAS = [
+    Etapa('ingestao', [],
+          lambda c: index.descobrir_arquivos(c['entrada'], c['padrao'])
+                    + codigo('index', 'armazenamento', 'agregacao', 'qualidade'),
+          saidas_armazenamento,
+          executar_ingestao, False),
+    Etapa('estatisticas', ['ingestao'],
+          lambda c: saidas_armazenamento(c) + codigo('modelo_relatorio', 'gerar_imagens', 'agregacao',
+                                                     'anomalias', 'qualidade'),
+          lambda c: [os.path.join(c['dados'], ARQUIVO_MODELO)],
+          executar_estatisticas, True),
+    Etapa('graficos', ['ingestao'],
+          lambda c: saidas_armazenamento(c) + codigo('gerar_imagens', 'cache_figuras', 'qualidade', 'agregacao'),
+          lambda c: arquivos_em(c['imagens'], '.png'),
+          executar_graficos, True),
+    Etapa('relatorio', ['estatisticas', 'graficos'],
+          lambda c: arquivos_em(c['imagens'], '.png') + [os.path.join(c['dados'], ARQUIVO_MODELO)]
+                    + codigo('gerar_relatorio'),
+          lambda c: [c['relatorio']],
+          executar_relatorio, True),
+]
+
+def parametros_etapa(etapa: Etapa, config: dict) -> dict:
+    """Configuração que, se mudar, também invalida a etapa (ex.: outra estação)"""
+    chaves = {'ingestao': ['entrada', 'padrao'], 'estatisticas': ['estacao'],
+              'graficos': ['estacao'], 'relatorio': ['autor', 'dpi']}
+    return {chave: config[chave] for chave in chaves[etapa.nome]}
+
+def chave_entradas(etapa: Etapa, config: dict) -> str:
+    h = hashlib.sha256(impressao_digital(etapa.entradas(config), etapa.por_conteudo).encode())
+    h.update(json.dumps(parametros_etapa(etapa, config), sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+def etapa_atualizada(etapa: Etapa, config: dict, estado: dict) -> bool:
+    """True se as entradas e as saídas batem com a última execução"""
+    registro = estado.get(etapa.nome)
+    if not registro:
+        return False
+    saidas = etapa.saidas(config)
+    if not saidas or not all(os.path.exists(caminho) for caminho in saidas):
+        return False
+    return (registro.get('entradas') == chave_entradas(etapa, config)
+            and registro.get('saidas') == impressao_digital(saidas))
+
+def executar_pipeline(config: dict, workers: int = 2, forcar: bool = False) -> dict:
+    """Executa as etapas desatualizadas respeitando as dependências.
+
+    Retorna {etapa: status}, com status 'executada', 'atualizada' (pulada),
+    'falhou' ou 'bloqueada' (dependência falhou).
+    """
+    estado = {} if forcar else carregar_estado(config['dados'])
+    status = {}
+    pendentes = {etapa.nome: etapa for etapa in ETAPAS}
+    em_execucao = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pendentes or em_execucao:
+            for nome, etapa in list(pendentes.items()):
+                dependencias = [status.get(dep) for dep in etapa.dependencias]
+                if any(s in ('falhou', 'bloqueada') for s in dependencias):
+                    status[nome] = 'bloqueada'
+                    print(f"  ⏭️  {nome}: bloqueada (dependência falhou)")
+                    del pendentes[nome]
+                elif all(s in ('executada', 'atualizada') for s in dependencias):
+                    del pendentes[nome]
+                    if etapa_atualizada(etapa, config, estado):
+                        status[nome] = 'atualizada'
+                        instrumentacao.registrar('etapa_pulada', etapa=nome)
+                        print(f"  ✓ {nome}: atualizada, pulando")
+                        continue
+                    print(f"  ▶️  {nome}: executando...")
+                    em_execucao[executor.submit(executar_medida, nome, etapa.executar, config)] = (etapa, time.perf_counter())
+
+            if not em_execucao:
+                continue
+            concluidas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidas:
+                etapa, inicio = em_execucao.pop(futuro)
+                segundos = time.perf_counter() - inicio
+                try:
+                    futuro.result()
+                except Exception as e:
+                    status[etapa.nome] = 'falhou'
+                    estado.pop(etapa.nome, None)
+                    print(f"  ❌ {etapa.nome}: {type(e).__name__}: {str(e)}")
+                    continue
+                status[etapa.nome] = 'executada'
+                estado[etapa.nome] = {
+                    'entradas': chave_entradas(etapa, config),
+                    'saidas': impressao_digital(etapa.saidas(config)),
+                    'segundos': segundos,
+                }
+                salvar_estado(estado, config['dados'])
+                print(f"  ✓ {etapa.nome}: {segundos:.2f}s")
+    return status
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa ingestão, estatísticas, gráficos e relatório, só o que estiver desatualizado")
+    parser.add_argument('--entrada', default=index.caminho_arquivos, help="Diretório varrido em busca dos CSVs")
+    parser.add_argument('--padrao', default=index.padrao_arquivos, help="Padrão glob dos arquivos do INMET")
+    parser.add_argument('--dados', default=DIRETORIO_DADOS, help="Diretório do armazenamento")
+    parser.add_argument('--imagens', default="imagens_resultados", help="Diretório das imagens")
+    parser.add_argument('--relatorio', default="relatorio_meteorologico_completo.pdf", help="Arquivo PDF gerado")
+    parser.add_argument('--estacao', help="Código WMO da estação (obrigatório se houver mais de uma)")
+    parser.add_argument('--autor', default="Eduardo Hansen", help="Autor exibido na capa")
+    parser.add_argument('--dpi', type=int, default=REPORT_DPI, help="Resolução das figuras no PDF")
+    parser.add_argument('--workers', type=int, default=2, help="Etapas independentes executadas em paralelo")
+    parser.add_argument('--forcar', action='store_true', help="Executa todas as etapas, ignorando o estado salvo")
+    instrumentacao.adicionar_argumentos(parser)
+    args = parser.parse_args()
+    instrumentacao.configurar_argumentos(args)
+
+    inicio = time.perf_counter()
+    status = executar_pipeline(vars(args), args.workers, args.forcar)
+    falhas = [nome for nome, s in status.items() if s in ('falhou', 'bloqueada')]
+    print(f"\n{'❌ Etapas com problema: ' + ', '.join(falhas) if falhas else '✅ Pipeline concluído'} "
+          f"em {time.perf_counter() - inicio:.2f}s")
+    if falhas:
+        sys.exit(1)
@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+from armazenamento import DIRETORIO_DADOS, COLUNA_DATA_HORA, COLUNA_ESTACAO, carregar_agregado
+
+# Controle de qualidade (QC) vetorizado dos dados horários: verificação de
+# faixa física e de saltos, interpolação temporal de lacunas curtas e
+# preenchimento das lacunas longas pela climatologia mês x hora do dia.
+# Cada medida M ganha uma coluna QC_M com as marcas abaixo (bits), para que
+# as estatísticas possam excluir valores preenchidos sem recalcular nada.
+
+VALOR_AUSENTE = -9999.0
+
+QC_OK = 0
+QC_FORA_DA_FAIXA = 1      # valor fora dos limites físicos, descartado
+QC_SALTO = 2              # pico isolado em relação às horas vizinhas, descartado
+QC_AUSENTE = 4            # sem valor na origem (vazio ou -9999)
+QC_INTERPOLADO = 8        # preenchido por interpolação temporal
+QC_CLIMATOLOGIA = 16      # preenchido pela climatologia mês x hora
+QC_PREENCHIDO = QC_INTERPOLADO | QC_CLIMATOLOGIA
+QC_DESCARTADO = QC_FORA_DA_FAIXA | QC_SALTO | QC_AUSENTE
+
+# Limites físicos plausíveis para uma estação do INMET
+LIMITES = {
+    'PRECIPITACAO_TOTAL': (0.0, 150.0),
+    'PRESSAO_ESTACAO': (850.0, 1100.0),
+    'PRESSAO_MAX': (850.0, 1100.0),
+    'PRESSAO_MIN': (850.0, 1100.0),
+    'RADIACAO_GLOBAL': (0.0, 6000.0),
+    'TEMPERATURA_AR': (-40.0, 50.0),
+    'TEMPERATURA_ORVALHO': (-50.0, 40.0),
+    'TEMPERATURA_MAX': (-40.0, 50.0),
+    'TEMPERATURA_MIN': (-40.0, 50.0),
+    'TEMPERATURA_ORVALHO_MAX': (-50.0, 40.0),
+    'TEMPERATURA_ORVALHO_MIN': (-50.0, 40.0),
+    'UMIDADE_MAX': (0.0, 100.0),
+    'UMIDADE_MIN': (0.0, 100.0),
+    'UMIDADE_RELATIVA': (0.0, 100.0),
+    'VENTO_DIRECAO': (0.0, 360.0),
+    'VENTO_RAJADA_MAX': (0.0, 80.0),
+    'VENTO_VELOCIDADE': (0.0, 60.0),
+}
+
+# Variação máxima plausível entre horas consecutivas. Só para medidas
+# contínuas: chuva, radiação e vento mudam bruscamente de forma legítima.
+PASSOS_MAXIMOS = {
+    'PRESSAO_ESTACAO': 6.0,
+    'TEMPERATURA_AR': 8.0,
+    'TEMPERATURA_ORVALHO': 8.0,
+    'TEMPERATURA_MAX': 8.0,
+    'TEMPERATURA_MIN': 8.0,
+    'UMIDADE_RELATIVA': 40.0,
+}
+
+# Lacunas de até esse número de horas são interpoladas
+MAX_HORAS_INTERPOLACAO = 3
+
+def coluna_qc(medida: str) -> str:
+    return f"QC_{medida}"
+
+def medidas_com_limites(df: pd.DataFrame) -> list:
+    return [col for col in LIMITES if col in df.columns]
+
+def validar(df: pd.DataFrame, medidas=None):
+    """Aplica as verificações de faixa e de salto.
+
+    Retorna (valores, marcas): os valores com as leituras reprovadas e
+    ausentes trocadas por NaN e um DataFrame uint8 com as marcas de QC.
+    `df` deve estar ordenado por estação e DATA_HORA.
+    """
+    medidas = medidas or medidas_com_limites(df)
+    valores = df[medidas].replace(VALOR_AUSENTE, np.nan)
+    marcas = pd.DataFrame(np.where(valores.isna(), QC_AUSENTE, QC_OK).astype(np.uint8),
+                          index=df.index, columns=medidas)
+
+    # Horas vizinhas só contam se forem da mesma estação e exatamente 1h antes/depois
+    tempo = df[COLUNA_DATA_HORA]
+    mesma_estacao = pd.Series(True, index=df.index)
+    if COLUNA_ESTACAO in df.columns:
+        estacao = df[COLUNA_ESTACAO].astype(str)
+        mesma_estacao = estacao.eq(estacao.shift())
+    contigua_antes = mesma_estacao & tempo.diff().eq(pd.Timedelta(hours=1))
+    contigua_depois = contigua_antes.shift(-1, fill_value=False)
+
+    for medida in medidas:
+        minimo, maximo = LIMITES[medida]
+        serie = valores[medida]
+        fora = (serie < minimo) | (serie > maximo)
+        marcas.loc[fora.to_numpy(), medida] |= QC_FORA_DA_FAIXA
+        serie = serie.mask(fora)
+
+        if medida in PASSOS_MAXIMOS:
+            passo = PASSOS_MAXIMOS[medida]
+            salto_antes = contigua_antes & (serie - serie.shift()).abs().gt(passo)
+            salto_depois = contigua_depois & (serie - serie.shift(-1)).abs().gt(passo)
+            salto = salto_antes & salto_depois
+            marcas.loc[salto.to_numpy(), medida] |= QC_SALTO
+            serie = serie.mask(salto)
+
+        valores[medida] = serie
+    return valores, marcas
+
+def calcular_soma_hora_mes(df: pd.DataFrame) -> pd.DataFrame:
+    """Somas e contagens por mês x hora do dia de dados já validados
+    (ver descartar_reprovados).
+
+    É o agregado combinável (por partição) do qual a climatologia é obtida:
+    somando SOMA_M e HORAS_M de várias partições e dividindo, tem-se a
+    média climatológica de cada medida M.
+    """
+    valores = df[medidas_com_limites(df)].replace(VALOR_AUSENTE, np.nan)
+    chaves = [df[COLUNA_DATA_HORA].dt.month.rename('MES').astype(np.int8),
+              df[COLUNA_DATA_HORA].dt.hour.rename('HORA').astype(np.int8)]
+    agrupado = valores.groupby(chaves)
+    somas = agrupado.sum().add_prefix('SOMA_')
+    contagens = agrupado.count().astype(np.int32).add_prefix('HORAS_')
+    return pd.concat([somas, contagens], axis=1).reset_index()
+
+def climatologia_de_somas(somas: pd.DataFrame) -> pd.DataFrame:
+    """Converte somas/contagens mês x hora (de uma ou mais partições) em médias.
+
+    Retorna um DataFrame indexado por (ESTACAO, MES, HORA), ou (MES, HORA)
+    se não houver coluna ESTACAO, com uma coluna por medida.
+    """
+    chaves = [col for col in (COLUNA_ESTACAO, 'MES', 'HORA') if col in somas.columns]
+    total = somas.groupby(chaves, observed=True).sum(numeric_only=True)
+    medidas = [col[len('SOMA_'):] for col in total.columns if col.startswith('SOMA_')]
+    medias = {m: total[f"SOMA_{m}"] / total[f"HORAS_{m}"].replace(0, np.nan) for m in medidas}
+    return pd.DataFrame(medias, index=total.index)
+
+def carregar_climatologia(diretorio: str = DIRETORIO_DADOS, estacoes=None, anos=None) -> pd.DataFrame:
+    """Climatologia mês x hora por estação, a partir do agregado 'hora_mes' da ingestão"""
+    return climatologia_de_somas(carregar_agregado('hora_mes', diretorio, estacoes=estacoes, anos=anos))
+
+def valores_climatologicos(df: pd.DataFrame, climatologia: pd.DataFrame, medidas) -> pd.DataFrame:
+    """Valor climatológico de cada linha de `df` (busca vetorizada por mês x hora)"""
+    chaves = {'MES': df[COLUNA_DATA_HORA].dt.month, 'HORA': df[COLUNA_DATA_HORA].dt.hour}
+    if COLUNA_ESTACAO in climatologia.index.names:
+        chaves = {COLUNA_ESTACAO: df[COLUNA_ESTACAO].astype(str), **chaves}
+        climatologia = climatologia.rename(index=str, level=COLUNA_ESTACAO)
+    indice = pd.MultiIndex.from_arrays(list(chaves.values()), names=list(chaves))
+    colunas = [m for m in medidas if m in climatologia.columns]
+    resultado = climatologia[colunas].reindex(indice)
+    resultado.index = df.index
+    return resultado.reindex(columns=list(medidas))
+
+def aplicar_qc(df: pd.DataFrame, climatologia: pd.DataFrame = None, max_horas: int = MAX_HORAS_INTERPOLACAO,
+               preencher: bool = True) -> pd.DataFrame:
+    """Valida e preenche os dados horários, adicionando as colunas QC_<medida>.
+
+    Lacunas (ausências e leituras descartadas) de até `max_horas` horas
+    consecutivas são interpoladas no tempo, dentro de cada estação; as
+    demais recebem o valor da climatologia mês x hora (calculada a partir
+    do próprio `df` se não for informada). Com `preencher=False` só as
+    verificações são feitas e os valores descartados ficam NaN.
+    """
+    ordem = [COLUNA_ESTACAO, COLUNA_DATA_HORA] if COLUNA_ESTACAO in df.columns else [COLUNA_DATA_HORA]
+    df = df.sort_values(ordem, kind='stable').reset_index(drop=True)
+    medidas = medidas_com_limites(df)
+    valores, marcas = validar(df, medidas)
+
+    if preencher:
+        lacuna = valores.isna()
+        # Identificador e tamanho de cada sequência de horas faltantes
+        grupos_estacao = df[COLUNA_ESTACAO].astype(str) if COLUNA_ESTACAO in df.columns else pd.Series(0, index=df.index)
+        inicio_estacao = grupos_estacao.ne(grupos_estacao.shift())
+
+        if climatologia is None:
+            climatologia = climatologia_de_somas(calcular_soma_hora_mes(df.assign(**valores)))
+        clima = valores_climatologicos(df, climatologia, medidas)
+
+        indexado = valores.set_index(df[COLUNA_DATA_HORA])
+        for medida in medidas:
+            falta = lacuna[medida]
+            if not falta.any():
+                continue
+            sequencia = (falta.ne(falta.shift()) | inicio_estacao).cumsum()
+            tamanho = falta.groupby(sequencia).transform('sum')
+            curta = falta & (tamanho <= max_horas)
+
+            interpolado = (indexado[medida]
+                           .groupby(grupos_estacao.to_numpy())
+                           .transform(lambda s: s.interpolate(method='time', limit_area='inside'))
+                           .to_numpy())
+            usar_interpolacao = curta.to_numpy() & ~np.isnan(interpolado)
+            serie = valores[medida].to_numpy(copy=True)
+            serie[usar_interpolacao] = interpolado[usar_interpolacao]
+
+            usar_clima = falta.to_numpy() & ~usar_interpolacao & ~np.isnan(clima[medida].to_numpy())
+            serie[usar_clima] = clima[medida].to_numpy()[usar_clima]
+
+            valores[medida] = serie
+            marcas.loc[usar_interpolacao, medida] |= QC_INTERPOLADO
+            marcas.loc[usar_clima, medida] |= QC_CLIMATOLOGIA
+
+    resultado = df.copy()
+    for medida in medidas:
+        resultado[medida] = valores[medida].astype(df[medida].dtype)
+        resultado[coluna_qc(medida)] = marcas[medida].to_numpy()
+    return resultado
+
+def descartar_reprovados(df: pd.DataFrame) -> pd.DataFrame:
+    """Troca por NaN as leituras reprovadas na validação, sem preencher nem
+    adicionar colunas de QC (usado antes dos agregados da ingestão)"""
+    df = df.sort_values(COLUNA_DATA_HORA, kind='stable')
+    valores, _ = validar(df)
+    return df.assign(**{col: valores[col].astype(df[col].dtype) for col in valores.columns})
+
+def mascara_preenchidos(df: pd.DataFrame, medida: str) -> pd.Series:
+    """True nas linhas em que a medida foi preenchida pelo QC"""
+    return (df[coluna_qc(medida)] & QC_PREENCHIDO) > 0
@@ -0,0 +1,48 @@
+import os
+import sys
+import glob
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from index import LINHAS_METADADOS, campos_estacao  # noqa: E402
+
+ARQUIVO_2025 = glob.glob(os.path.join(RAIZ, 'INMET_*_A_31-05-2025.CSV'))[0]
+LINHA_CODIGO_WMO = campos_estacao.index('CODIGO_WMO')
+
+def escrever_inmet(destino: str, linhas: int, codigo: str = 'A806', origem: str = ARQUIVO_2025) -> str:
+    """Recorte de um CSV do INMET do projeto: cabeçalho + as primeiras
+    `linhas` horas, com outro código WMO se pedido"""
+    with open(origem, 'rb') as f:
+        conteudo = f.read().split(b'\n')
+    cabecalho, dados = conteudo[:LINHAS_METADADOS + 1], conteudo[LINHAS_METADADOS + 1:]
+    cabecalho[LINHA_CODIGO_WMO] = cabecalho[LINHA_CODIGO_WMO].replace(b'A806', codigo.encode())
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    with open(destino, 'wb') as f:
+        f.write(b'\n'.join(cabecalho + dados[:linhas]) + b'\n')
+    return destino
+
+@pytest.fixture
+def inmet(tmp_path):
+    """Fábrica de CSVs do INMET em tmp_path/csv"""
+    def criar(nome: str, linhas: int = 24 * 14, codigo: str = 'A806') -> str:
+        return escrever_inmet(str(tmp_path / 'csv' / nome), linhas, codigo)
+    return criar
+
+ARQUIVO_2024 = glob.glob(os.path.join(RAIZ, 'INMET_*_A_31-12-2024.CSV'))[0]
+
+@pytest.fixture(scope='session')
+def dados_teste(tmp_path_factory):
+    """Armazenamento pequeno, ingerido uma vez: A806 em 2024 e 2025 e S999
+    em 2025, 60 dias de cada arquivo"""
+    from index import atualizar_armazenamento
+    raiz = tmp_path_factory.mktemp('armazenamento')
+    arquivos = [
+        escrever_inmet(str(raiz / 'csv' / 'INMET_S_SC_A806_X_2024.CSV'), 24 * 60, origem=ARQUIVO_2024),
+        escrever_inmet(str(raiz / 'csv' / 'INMET_S_SC_A806_X_2025.CSV'), 24 * 60),
+        escrever_inmet(str(raiz / 'csv' / 'INMET_S_SC_S999_X_2025.CSV'), 24 * 60, codigo='S999'),
+    ]
+    atualizar_armazenamento(arquivos, str(raiz / 'dados'), max_workers=1)
+    return str(raiz / 'dados')
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agregacao import Histograma, calcular_estatisticas_anuais_streaming, calcular_histogramas
+from gerar_imagens import calculate_annual_stats, load_daily_data, prepare_frames
+
+def test_estatisticas_anuais_streaming_iguais_as_em_memoria(dados_teste):
+    for estacoes in (None, ['A806']):
+        esperado = calculate_annual_stats(load_daily_data(dados_teste, estacoes))
+        streaming = calcular_estatisticas_anuais_streaming(dados_teste, estacoes)
+        assert list(streaming['Ano']) == list(esperado['Ano'])
+        np.testing.assert_allclose(streaming.iloc[:, 1:].to_numpy(dtype=float),
+                                   esperado.iloc[:, 1:].to_numpy(dtype=float), atol=1e-4)
+
+def test_prepare_frames_usa_o_caminho_streaming(dados_teste):
+    frames = prepare_frames(dados_teste, ['A806'], streaming=True)
+    pd.testing.assert_frame_equal(frames['stats'], calcular_estatisticas_anuais_streaming(dados_teste, ['A806']))
+
+def test_histogramas_de_particoes_combinados_iguais_ao_do_conjunto():
+    rng = np.random.default_rng(0)
+    valores = np.round(rng.gamma(2.0, 150.0, 5000), 0)
+    valores[::97] = np.nan
+    valores[::101] = -9999.0
+    partes = [pd.DataFrame({'RADIACAO_GLOBAL': parte}) for parte in np.array_split(valores, 3)]
+
+    inteiro = Histograma('RADIACAO_GLOBAL')
+    inteiro.adicionar(valores)
+    combinado = Histograma('RADIACAO_GLOBAL')
+    for parte in partes:
+        parcial = Histograma('RADIACAO_GLOBAL')
+        parcial.adicionar(parte['RADIACAO_GLOBAL'])
+        combinado += parcial
+    agregado = pd.concat([calcular_histogramas(parte) for parte in partes], ignore_index=True)
+
+    validos = valores[~np.isnan(valores) & (valores != -9999.0)]
+    assert inteiro.total == len(validos)
+    np.testing.assert_array_equal(combinado.contagens, inteiro.contagens)
+    np.testing.assert_array_equal(Histograma.de_agregado(agregado, 'RADIACAO_GLOBAL').contagens, inteiro.contagens)
+
+def test_valores_fora_da_grade_vao_para_as_faixas_das_pontas():
+    histograma = Histograma('PRECIPITACAO_TOTAL')
+    histograma.adicionar([-1.0, 0.0, 0.2, 149.9, 400.0])
+    assert histograma.contagens[0] == 2 and histograma.contagens[1] == 1 and histograma.contagens[-1] == 2
+
+def test_reagrupar_preserva_contagens_em_faixas_finas_inteiras():
+    histograma = Histograma('PRECIPITACAO_TOTAL')
+    histograma.adicionar(np.arange(1.0, 20.01, 0.2).round(1))
+    contagens, bordas = histograma.reagrupar(faixas=7)
+
+    assert len(contagens) <= 7 and len(bordas) == len(contagens) + 1
+    assert contagens.sum() == histograma.total
+    assert bordas[0] == pytest.approx(1.0) and bordas[-1] >= 20.0
+    # Bordas largas caem sobre bordas da grade fina
+    assert np.isin(np.round(bordas, 6), np.round(histograma.bordas, 6)).all()
+    # Cada faixa larga soma exatamente as finas que cobre
+    for contagem, inicio, fim in zip(contagens, bordas[:-1], bordas[1:]):
+        centros = (histograma.bordas[:-1] + histograma.bordas[1:]) / 2
+        assert contagem == histograma.contagens[(centros > inicio) & (centros < fim)].sum()
+
+def test_reagrupar_histograma_vazio():
+    contagens, bordas = Histograma('VENTO_VELOCIDADE').reagrupar()
+    assert len(contagens) == 0 and len(bordas) == 1
+
+def kde_direta(histograma: Histograma, largura_banda: float) -> np.ndarray:
+    centros = (histograma.bordas[:-1] + histograma.bordas[1:]) / 2
+    ocupadas = np.flatnonzero(histograma.contagens)
+    distancias = (centros[:, None] - centros[ocupadas][None, :]) / largura_banda
+    nucleo = np.exp(-0.5 * distancias ** 2) / (largura_banda * np.sqrt(2 * np.pi))
+    return nucleo @ histograma.contagens[ocupadas] / histograma.total
+
+def test_kde_por_fft_igual_a_soma_direta_dos_nucleos():
+    rng = np.random.default_rng(1)
+    histograma = Histograma('PRESSAO_ESTACAO')
+    histograma.adicionar(np.round(rng.normal(1015.0, 4.0, 20000), 1))
+    centros, densidade = histograma.densidade_kde(largura_banda=1.5)
+
+    # Núcleo truncado em 4 desvios e renormalizado na grade: diferença pequena
+    np.testing.assert_allclose(densidade, kde_direta(histograma, 1.5), atol=1e-3 * densidade.max())
+    assert np.sum(densidade) * 0.1 == pytest.approx(1.0, abs=1e-6)
+    assert centros[np.argmax(densidade)] == pytest.approx(1015.0, abs=0.5)
+
+def test_kde_largura_de_scott_e_histograma_vazio():
+    histograma = Histograma('VENTO_VELOCIDADE')
+    histograma.adicionar(np.full(100, 3.0))
+    # Desvio nulo: a largura de banda cai para a largura da faixa
+    _, densidade = histograma.densidade_kde()
+    np.testing.assert_allclose(densidade, kde_direta(histograma, 0.1), atol=1e-3 * densidade.max())
+
+    centros, densidade = Histograma('VENTO_VELOCIDADE').densidade_kde()
+    assert len(centros) == len(densidade) and not densidade.any()
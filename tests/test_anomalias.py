@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from anomalias import CRITERIOS_EPISODIOS, COLUNAS_EPISODIOS, detectar_episodios, detectar_todos_episodios
+
+def serie_horaria(anomalia: float, horas: int = 24 * 10) -> pd.DataFrame:
+    return pd.DataFrame({
+        'DATA_HORA': pd.date_range('2025-01-01', periods=horas, freq='h').astype('datetime64[us]'),
+        'ESTACAO': 'A806',
+        'ANOMALIA_TEMPERATURA_AR': np.full(horas, anomalia, dtype=np.float32),
+        'PRECIPITACAO_TOTAL': np.zeros(horas, dtype=np.float32),
+    })
+
+def test_criterio_sem_episodios_retorna_tabela_vazia():
+    episodios = detectar_episodios(serie_horaria(0.0), 'ONDA_DE_FRIO', CRITERIOS_EPISODIOS['ONDA_DE_FRIO'])
+    assert episodios.empty
+    assert list(episodios.columns) == COLUNAS_EPISODIOS
+    assert pd.api.types.is_datetime64_any_dtype(episodios['INICIO'])
+
+def test_criterios_com_e_sem_episodios_juntos():
+    episodios = detectar_todos_episodios(serie_horaria(5.0))
+    assert set(episodios['TIPO']) == {'ONDA_DE_CALOR'}
+    assert len(episodios) == 1
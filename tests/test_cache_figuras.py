@@ -0,0 +1,41 @@
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+import cache_figuras
+from cache_figuras import chave_figura, hash_dados, versao_codigo
+
+def carregar_funcao(caminho, corpo: str):
+    """Importa `plotar` de um módulo escrito em `caminho` (cada versão do código em um arquivo)"""
+    caminho.write_text(f"def plotar(df):\n    {corpo}\n")
+    spec = importlib.util.spec_from_file_location(caminho.stem, caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo.plotar
+
+def dados(valor: float = 20.0) -> pd.DataFrame:
+    return pd.DataFrame({'ANO': [2024, 2025], 'MEDIA': np.array([valor, 21.0], dtype=np.float32)})
+
+def test_chave_estavel_para_as_mesmas_entradas(tmp_path):
+    plotar = carregar_funcao(tmp_path / 'v1.py', 'return df')
+    chave = chave_figura(hash_dados(dados()), {'bins': 30, 'cor': 'red'}, versao_codigo(plotar))
+    # Outra cópia dos dados e parâmetros em outra ordem
+    assert chave_figura(hash_dados(dados().copy()), {'cor': 'red', 'bins': 30}, versao_codigo(plotar)) == chave
+
+def test_chave_muda_com_dados_parametros_ou_codigo(tmp_path, monkeypatch):
+    v1 = carregar_funcao(tmp_path / 'v1.py', 'return df')
+    v2 = carregar_funcao(tmp_path / 'v2.py', 'return df.copy()')
+    base = chave_figura(hash_dados(dados()), {'bins': 30}, versao_codigo(v1))
+
+    assert chave_figura(hash_dados(dados(20.5)), {'bins': 30}, versao_codigo(v1)) != base
+    assert chave_figura(hash_dados(dados()), {'bins': 31}, versao_codigo(v1)) != base
+    assert chave_figura(hash_dados(dados()), {'bins': 30}, versao_codigo(v2)) != base
+    monkeypatch.setattr(cache_figuras, 'VERSAO_CACHE', cache_figuras.VERSAO_CACHE + 1)
+    assert chave_figura(hash_dados(dados()), {'bins': 30}, versao_codigo(v1)) != base
+
+def test_hash_dados_considera_so_as_colunas_do_recorte():
+    df = dados().assign(OUTRA=[1, 2])
+    assert hash_dados(df, ['ANO', 'MEDIA']) == hash_dados(df.assign(OUTRA=[3, 4]), ['ANO', 'MEDIA'])
+    # Renomear uma coluna muda o recorte, mesmo com os mesmos valores
+    assert hash_dados(df, ['ANO']) != hash_dados(df.rename(columns={'ANO': 'ANOS'}), ['ANOS'])
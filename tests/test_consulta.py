@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+import pytest
+
+import consulta
+from consulta import consultar
+
+@pytest.fixture
+def particoes_lidas(monkeypatch):
+    """Registra a partição (ESTACAO=/ANO=) de cada grupo de linhas selecionado"""
+    lidas = []
+    original = consulta.grupos_de_linhas
+    def registrar(*args):
+        grupos = original(*args)
+        lidas.extend(os.path.basename(os.path.dirname(os.path.dirname(grupo.path))) + '/' +
+                     os.path.basename(os.path.dirname(grupo.path)) for grupo in grupos)
+        return grupos
+    monkeypatch.setattr(consulta, 'grupos_de_linhas', registrar)
+    return lidas
+
+def filtrar(df: pd.DataFrame, estacoes, inicio, fim) -> pd.DataFrame:
+    """Mesmo recorte feito em memória, sobre a leitura completa"""
+    return df[df['ESTACAO'].isin(estacoes) & (df.index >= inicio) & (df.index < fim)]
+
+def test_semana_de_uma_estacao_le_um_grupo(dados_teste, particoes_lidas):
+    df = consultar(dados_teste, ['TEMPERATURA_AR'], ['A806'], '2024-01-08', '2024-01-14')
+    assert df.attrs['grupos_lidos'] == 1 and particoes_lidas == ['ESTACAO=A806/ANO=2024']
+    assert len(df) == 7 * 24 and list(df.columns) == ['ESTACAO', 'TEMPERATURA_AR']
+
+    completo = consultar(dados_teste, ['TEMPERATURA_AR'])
+    esperado = filtrar(completo, ['A806'], '2024-01-08', '2024-01-15')
+    pd.testing.assert_frame_equal(df, esperado, check_categorical=False)
+
+def test_intervalo_entre_anos_le_so_as_particoes_alcancadas(dados_teste, particoes_lidas):
+    df = consultar(dados_teste, ['TEMPERATURA_AR'], ['A806'], '2024-02-26', '2025-01-03')
+    # Último grupo de 2024 e primeiro de 2025; S999 nunca é aberta
+    assert sorted(particoes_lidas) == ['ESTACAO=A806/ANO=2024', 'ESTACAO=A806/ANO=2025']
+    assert df.attrs['grupos_lidos'] == 2
+    assert df.index.min() == pd.Timestamp('2024-02-26') and df.index.max() == pd.Timestamp('2025-01-03 23:00')
+
+def test_filtro_so_de_estacao_le_todos_os_grupos_dela(dados_teste, particoes_lidas):
+    df = consultar(dados_teste, ['TEMPERATURA_AR'], ['S999'])
+    assert set(particoes_lidas) == {'ESTACAO=S999/ANO=2025'}
+    assert df.attrs['grupos_lidos'] == len(particoes_lidas) and len(df) == 60 * 24
+
+def test_intervalo_sem_dados_nao_le_nenhum_grupo(dados_teste, particoes_lidas):
+    df = consultar(dados_teste, ['TEMPERATURA_AR'], ['A806'], '2024-06-01', '2024-06-30')
+    assert df.attrs['grupos_lidos'] == 0 and particoes_lidas == [] and df.empty
@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import gerar_imagens
+from gerar_imagens import (
+    CHART_JOBS, bin_temp_vs_humidity, chart_cache_key, init_render_worker, plot_temp_vs_humidity
+)
+
+def horas(temperatura, umidade) -> pd.DataFrame:
+    return pd.DataFrame({'TEMPERATURA_AR': np.asarray(temperatura, dtype=np.float32),
+                         'UMIDADE_RELATIVA': np.asarray(umidade, dtype=np.float32)})
+
+def test_histograma_2d_conta_cada_par_valido_uma_vez():
+    counts, temp_edges, humidity_edges = bin_temp_vs_humidity(horas([20.0, 20.2, 25.0, np.nan], [80, 80, 60, 70]))
+    assert counts.sum() == 3
+    assert counts.shape == (len(temp_edges) - 1, len(humidity_edges) - 1)
+
+def test_sem_pares_validos_gera_grafico_vazio(tmp_path):
+    df = horas([20.0, 21.0, 22.0], [np.nan, np.nan, np.nan])
+    counts, temp_edges, humidity_edges = bin_temp_vs_humidity(df)
+    assert counts.size == 0 and temp_edges.size == 0 and humidity_edges.size == 0
+
+    init_render_worker()
+    plot_temp_vs_humidity(df, str(tmp_path), sample_points=10)
+    assert os.path.exists(tmp_path / 'temp_vs_umidade.png')
+
+def test_chave_do_grafico_normaliza_os_parametros_padrao(monkeypatch):
+    job = next(job for job in CHART_JOBS if job.chart is plot_temp_vs_humidity)
+    frames = {'hourly': horas([20.0, 21.0], [80, 70]).assign(ESTACAO='A806')}
+    chave = chart_cache_key(job, frames)
+
+    assert chart_cache_key(job._replace(params={'mode': 'density', 'sample_points': 0}), frames) == chave
+    assert chart_cache_key(job._replace(params={'sample_points': 500}), frames) != chave
+    # Só as colunas do gráfico entram na chave
+    assert chart_cache_key(job, {'hourly': frames['hourly'].assign(ESTACAO='S999')}) == chave
+    assert chart_cache_key(job, {'hourly': horas([20.0, 21.5], [80, 70])}) != chave
+    assert chart_cache_key(job._replace(filename='outro.png'), frames) != chave
+    # Código compartilhado pelos gráficos também faz parte da chave
+    monkeypatch.setattr(gerar_imagens, 'CHART_HELPERS', gerar_imagens.CHART_HELPERS[:-1])
+    assert chart_cache_key(job, frames) != chave
@@ -0,0 +1,7 @@
+from gerar_relatorio import BatchJob, batch_job_name, parse_period
+
+def test_nome_do_relatorio_em_lote():
+    assert batch_job_name(BatchJob('A806', *parse_period('2010-2025'))) == 'A806_2010-2025'
+    assert batch_job_name(BatchJob('A806', *parse_period('2024'))) == 'A806_2024'
+    assert batch_job_name(BatchJob('A806', *parse_period('2024-2024'))) == 'A806_2024'
+    assert batch_job_name(BatchJob('A806', *parse_period('todo'))) == 'A806_completo'
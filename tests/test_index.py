@@ -0,0 +1,53 @@
+import os
+
+from armazenamento import carregar_manifesto, carregar_estacoes
+from index import atualizar_armazenamento
+
+def test_arquivo_so_com_cabecalho_nao_interrompe_a_ingestao(tmp_path, inmet):
+    dados = str(tmp_path / 'dados')
+    arquivos = [inmet('INMET_S_SC_A806_X_2025.CSV'), inmet('INMET_S_SC_A806_X_VAZIO.CSV', linhas=0)]
+
+    assert atualizar_armazenamento(arquivos, dados, max_workers=1) == 2
+    manifesto = carregar_manifesto(dados)
+    vazio = manifesto['INMET_S_SC_A806_X_VAZIO.CSV']
+    assert vazio['registros'] == 0 and vazio['particoes'] == []
+    assert list(carregar_estacoes(dados)['CODIGO_WMO']) == ['A806']
+
+    # Sem mudanças, o arquivo vazio também conta como em dia
+    assert atualizar_armazenamento(arquivos, dados, max_workers=1) == 0
+
+def test_execucao_em_outra_raiz_nao_remove_as_demais_estacoes(tmp_path, inmet):
+    dados = str(tmp_path / 'dados')
+    a806 = inmet('a806/INMET_S_SC_A806_X_2025.CSV')
+    s999 = inmet('s999/INMET_S_SC_S999_X_2025.CSV', codigo='S999')
+    atualizar_armazenamento([a806, s999], dados, max_workers=1, raiz=str(tmp_path / 'csv'))
+
+    # Só o subdiretório de uma estação: a outra continua no armazenamento
+    assert atualizar_armazenamento([s999], dados, max_workers=1, raiz=os.path.dirname(s999)) == 0
+    assert len(carregar_manifesto(dados)) == 2
+    assert sorted(carregar_estacoes(dados)['CODIGO_WMO']) == ['A806', 'S999']
+
+def test_arquivo_removido_da_raiz_tem_as_particoes_removidas(tmp_path, inmet):
+    dados = str(tmp_path / 'dados')
+    arquivos = [inmet('INMET_S_SC_A806_X_2025.CSV'), inmet('INMET_S_SC_S999_X_2025.CSV', codigo='S999')]
+    atualizar_armazenamento(arquivos, dados, max_workers=1)
+    particoes = carregar_manifesto(dados)['INMET_S_SC_S999_X_2025.CSV']['particoes']
+
+    os.remove(arquivos[1])
+    atualizar_armazenamento(arquivos[:1], dados, max_workers=1, raiz=str(tmp_path / 'csv'))
+    assert list(carregar_manifesto(dados)) == ['INMET_S_SC_A806_X_2025.CSV']
+    assert not any(os.path.exists(os.path.join(dados, particao)) for particao in particoes)
+
+def test_so_arquivos_alterados_sao_relidos(tmp_path, inmet):
+    dados = str(tmp_path / 'dados')
+    arquivos = [inmet('INMET_S_SC_A806_X_2025.CSV', linhas=48), inmet('INMET_S_SC_S999_X_2025.CSV', codigo='S999')]
+    assert atualizar_armazenamento(arquivos, dados, max_workers=1) == 2
+    assert atualizar_armazenamento(arquivos, dados, max_workers=1) == 0
+
+    # Mesmo conteúdo com outro mtime: o hash confirma que nada mudou
+    os.utime(arquivos[1], ns=(0, 0))
+    assert atualizar_armazenamento(arquivos, dados, max_workers=1) == 0
+
+    inmet('INMET_S_SC_A806_X_2025.CSV', linhas=72)
+    assert atualizar_armazenamento(arquivos, dados, max_workers=1) == 1
+    assert carregar_manifesto(dados)['INMET_S_SC_A806_X_2025.CSV']['registros'] == 72
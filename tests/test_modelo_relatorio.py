@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from gerar_imagens import load_hourly_chart_data
+from modelo_relatorio import MEDIDAS_DESCRITAS, descrever_temperatura_umidade, montar_modelo
+
+@pytest.fixture(scope='module')
+def modelo(dados_teste):
+    return montar_modelo(dados_teste, 'A806', [2025])
+
+def test_correlacao_usa_os_pares_horarios_do_grafico(dados_teste, modelo):
+    horario = load_hourly_chart_data(dados_teste, ['A806'], [2025])
+    pares = horario[['TEMPERATURA_AR', 'UMIDADE_RELATIVA']].dropna()
+    correlacao = modelo['temperatura_umidade']
+    assert correlacao['pares'] == len(pares)
+    assert correlacao['r'] == pytest.approx(np.corrcoef(pares['TEMPERATURA_AR'], pares['UMIDADE_RELATIVA'])[0, 1])
+    assert f"r = {correlacao['r']:+.2f}".replace('.', ',') in modelo['achados']['temperatura_umidade']
+
+def test_disponibilidade_e_medias_mensais_vem_do_agregado(modelo):
+    assert set(modelo['disponibilidade']) == set(MEDIDAS_DESCRITAS)
+    assert all(0 < fracao <= 1 for fracao in modelo['disponibilidade'].values())
+    # Radiação só nas horas de sol: menos horas válidas que a temperatura
+    assert modelo['disponibilidade']['RADIACAO_GLOBAL'] < modelo['disponibilidade']['TEMPERATURA_AR']
+    # 60 dias a partir de 1º de janeiro: o único dia de março fica de fora
+    assert list(modelo['radiacao'].index) == [1, 2] and list(modelo['vento']['mensal'].index) == [1, 2]
+    assert np.isnan(modelo['vento']['tendencia'])
+    assert 'janeiro' in modelo['achados']['radiacao_vento'] and 'fevereiro' in modelo['achados']['radiacao_vento']
+
+def test_textos_sem_dados_suficientes(modelo):
+    assert "Não há pares suficientes" in descrever_temperatura_umidade(None)
+    assert "não tem anos completos suficientes" in modelo['achados']['analise']
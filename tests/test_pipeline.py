@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from index import padrao_arquivos
+from pipeline import executar_pipeline
+
+TODAS = ('ingestao', 'estatisticas', 'graficos', 'relatorio')
+
+@pytest.fixture
+def config(tmp_path, inmet):
+    inmet('INMET_S_SC_A806_X_2025.CSV')
+    return {'entrada': str(tmp_path / 'csv'), 'padrao': padrao_arquivos, 'dados': str(tmp_path / 'dados'),
+            'imagens': str(tmp_path / 'imagens'), 'relatorio': str(tmp_path / 'relatorio.pdf'),
+            'estacao': 'A806', 'autor': 'Teste', 'dpi': 72}
+
+def executadas(status: dict) -> list:
+    return [nome for nome in TODAS if status[nome] == 'executada']
+
+def test_entrada_sem_mudancas_pula_todas_as_etapas(config):
+    assert executadas(executar_pipeline(config)) == list(TODAS)
+    assert os.path.exists(config['relatorio'])
+    assert executar_pipeline(config) == dict.fromkeys(TODAS, 'atualizada')
+
+def test_csv_alterado_reexecuta_so_o_que_depende_do_conteudo(config, inmet):
+    executar_pipeline(config)
+    csv = os.path.join(config['entrada'], 'INMET_S_SC_A806_X_2025.CSV')
+
+    # Outro mtime, mesmo conteúdo: a ingestão confere o hash e o
+    # armazenamento não muda, então as demais etapas continuam em dia
+    os.utime(csv, ns=(0, 0))
+    assert executadas(executar_pipeline(config)) == ['ingestao']
+
+    inmet('INMET_S_SC_A806_X_2025.CSV', linhas=24 * 21)
+    assert executadas(executar_pipeline(config)) == list(TODAS)
+    assert executar_pipeline(config) == dict.fromkeys(TODAS, 'atualizada')
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from qualidade import (
+    QC_AUSENTE, QC_CLIMATOLOGIA, QC_FORA_DA_FAIXA, QC_INTERPOLADO, QC_OK, QC_SALTO,
+    aplicar_qc, mascara_preenchidos
+)
+
+def serie(valores, estacao: str = 'A806', inicio: str = '2025-01-01') -> pd.DataFrame:
+    return pd.DataFrame({
+        'DATA_HORA': pd.date_range(inicio, periods=len(valores), freq='h'),
+        'ESTACAO': estacao,
+        'TEMPERATURA_AR': np.asarray(valores, dtype=np.float32),
+    })
+
+def climatologia_constante(valor: float) -> pd.DataFrame:
+    indice = pd.MultiIndex.from_product([range(1, 13), range(24)], names=['MES', 'HORA'])
+    return pd.DataFrame({'TEMPERATURA_AR': valor}, index=indice)
+
+def rampa(horas: int = 24) -> np.ndarray:
+    return 20 + 0.1 * np.arange(horas)
+
+def test_leituras_fora_da_faixa_e_saltos_sao_descartados_e_marcados():
+    valores = rampa()
+    valores[3] = 80.0           # acima de 50 °C
+    valores[10] += 15.0         # pico isolado entre horas vizinhas
+    valores[12] = -9999.0       # sentinela de ausência do INMET
+    df = aplicar_qc(serie(valores), preencher=False)
+
+    marcas = df['QC_TEMPERATURA_AR']
+    assert marcas[3] == QC_FORA_DA_FAIXA and marcas[10] == QC_SALTO and marcas[12] == QC_AUSENTE
+    assert df['TEMPERATURA_AR'][[3, 10, 12]].isna().all()
+    assert (marcas.drop([3, 10, 12]) == QC_OK).all()
+
+def test_lacuna_curta_interpolada_e_longa_preenchida_pela_climatologia():
+    valores = rampa()
+    valores[4:6] = np.nan       # 2 horas: interpolação
+    valores[12:17] = np.nan     # 5 horas: climatologia
+    df = aplicar_qc(serie(valores), climatologia_constante(15.0))
+
+    marcas = df['QC_TEMPERATURA_AR']
+    assert (marcas[4:6] == QC_AUSENTE | QC_INTERPOLADO).all()
+    np.testing.assert_allclose(df['TEMPERATURA_AR'][4:6], rampa()[4:6], atol=1e-4)
+    assert (marcas[12:17] == QC_AUSENTE | QC_CLIMATOLOGIA).all()
+    assert (df['TEMPERATURA_AR'][12:17] == 15.0).all()
+    assert list(np.flatnonzero(mascara_preenchidos(df, 'TEMPERATURA_AR'))) == [4, 5, 12, 13, 14, 15, 16]
+
+def test_interpolacao_nao_atravessa_estacoes():
+    # A lacuna no fim da primeira estação não tem vizinho posterior nela
+    primeira = rampa(6)
+    primeira[-1] = np.nan
+    df = aplicar_qc(pd.concat([serie(primeira, 'A806'), serie(rampa(6), 'S999')], ignore_index=True),
+                    climatologia_constante(15.0))
+    linha = df.index[(df['ESTACAO'] == 'A806')][-1]
+    assert df.loc[linha, 'QC_TEMPERATURA_AR'] == QC_AUSENTE | QC_CLIMATOLOGIA
+    assert df.loc[linha, 'TEMPERATURA_AR'] == 15.0